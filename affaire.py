@@ -2,4 +2,5 @@ import sys
 from src.affaire.main import Main
 
 
-Main.main(sys.argv)
+if __name__ == '__main__':  # the import and export workers re-import the main module
+    Main.main(sys.argv)
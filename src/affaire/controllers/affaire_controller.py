@@ -1,4 +1,5 @@
 import datetime
+import os
 import re
 import functools
 import time
@@ -8,10 +9,13 @@ from typing import List, Callable
 from src.core_modules import AbstractController
 from src.core_modules.utils import SubjectInterface, ObserverInterface
 from src.core_modules.utils import SettingsProviderInterface
+from src.core_modules.utils import Reiterable
 
 from src.affaire.exceptions import SettingsKeyError, HelpKeyError, UnknownParameterException
+from src.affaire.exceptions import UndefinedValueException
 from src.affaire.models import Task
 from src.affaire.utils import AuthenticationServer
+from src.affaire.utils import TaskImporter, TaskExporter
 from src.affaire.utils import ArgsSchemaProviderInterface
 
 
@@ -154,8 +158,9 @@ class AffaireController(AbstractController, SubjectInterface):
         """
         params = self._parse_args('task_read')
 
+        # streamed to the observers, each of them iterates the tasks from the start
         return {
-            'task_list': Task.select(params, self._params)
+            'task_list': Reiterable(lambda: Task.iterate(params, self._params, fields=Task.LISTED_FIELDS))
         }
 
     def task_update(self):
@@ -184,19 +189,17 @@ class AffaireController(AbstractController, SubjectInterface):
             if k not in read_params
         }
 
-        tasks = Task.select(select_params, self._params)
-        for task in tasks:
-            if not update_params:
-                task.is_active = not task.is_active
-            for param, val in update_params.items():
-                props = self._params.get(param, None)
-                if props is None:
-                    raise UnknownParameterException(f'Unknown parameter {param}')
-                field_name = props.get('field', None)
-                if field_name:
-                    setattr(task, field_name, val)
+        values = dict()
+        for param, val in update_params.items():
+            props = self._params.get(param, None)
+            if props is None:
+                raise UnknownParameterException(f'Unknown parameter {param}')
+            field_name = props.get('field', None)
+            if field_name:
+                values[field_name] = val
 
-            task.save(False)
+        # a single UPDATE statement, empty values toggle the tasks
+        Task.update(select_params, self._params, values)
 
         self._is_updated = True
 
@@ -209,11 +212,38 @@ class AffaireController(AbstractController, SubjectInterface):
         if not params and not self._params.get('-f'):
             self.notify_observers({
                 'action_name': 'action_task_delete',
-                'msg': 'This action will remove all your tasks. Are you sure? [y/n]: '
+                'msg': f'This action will remove all your tasks ({Task.count()}). Are you sure? [y/n]: '
             })
         else:
-            for task in Task.select(params, self._params):
-                task.delete(True)
+            Task.delete_where(params, self._params)
+
+    @notify('task_import')
+    def task_import(self):
+        """
+        INSERT by bulk from a JSON lines or CSV file
+        :return:
+        """
+        path, fmt, workers = self._get_transfer_params('task_import')
+        if not os.path.isfile(path):
+            raise UndefinedValueException(f'The file {path} does not exist')
+        report = TaskImporter(path, fmt, workers).run()
+        if report['count']:
+            self._is_updated = True
+
+        return {'msg': self._format_report('Imported', report)}
+
+    @notify('task_export')
+    def task_export(self):
+        """
+        SELECT to a JSON lines or CSV file
+        :return:
+        """
+        path, fmt, workers = self._get_transfer_params('task_export')
+        if not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+            raise UndefinedValueException(f'The directory of {path} does not exist')
+        report = TaskExporter(path, fmt, workers).run()
+
+        return {'msg': self._format_report('Exported', report)}
 
     @notify('help')
     def help(self):
@@ -290,6 +320,46 @@ class AffaireController(AbstractController, SubjectInterface):
 
         return action
 
+    def _get_transfer_params(self, action_name: str) -> tuple:
+        """
+        Return the path, the format and the number of workers of the import or export.
+        :param action_name:
+        :return:
+        """
+        values = dict()
+        for arg, val in self._parse_args(action_name).items():
+            for param, props in self._params.items():
+                if arg in [param, *props.get('aliases', list())]:
+                    values[param] = val
+                    break
+            else:
+                raise UnknownParameterException(f'Unknown parameter {arg}')
+
+        path = values.get('-p')
+        if not path:
+            raise UndefinedValueException('The file path is required')
+        workers = values.get('-w')
+        if workers is not None and not workers.isdigit():
+            raise UndefinedValueException(f'Unexpected number of workers {workers}')
+
+        return path, values.get('-f'), int(workers) if workers else None
+
+    @staticmethod
+    def _format_report(verb: str, report: dict) -> str:
+        """
+        Throughput of the import or export.
+        :param verb:
+        :param report:
+        :return:
+        """
+        seconds = report['seconds']
+        rate = report['count'] / seconds if seconds else 0
+        msg = f'{verb} {report["count"]} tasks in {seconds:.2f}s ({rate:.0f} tasks/s)'
+        if report['errors']:
+            msg += f', {report["errors"]} invalid records skipped'
+
+        return msg
+
     def _parse_args(self, action_name: str) -> dict:
         """
         Fusion CLI arguments to pairs (key, value)
@@ -10,6 +10,7 @@ from src.affaire.controllers import AffaireController
 from src.affaire.views import CLIView
 
 from src.core_modules import AbstractModel
+from src.core_modules.utils import Connection, PragmaProfile
 
 
 class Main:
@@ -19,16 +20,21 @@ class Main:
     Set the entry view.
     Run the view.
     """
+    # version of the database schema, see AbstractModel.upgrade_db
+    SCHEMA_VERSION = 2
+
     @staticmethod
     def main(args: List[str]):
-        db_path = Main.get_db_path(args)
-        Main.bound_db(db_path)
-
         settings_path = Main.get_settings_path(args)
         fallback_json_path = Main.get_fallback_settings_path(args)
         json_args_provider_path = Main.get_json_args_provider_path(args)
 
         settings_provider = JSONSettingsProvider(settings_path, fallback_json_path)
+
+        db_path = Main.get_db_path(args)
+        Connection.configure(db_path, profile=PragmaProfile.from_settings(settings_provider.load_settings()))
+        Main.bound_db(db_path)
+
         args_schema_provider = JSONArgsSchemaProvider(json_args_provider_path)
 
         # TODO: dispatcher interface
@@ -37,7 +43,10 @@ class Main:
 
         controller.register_observer(view)
 
-        view.run()
+        try:
+            view.run()
+        finally:
+            Connection.close_all()
 
     @staticmethod
     def get_base_dir(args: List[str]) -> str:
@@ -93,7 +102,9 @@ class Main:
         AbstractModel.DB_PATH = db_path
 
         if not os.path.exists(db_path):
-            AbstractModel.init_db()
+            AbstractModel.init_db(db_path)
+        # the databases created by the previous versions miss the new tables and indexes
+        AbstractModel.upgrade_db(db_path, Main.SCHEMA_VERSION)
 
 
 if __name__ == '__main__':
@@ -1,38 +1,60 @@
 import datetime
 import re
-from typing import List
+from typing import List, Iterable, Iterator
 
 
 from src.core_modules.ORM import AbstractModel
-from src.core_modules.ORM.field_types import IntegerField, TextField
+from src.core_modules.ORM import Index
+from src.core_modules.ORM.field_types import IntegerField, TextField, FTSField
 from src.core_modules.factories import ModelFactory
 from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import Statement
 
 from src.affaire.exceptions import UnknownParameterException
 from src.affaire.exceptions import UndefinedValueException
 
 
-class Task(AbstractModel):
+class Task(AbstractModel, compact=True):
     """
     Combination of model and repository
     """
-    body = TextField()
+    body = FTSField()  # searched with FTS5, see _filter
     created_at = TextField(datetime=True)
     updated_at = TextField(datetime=True)
-    expires_at = TextField(datetime=True, not_null=False)
+    expires_at = TextField(datetime=True, not_null=False, index=True)
     is_active = IntegerField(default=1, use_default=True)
 
+    # the tasks are filtered by activity and expiration date
+    by_state = Index('is_active', 'expires_at')
+
+    # the printed fields, see __str__
+    LISTED_FIELDS = ('body', 'expires_at')
+
     def __init__(self):
         super().__init__()
         self.is_active = True
 
     def save(self, eager=True):
-        now = str(datetime.datetime.now())
-        self.created_at = now
-        self.updated_at = now
+        if self.is_dirty():  # nothing is written otherwise
+            now = str(datetime.datetime.now())
+            if self.pk is None or isinstance(self.created_at, TextField):  # new or never filled
+                self.created_at = now
+            self.updated_at = now
 
         super(Task, self).save(eager)
 
+    @classmethod
+    def save_all(cls, instances: Iterable['Task'], eager=True, chunk_size: int = None) -> list:
+        now = str(datetime.datetime.now())
+
+        def stamped():
+            for task in instances:
+                task.created_at = now
+                task.updated_at = now
+                yield task
+
+        return super(Task, cls).save_all(stamped(), eager, chunk_size)
+
     @classmethod
     def select(cls, params: dict = None, schema: dict = None) -> List[AbstractModel]:
         """
@@ -42,7 +64,95 @@ class Task(AbstractModel):
         :return:
         """
         qb = QueryBuilder(cls).select()
+        cls._filter(qb, params, schema)
+
+        qb.build()
+        qb.execute()
+
+        task_list = ModelFactory(cls, qb.res).to_list()
+
+        return task_list
+
+    @classmethod
+    async def aselect(cls, params: dict = None, schema: dict = None) -> List[AbstractModel]:
+        """
+        Repository: select() without blocking the event loop
+        :param params: Parameters from CLI
+        :param schema: args_schema.json -> "params" key
+        :return:
+        """
+        return await cls.get_executor().run(cls.select, params, schema)
 
+    @classmethod
+    def iterate(cls, params: dict = None, schema: dict = None, batch_size: int = None,
+                fields: Iterable[str] = None) -> Iterator['Task']:
+        """
+        Repository: select the tasks lazily, with constant memory.
+        :param params: Parameters from CLI
+        :param schema: args_schema.json -> "params" key
+        :param batch_size: Number of rows fetched at once
+        :param fields: Fetched fields, the others are loaded on access. All by default.
+        :return:
+        """
+        qb = QueryBuilder(cls).select(*(fields or tuple()))
+        cls._filter(qb, params, schema)
+
+        return ModelFactory(cls, qb.build().iterate(batch_size)).only(*qb.cols).iter_models()
+
+    @classmethod
+    def update(cls, params: dict = None, schema: dict = None, values: dict = None) -> int:
+        """
+        Update the selected tasks with one statement.
+        :param params: Parameters from CLI selecting the tasks
+        :param schema: args_schema.json -> "params" key
+        :param values: Pairs (field name, new value). If empty, toggle the tasks activity.
+        :return: Number of updated tasks
+        """
+        values = dict(values or dict())
+        if not values:
+            values['is_active'] = Statement('NOT "is_active"')
+        values['updated_at'] = str(datetime.datetime.now())
+
+        qb = QueryBuilder(cls).update_where(values)
+        cls._filter(qb, params, schema)
+
+        return qb.build().execute().row_count
+
+    @classmethod
+    def delete_where(cls, params: dict = None, schema: dict = None) -> int:
+        """
+        Delete the selected tasks with one statement.
+        :param params: Parameters from CLI selecting the tasks
+        :param schema: args_schema.json -> "params" key
+        :return: Number of deleted tasks
+        """
+        qb = QueryBuilder(cls).delete_where()
+        cls._filter(qb, params, schema)
+
+        return qb.build().execute().row_count
+
+    @classmethod
+    def count(cls, params: dict = None, schema: dict = None) -> int:
+        """
+        Count the selected tasks without fetching them.
+        :param params: Parameters from CLI selecting the tasks
+        :param schema: args_schema.json -> "params" key
+        :return:
+        """
+        qb = QueryBuilder(cls).count()
+        cls._filter(qb, params, schema)
+
+        return qb.build().execute().res
+
+    @classmethod
+    def _filter(cls, qb: QueryBuilder, params: dict = None, schema: dict = None) -> QueryBuilder:
+        """
+        Map the CLI parameters to WHERE statements.
+        :param qb: Query builder to be filtered
+        :param params: Parameters from CLI
+        :param schema: args_schema.json -> "params" key
+        :return:
+        """
         if params is not None and schema is not None:
             for param, val in params.items():  # user's input
                 if param == '-f':
@@ -50,7 +160,11 @@ class Task(AbstractModel):
                 for short_arg, props in schema.items():
                     if param in [short_arg, *props.get('aliases')]:
                         field_name = props.get('field', None)
-                        if field_name is None:
+                        if props.get('match', False):
+                            if val is None or not val.split():  # an empty MATCH is an FTS5 syntax error
+                                raise UndefinedValueException(f'Parameter {param} requires a value')
+                            qb.match(cls._to_fts_query(val))
+                        elif field_name is None:
                             if val is None:
                                 raise UndefinedValueException(f'Parameter {param} requires a value')
                         elif field_name in ['is_active']:
@@ -60,9 +174,11 @@ class Task(AbstractModel):
                                 digit = re.search(r'(\d+)', val)
                                 if digit:
                                     day_delta = int(digit.group(1))
-                                    val = datetime.datetime.now() + datetime.timedelta(days=day_delta)
-                                    val = val.strftime('%Y-%m-%d')
-                                    qb.and_where(field_name, QueryBuilder.LIKE, val)
+                                    day = datetime.date.today() + datetime.timedelta(days=day_delta)
+                                    next_day = day + datetime.timedelta(days=1)
+                                    # range on the indexed column, 'LIKE' would scan the table
+                                    qb.and_where(field_name, QueryBuilder.GREATER_OR_EQUALS, day.isoformat())
+                                    qb.and_where(field_name, QueryBuilder.LESS, next_day.isoformat())
                         else:
                             qb.and_where(field_name, QueryBuilder.LIKE, val)
                         break
@@ -71,16 +187,16 @@ class Task(AbstractModel):
                 else:
                     raise UnknownParameterException(f'Unknown parameter {param}')
 
-        qb.build()
-        qb.execute()
-
-        task_list = ModelFactory(cls, qb.res).to_list()
-
-        return task_list
+        return qb
 
-    @classmethod
-    def update(cls, params: dict):
-        pass
+    @staticmethod
+    def _to_fts_query(val: str) -> str:
+        """
+        Escape the user's input: each word is searched as is.
+        :param val:
+        :return:
+        """
+        return ' '.join('"' + word.replace('"', '""') + '"' for word in val.split())
 
     def __str__(self):
         txt = f'{self.body} '
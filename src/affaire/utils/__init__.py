@@ -6,6 +6,9 @@ from src.affaire.utils.authentication_server import AuthenticationServer
 from src.affaire.utils.db_settings_provider import DBSettingsProvider
 from src.affaire.utils.json_settings_provider import JSONSettingsProvider
 
+# import and export
+from src.affaire.utils.task_transfer import TaskImporter, TaskExporter
+
 # abstract providers
 from src.affaire.utils.args_schema_provider_interface import ArgsSchemaProviderInterface
 from src.affaire.utils.json_args_schema_provider import JSONArgsSchemaProvider
@@ -72,12 +72,13 @@ class AuthenticationServer:
         :return:
         """
         from src.affaire.controllers import AffaireController
+        from src.core_modules.ORM import QueryBuilder
 
         self.access_token = access_token  # ready to do requests
 
         if fetch_mode == AffaireController.GOOGLE_PUSH:
             # push: creates a new file
-            task_list = [t.__dict__ for t in model.select()]
+            task_list = QueryBuilder(model).values().build().execute().res  # no hydration
             json_data = json.dumps(task_list).encode('utf-8')
             length = len(json_data)
 
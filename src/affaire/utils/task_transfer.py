@@ -0,0 +1,286 @@
+import collections
+import concurrent.futures
+import csv
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterable, Iterator, List, Tuple
+
+
+from src.core_modules.ORM import AbstractModel, QueryBuilder, Count, Min, Max
+from src.core_modules.utils import Connection
+
+from src.affaire.exceptions import UndefinedValueException
+from src.affaire.models import Task
+
+
+# the transferred fields, in the order of the rows
+FIELDS = ('body', 'created_at', 'updated_at', 'expires_at', 'is_active')
+
+JSONL = 'jsonl'
+CSV = 'csv'
+
+
+def get_format(path: str, fmt: str = None) -> str:
+    """
+    Return the file format: the given one, or guessed from the extension (JSON lines by default).
+    :param path:
+    :param fmt: 'jsonl' or 'csv'
+    :return:
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.') or JSONL).lower()
+    if 'json' == fmt:
+        fmt = JSONL
+    if fmt not in (JSONL, CSV):
+        raise UndefinedValueException(f'Unsupported format {fmt}')
+
+    return fmt
+
+
+def get_workers(workers: int = None) -> int:
+    """
+    Return the number of processes: the given one capped by the CPU count, the CPU count by default.
+    :param workers:
+    :return:
+    """
+    cpu_count = os.cpu_count() or 1
+
+    return max(1, min(workers or cpu_count, cpu_count))
+
+
+def parse_chunk(fmt: str, records: list) -> Tuple[List[tuple], int]:
+    """
+    Worker: validate the records.
+    :param fmt: 'jsonl': the records are the lines, 'csv': the records are the dictionaries
+    :param records:
+    :return: The valid rows (see FIELDS) and the number of the invalid records
+    """
+    rows = list()
+    errors = 0
+    for record in records:
+        try:
+            if JSONL == fmt:
+                if not record.strip():
+                    continue
+                record = json.loads(record)
+            rows.append(to_row(record))
+        except (ValueError, TypeError, AttributeError):
+            errors += 1
+
+    return rows, errors
+
+
+def to_row(record: dict) -> tuple:
+    """
+    Validate the record and convert it to the row of the task, the creation date defaults to now.
+    :param record: Pairs (field, value)
+    :return:
+    """
+    body = record.get('body')
+    if not isinstance(body, str) or not body.strip():
+        raise ValueError('The body is required')
+
+    created_at, updated_at, expires_at = (
+        str(datetime.datetime.fromisoformat(val)) if val else None
+        for val in (record.get('created_at'), record.get('updated_at'), record.get('expires_at'))
+    )
+    created_at = created_at or str(datetime.datetime.now())
+    updated_at = updated_at or created_at
+
+    is_active = record.get('is_active', 1)
+    if isinstance(is_active, str):
+        is_active = is_active.strip().lower()
+        if is_active not in ('', '0', '1', 'true', 'false'):
+            raise ValueError(f'Unexpected activity {is_active}')
+        is_active = is_active in ('', '1', 'true')
+
+    return body, created_at, updated_at, expires_at, int(bool(is_active))
+
+
+def export_range(db_path: str, fmt: str, lo: int, hi: int, part_path: str) -> int:
+    """
+    Worker: write the tasks whose primary key is in [lo, hi) to the part file.
+    :param db_path:
+    :param fmt: 'jsonl' or 'csv'
+    :param lo:
+    :param hi:
+    :param part_path:
+    :return: Number of the exported tasks
+    """
+    AbstractModel.DB_PATH = db_path
+    try:
+        return write_range(fmt, lo, hi, part_path)
+    finally:
+        Connection.close_all()
+
+
+def write_range(fmt: str, lo: int, hi: int, part_path: str) -> int:
+    """
+    Write the tasks whose primary key is in [lo, hi) to the part file.
+    :param fmt: 'jsonl' or 'csv'
+    :param lo:
+    :param hi:
+    :param part_path:
+    :return: Number of the exported tasks
+    """
+    pk_name = Task.get_pk_col().name
+    qb = QueryBuilder(Task).values_list(*FIELDS)\
+        .where(pk_name, QueryBuilder.GREATER, lo - 1)\
+        .and_where(pk_name, QueryBuilder.LESS, hi)\
+        .order(pk_name)
+
+    count = 0
+    with open(part_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f) if CSV == fmt else None
+        for row in qb.build().iterate():
+            if writer is None:
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n')
+            else:
+                writer.writerow(row)
+            count += 1
+
+    return count
+
+
+class TaskImporter:
+    """
+    Import the tasks from a JSON lines or CSV file.
+    The records are validated by a pool of processes, the rows are inserted by bulk by the writer thread
+    of the database (see DBWriter), so the parsing of the next chunks is not blocked by SQLite.
+    """
+    CHUNK_SIZE = 10000  # records validated at once by a worker
+
+    def __init__(self, path: str, fmt: str = None, workers: int = None, chunk_size: int = None):
+        """
+        :param path: Input file
+        :param fmt: 'jsonl' or 'csv', guessed from the extension by default
+        :param workers: Number of processes, up to the CPU count (by default). 1 validates the records in place.
+        :param chunk_size: Records validated at once by a worker
+        """
+        self.path = path
+        self.fmt = get_format(path, fmt)
+        self.workers = get_workers(workers)
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def run(self) -> dict:
+        """
+        :return: Report: number of the imported tasks and of the invalid records, elapsed seconds
+        """
+        started_at = time.perf_counter()
+        count = errors = 0
+
+        writer = Task.get_writer()
+        futures = collections.deque()
+        with open(self.path, newline='', encoding='utf-8') as f:
+            records = csv.DictReader(f) if CSV == self.fmt else f
+            for rows, chunk_errors in self._parse(records):
+                errors += chunk_errors
+                if rows:
+                    futures.append(writer.submit(self._write, rows))
+                # bounded number of the validated chunks waiting for the writer
+                while futures and (futures[0].done() or len(futures) >= 2 * self.workers):
+                    count += futures.popleft().result()
+        while futures:
+            count += futures.popleft().result()
+
+        return {'count': count, 'errors': errors, 'seconds': time.perf_counter() - started_at}
+
+    def _parse(self, records: Iterable) -> Iterator[Tuple[List[tuple], int]]:
+        """
+        Validate the records by chunks.
+        :param records:
+        :return:
+        """
+        chunks = iter(lambda: list(itertools.islice(records, self.chunk_size)), list())
+        head = list(itertools.islice(chunks, 2))
+        chunks = itertools.chain(head, chunks)
+        if 1 == self.workers or len(head) < 2:  # a single chunk does not pay the start of the pool
+            for chunk in chunks:
+                yield parse_chunk(self.fmt, chunk)
+            return
+
+        context = multiprocessing.get_context('spawn')  # the forked processes would inherit the connections
+        with concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.submit(parse_chunk, self.fmt, chunk))
+                if len(pending) >= 2 * self.workers:  # bounded read-ahead
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def _write(rows: List[tuple]) -> int:
+        """
+        Writer: insert the validated rows by bulk, without instantiating the tasks.
+        :param rows:
+        :return: Number of the inserted tasks
+        """
+        return len(QueryBuilder(Task).insert_rows(FIELDS, rows).build().execute().last_ids)
+
+
+class TaskExporter:
+    """
+    Export the tasks to a JSON lines or CSV file.
+    The primary key range is partitioned, each partition is read and written by its own process
+    to a part file; the part files are concatenated in order.
+    """
+    PARTITION_SIZE = 10000  # minimal number of tasks exported by a worker
+
+    def __init__(self, path: str, fmt: str = None, workers: int = None, partition_size: int = None):
+        """
+        :param path: Output file
+        :param fmt: 'jsonl' or 'csv', guessed from the extension by default
+        :param workers: Number of processes, up to the CPU count (by default). 1 exports in place.
+        :param partition_size: Minimal number of tasks exported by a worker
+        """
+        self.path = path
+        self.fmt = get_format(path, fmt)
+        self.workers = get_workers(workers)
+        self.partition_size = partition_size or self.PARTITION_SIZE
+
+    def run(self) -> dict:
+        """
+        :return: Report: number of the exported tasks, elapsed seconds
+        """
+        started_at = time.perf_counter()
+
+        pk_name = Task.get_pk_col().name
+        bounds = QueryBuilder(Task).aggregate(lo=Min(pk_name), hi=Max(pk_name), count=Count())\
+            .build().execute().res
+        ranges = list()
+        if bounds['count']:
+            workers = min(self.workers, -(-bounds['count'] // self.partition_size))  # ceil
+            lo, hi = bounds['lo'], bounds['hi'] + 1
+            step = -(-(hi - lo) // workers)  # ceil
+            ranges = [(start, min(start + step, hi)) for start in range(lo, hi, step)]
+
+        part_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            part_paths = [os.path.join(part_dir, f'{i}.part') for i in range(len(ranges))]
+            if len(ranges) <= 1:
+                counts = [write_range(self.fmt, lo, hi, part) for (lo, hi), part in zip(ranges, part_paths)]
+            else:
+                context = multiprocessing.get_context('spawn')
+                with concurrent.futures.ProcessPoolExecutor(len(ranges), mp_context=context) as pool:
+                    futures = [
+                        pool.submit(export_range, AbstractModel.DB_PATH, self.fmt, lo, hi, part)
+                        for (lo, hi), part in zip(ranges, part_paths)
+                    ]
+                    counts = [future.result() for future in futures]
+
+            with open(self.path, 'w', newline='', encoding='utf-8') as f:
+                if CSV == self.fmt:
+                    csv.writer(f).writerow(FIELDS)
+                for part_path in part_paths:
+                    with open(part_path, newline='', encoding='utf-8') as part:
+                        shutil.copyfileobj(part, f)
+        finally:
+            shutil.rmtree(part_dir, ignore_errors=True)
+
+        return {'count': sum(counts), 'errors': 0, 'seconds': time.perf_counter() - started_at}
@@ -71,7 +71,7 @@ class CLIView(AbstractView, ObserverInterface):
         elif action.endswith('task_read'):
             for task in event.get('task_list'):
                 print(task)
-        elif action.endswith('authenticate'):
+        elif action.endswith('authenticate') or action.endswith('task_import') or action.endswith('task_export'):
             print(msg)
 
     def propose_authentication(self):
@@ -3,13 +3,18 @@ from src.core_modules.ORM.statement import Statement
 
 # model initialization
 from src.core_modules.ORM.abstract_model import AbstractModel
+from src.core_modules.ORM.model_registry import ModelRegistry
 
 # model description
 from src.core_modules.ORM.field_type import FieldType
-from src.core_modules.ORM.field_types import IntegerField, RealField, TextField, BlobField, ForeignKey
+from src.core_modules.ORM.field_types import IntegerField, RealField, TextField, FTSField, BlobField, ForeignKey
+from src.core_modules.ORM.index import Index
+from src.core_modules.ORM.aggregate import Aggregate, Count, Sum, Min, Max, Avg
 
 # model action
+from src.core_modules.ORM.statement_cache import StatementCache
 from src.core_modules.ORM.query_builder import QueryBuilder
+from src.core_modules.ORM.async_query_builder import AsyncQueryBuilder
 
 # exceptions
 from src.core_modules.ORM import exceptions
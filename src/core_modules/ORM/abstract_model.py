@@ -1,25 +1,137 @@
-import string
-import time
-from typing import List
+from typing import List, Iterable, Set, Sequence, Tuple
 
 
-class AbstractModel:
+from src.core_modules.ORM.model_meta import ModelMeta
+from src.core_modules.ORM.model_registry import ModelRegistry
+
+
+# value of the deferred columns in the snapshots, see AbstractModel._get_state
+_DEFERRED = object()
+# shared by the instances without deferred columns: an empty frozenset is not a singleton
+_NOT_DEFERRED = frozenset()
+
+
+class AbstractModel(metaclass=ModelMeta):
     """
     Each subclass represents a relation (table).
+    The subclasses declared with 'compact=True' store their values in '__slots__', see ModelMeta.
+
+    Thread safety: the model classes can be shared by the threads, their metadata is immutable once created
+    (see ModelMetadata) and each thread reads through its own connections (see ConnectionPool).
+    An instance must not be modified by several threads at once.
+    The writes of many threads can be serialized and grouped into transactions by the writer thread,
+    see submit_save() and DBWriter.
     """
+    __slots__ = ()  # the compact subclasses have no '__dict__'
+
     DB_PATH = str()  # TODO: move it to the settings and settings provider
 
     WORD_JOINER = str('_')  # string used to concatenate words in the table name and columns names
 
-    # The table name
+    # The table name, generated from the class name if not overridden
     _name = None  # type: str
-    # The table's columns meta
-    _cols = None  # type: List['FieldType']
-    # The primary key column meta
-    _pk_col = None  # type: 'FieldType'
+    # The columns, primary key, foreign keys and indexes, see ModelMeta
+    _meta = None  # type: 'ModelMetadata'
+
+    # all the declared models
+    registry = ModelRegistry()
+    # The values are stored in '__slots__'
+    _compact = False
 
     def __init__(self):
         self._pk_val = None  # The database's primary key value
+        self._snapshot = None  # The columns values as stored in the database, in the order of the columns
+        self._loader = None  # type: 'LazyLoader'
+        self._deferred = _NOT_DEFERRED  # names of the columns not fetched yet
+
+    def __getattr__(self, name: str):
+        """
+        Return the reverse relation loaded into the compact instance, see set_related().
+        :param name:
+        :return:
+        """
+        if '_related' != name:
+            related = getattr(self, '_related', None)
+            if related is not None and name in related:
+                return related[name]
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    @classmethod
+    def from_row(cls, cols: Sequence['FieldType'], row: Sequence, deferred: Iterable[str] = None):
+        """
+        Positional constructor of the fetched instances: the values are stored in the order of the columns.
+        '__init__' is not called. If all the columns are fetched, the row itself is the snapshot.
+        :param cols: Fetched columns
+        :param row: Fetched values
+        :param deferred: Names of the not fetched columns
+        :return:
+        """
+        inst = cls.__new__(cls)
+        inst._pk_val = None
+        inst._loader = None
+        inst._deferred = frozenset(deferred) if deferred else _NOT_DEFERRED
+
+        if cls._compact:
+            for col, val in zip(cols, row):
+                col.set_stored(inst, val)
+        else:
+            inst.__dict__.update(zip([col.name for col in cols], row))
+
+        pk_col = cls._meta.pk_col
+        for col, val in zip(cols, row):
+            if col is pk_col:
+                inst._pk_val = val
+                break
+
+        all_cols = cls._meta.cols
+        if len(cols) == len(all_cols) and not inst._deferred:
+            inst._snapshot = row if isinstance(row, tuple) else tuple(row)
+        else:
+            vals = dict(zip(cols, row))
+            inst._snapshot = tuple(vals.get(col, _DEFERRED) for col in all_cols)
+
+        return inst
+
+    def refresh_row(self, cols: Sequence['FieldType'], row: Sequence):
+        """
+        Apply the fetched values to the instance hydrated already, e.g. re-selected after update_where().
+        The modified instances are kept as they are, their changes would be lost otherwise.
+        :param cols: Fetched columns
+        :param row: Fetched values
+        :return:
+        """
+        if self.is_dirty():
+            return self
+
+        all_cols = type(self)._meta.cols
+        snapshot = list(self._snapshot)
+        for col, val in zip(cols, row):
+            stored = col.get_stored(self)
+            if not isinstance(stored, AbstractModel) or stored.pk != val:  # the loaded reference is kept
+                col.set_stored(self, val)
+            snapshot[all_cols.index(col)] = val
+        self._snapshot = tuple(snapshot)
+        if self._deferred:
+            self._deferred = self._deferred - {col.name for col in cols} or _NOT_DEFERRED
+
+        return self
+
+    def set_related(self, name: str, models: list):
+        """
+        Bind the loaded reverse relation, see ModelFactory.prefetch().
+        :param name: Name given by 'reversed_by'
+        :param models: Related models
+        :return:
+        """
+        if type(self)._compact:
+            if getattr(self, '_related', None) is None:
+                self._related = dict()
+            self._related[name] = models
+        else:
+            setattr(self, name, models)
+
+        return self
 
     @property
     def pk(self) -> [str, int, float]:
@@ -50,26 +162,159 @@ class AbstractModel:
         Insert or update the instance.
         :return:
         """
-        from src.core_modules.ORM import QueryBuilder
+        from src.core_modules.ORM import QueryBuilder, ForeignKey
 
         model = type(self)
 
+        if self.pk is not None and not self.is_dirty():
+            # nothing to write, the loaded related models can be modified though
+            if eager:
+                for col in model.get_cols():
+                    ref_inst = col.get_raw(self) if isinstance(col, ForeignKey) else None
+                    if isinstance(ref_inst, AbstractModel):
+                        ref_inst.save(eager)
+            return self
+
         qb = QueryBuilder(model)
-        if self.pk is None:
+        inserted = self.pk is None
+        if inserted:
             qb.insert(self, eager)
         else:
             qb.update(self, eager)
         qb.build().execute()
 
-        last_id = qb.last_id
+        old_pk = self._pk_val
+        last_id = qb.last_id if inserted else None  # the connection's last rowid is not the updated one
         if last_id is None or 0 == last_id:  # not synthetic primary key inserted by the user
             self._pk_val = getattr(self, model.get_pk_col().name, None)
         else:  # autoincrement id
             # the model's pk is None
             self.pk = last_id
 
+        identity_map = self._get_identity_map()
+        if identity_map is not None:
+            identity_map.track(self, old_pk)
+            if old_pk is not None:
+                identity_map.discard(self, old_pk)
+            identity_map.add(self)
+
+        self.take_snapshot()
+
         return self
 
+    def take_snapshot(self):
+        """
+        Remember the columns values as stored in the database.
+        Invoked after hydration and saving.
+        :return:
+        """
+        self._snapshot = self._get_state()
+
+        return self
+
+    def is_dirty(self) -> bool:
+        """
+        Whether the instance has been modified since it has been fetched or saved.
+        A referenced model not saved yet is a modification, even if the foreign key is NULL.
+        :return:
+        """
+        return self._snapshot is None or self._snapshot != self._get_state()
+
+    def get_changes(self) -> Set[str]:
+        """
+        Return the names of the columns modified since the instance has been fetched or saved.
+        All the columns are modified if the instance has never been fetched or saved.
+        :return:
+        """
+        cols = type(self)._meta.cols
+        if self._snapshot is None:
+            return {col.name for col in cols if col.name not in self._deferred}
+
+        return {col.name for col, old, new in zip(cols, self._snapshot, self._get_state()) if old != new}
+
+    def load_deferred(self, *names: str):
+        """
+        Fetch the deferred columns of the instance, see QueryBuilder.select() and QueryBuilder.defer().
+        :param names: Names of the columns, all the deferred columns by default
+        :return:
+        """
+        from src.core_modules.ORM import QueryBuilder
+
+        model = type(self)
+
+        names = set(names or self._deferred) & self._deferred
+        if not names or self.pk is None:
+            return self
+
+        qb = QueryBuilder(model).select(*names)
+        qb.where(model.get_pk_col(), QueryBuilder.EQUALS, self.pk).build().execute()
+        self._deferred -= names
+
+        row = qb.res[0] if qb.res else tuple()  # the row has been deleted otherwise
+        snapshot = None if self._snapshot is None else list(self._snapshot)
+        cols = model._meta.cols
+        for col, val in zip(qb.cols, row):
+            if col.name in names:
+                setattr(self, col.name, val)
+                if snapshot is not None:
+                    snapshot[cols.index(col)] = val
+        if snapshot is not None:
+            self._snapshot = tuple(snapshot)
+
+        return self
+
+    def _get_state(self) -> tuple:
+        """
+        Return the columns values in the order of the columns, as they would be stored in the database:
+        the referenced models are represented by their primary key values.
+        A referenced model not saved yet has no primary key: it is represented by a value matching nothing.
+        :return:
+        """
+        deferred = self._deferred
+        state = list()
+        for col in type(self)._meta.cols:
+            if deferred and col.name in deferred:  # not fetched, hence not modified
+                state.append(_DEFERRED)
+                continue
+            val = col.get_stored(self)  # the empty value is None
+            if isinstance(val, AbstractModel):
+                val = object() if val.pk is None else val.pk
+            state.append(val)
+
+        return tuple(state)
+
+    @classmethod
+    def save_all(cls, instances: Iterable['AbstractModel'], eager=True, chunk_size: int = None) -> list:
+        """
+        Insert many new instances at once.
+        :param instances: Instances of the model without primary key value
+        :param eager: If True, insert or update all nested models
+        :param chunk_size: Number of rows sent at once
+        :return: Assigned primary keys
+        """
+        from src.core_modules.ORM import QueryBuilder
+
+        saved = list()
+
+        def collector():
+            for inst in instances:
+                saved.append(inst)
+                yield inst
+
+        qb = QueryBuilder(cls)
+        qb.bulk_insert(collector(), chunk_size, eager).build().execute()
+
+        identity_map = cls._get_identity_map()
+        for inst, pk in zip(saved, qb.last_ids):
+            inst._pk_val = pk
+            setattr(inst, cls.get_pk_col().name, pk)
+            inst.take_snapshot()
+            if identity_map is not None:
+                identity_map.track(inst, None)
+                identity_map.add(inst)
+
+        return qb.last_ids
+
     def delete(self, eager=True):
         """
         Delete the instance from the database.
@@ -80,12 +325,98 @@ class AbstractModel:
         qb = QueryBuilder(type(self))
         qb.delete(self, eager).build().execute()
 
+        identity_map = self._get_identity_map()
+        if identity_map is not None:
+            identity_map.track(self, self._pk_val)
+            identity_map.discard(self)
+
         self._pk_val = None
+        self._snapshot = None
+
+        return self
+
+    def expire(self, pk=None):
+        """
+        Forget the stored state once the writes of the instance have been rolled back, see Transaction:
+        the next save() writes all the columns, or inserts the instance again if it had no primary key.
+        :param pk: Primary key value of the instance in the database, None if it has not been stored
+        :return:
+        """
+        self._pk_val = pk
+        self._snapshot = None
 
         return self
 
+    def submit_save(self, eager=True):
+        """
+        Queue the insert or update to the writer thread of the model's database, see DBWriter.
+        :return: Future resolved once the write is committed
+        """
+        return self.get_writer().submit(self.save, eager)
+
+    def submit_delete(self, eager=True):
+        """
+        Queue the delete to the writer thread of the model's database, see DBWriter.
+        :return: Future resolved once the write is committed
+        """
+        return self.get_writer().submit(self.delete, eager)
+
+    async def asave(self, eager=True):
+        """
+        Insert or update the instance without blocking the event loop, see DBWriter.
+        :return:
+        """
+        return await self.get_writer().run(self.save, eager)
+
+    @classmethod
+    async def asave_all(cls, instances: Iterable['AbstractModel'], eager=True, chunk_size: int = None) -> list:
+        """
+        Insert many new instances at once without blocking the event loop, see save_all().
+        :return: Assigned primary keys
+        """
+        return await cls.get_writer().run(cls.save_all, instances, eager, chunk_size)
+
+    async def adelete(self, eager=True):
+        """
+        Delete the instance from the database without blocking the event loop, see DBWriter.
+        :return:
+        """
+        return await self.get_writer().run(self.delete, eager)
+
     # TODO: READ (get, select)
 
+    @classmethod
+    def get_executor(cls):
+        """
+        Return the thread executing the asynchronous calls on the model's database.
+        A call is a unit of work: a transaction must be opened inside it, e.g. 'executor.run(func)'.
+        :return: DBExecutor
+        """
+        from src.core_modules.utils import DBExecutor
+
+        return DBExecutor.get(cls.DB_PATH)
+
+    @classmethod
+    def get_writer(cls):
+        """
+        Return the thread serializing the writes to the model's database, see DBWriter.
+        :return: DBWriter
+        """
+        from src.core_modules.utils import DBWriter
+
+        return DBWriter.get(cls.DB_PATH)
+
+    @classmethod
+    def transaction(cls):
+        """
+        Return the unit of work context of the model's database.
+        Every save() and delete() issued inside the context is committed once.
+        :return: Transaction
+        """
+        from src.core_modules.utils import Transaction
+
+        return Transaction(cls.DB_PATH)
+
     @classmethod
     def create_table(cls, eager=True):
         """
@@ -109,96 +440,130 @@ class AbstractModel:
         The other capital letters will be preceded by the word joiner.
         :return: str
         """
-        if cls._name is None:
-            cls._name = ''.join(
-                map(
-                    lambda ch: cls.WORD_JOINER + ch.lower() if ch in string.ascii_uppercase else ch.lower(),
-                    cls.__name__
-                )
-            )
-            if cls._name.startswith(cls.WORD_JOINER):
-                cls._name = cls._name[len(cls.WORD_JOINER):]
-
-        return cls._name
+        return cls._meta.table_name
 
     @classmethod
-    def get_cols(cls, eager=False):
+    def get_cols(cls, eager=False) -> Tuple['FieldType', ...]:
         """
-        Return the columns of the table.
-        !!! A magic method with strong relations !!!
-        !!! the method bounds the model class and the property name to the columns !!!
+        Return the columns of the table, see ModelMetadata.
         Field name is a string representing the column.
         Field is an instance of 'FieldType' containing column meta data.
-        :param: eager: If true, fetch all related models (as list).
-        :return: List['FieldType']
+        :param: eager: If true, the foreign keys are replaced by the columns of the referenced models, recursively.
+        :return: Tuple['FieldType']
         """
-        from src.core_modules.ORM import FieldType, ForeignKey
+        return cls._meta.eager_cols if eager else cls._meta.cols
 
-        if cls._cols is None or eager:
-            cls._cols = list()
+    @classmethod
+    def get_col(cls, name: str) -> 'FieldType':
+        """
+        Return the column by its property name or by its SQL name, None if it does not exist.
+        :param name:
+        :return:
+        """
+        return cls._meta.get_col(name)
 
-            # bind the column's name and its model to the field
-            for col_name, col_meta in cls.__dict__.items():
-                if '_pk_col' == col_name:  # the primary key column alias
-                    continue
-                if isinstance(col_meta, FieldType):
-                    col_meta.model = cls
-                    col_meta.name = col_name
-                    cls._cols.append(col_meta)
+    @classmethod
+    def get_indexes(cls) -> List['Index']:
+        """
+        Return the indexes declared on the model:
+        'Index' properties and columns declared with 'index=True'.
+        :return:
+        """
+        return list(cls._meta.indexes)
 
-            if not cls._cols:
-                cls._cols.append(cls._gen_pk())
-            cls._pk_col = cls.get_pk_col()
+    @classmethod
+    def get_fts_cols(cls) -> List['FTSField']:
+        """
+        Return the columns indexed in the full-text search shadow table.
+        :return:
+        """
+        return list(cls._meta.fts_cols)
 
-            if eager:  # present as linear structure
-                marker = f'_marked_{int(time.time())}'
+    @classmethod
+    def get_fts_table_name(cls) -> str:
+        """
+        Return the name of the full-text search shadow table.
+        :return:
+        """
+        return f'{cls.get_table_name()}{cls.WORD_JOINER}fts'
 
-                def walker(cols):  # not Johnny
-                    for col in cols:
-                        if isinstance(col, ForeignKey) and not getattr(col, marker, False):
-                            setattr(col, marker, True)
-                            yield from walker(col.get_ref().get_cols(eager))
-                            delattr(col, marker)
-                        else:
-                            yield col
+    @classmethod
+    def get_reversed_fk(cls, name: str) -> 'ForeignKey':
+        """
+        Return the foreign key referencing the model and declared with 'reversed_by=name'.
+        :param name: Name of the reverse relation
+        :return:
+        """
+        from src.core_modules.ORM import ForeignKey
+        from src.core_modules.ORM.exceptions import UndefinedFieldException
 
-                cls._cols = list(walker(cls._cols))
+        for model in AbstractModel.registry.models():
+            for col in model._meta.fks:
+                if col.reversed_by == name and col.get_ref() is cls:
+                    return col
 
-        return cls._cols
+        raise UndefinedFieldException(f'The reverse relation {name} is not defined for the model {cls.__name__}')
 
     @classmethod
-    def get_pk_col(cls):
+    def get_pk_col(cls) -> 'FieldType':
         """
         Return the primary key column.
-        If the primary key is not specified, set the synthetic one.
+        If the primary key is not specified, the synthetic one is generated with the metadata.
         :return: 'FieldType'
         """
-        if cls._pk_col is None:
-            for col in cls.get_cols():
-                if col.primary_key:
-                    cls._pk_col = col
-                    break
-            else:
-                # the user has not specified a PK field
-                # generate a synthetic one
-                pk_col = cls._gen_pk()
-                if cls._cols is not None:
-                    cls._cols.insert(0, pk_col)
-                else:
-                    cls._cols = [pk_col]
-                cls._pk_col = pk_col
-
-        return cls._pk_col
+        return cls._meta.pk_col
 
     @staticmethod
-    def init_db():
+    def init_db(db_path: str = None, eager=True):
         """
         CREATE DATABASE with tables corresponding to the application.
+        The referenced tables are created first.
+        :param db_path: Create the tables of the models bound to the database, all by default
+        :param eager: If False, only create the missing tables and indexes
         :return:
         """
-        for model in AbstractModel.__subclasses__():
-            if issubclass(model, AbstractModel):
-                model.create_table(True)
+        registry = AbstractModel.registry
+        for model in registry.creation_order(registry.models(db_path)):
+            model.create_table(eager)
+
+    @staticmethod
+    def upgrade_db(db_path: str, version: int) -> bool:
+        """
+        Bring a database created by a previous version of the application up to date:
+        the missing tables and indexes are created once, the full-text search indexes are rebuilt,
+        the schema version is stored as 'user_version'.
+        :param db_path:
+        :param version: Schema version of the application
+        :return: Whether the database has been upgraded
+        """
+        from src.core_modules.utils import Connection
+        from src.core_modules.ORM import QueryBuilder
+
+        with Connection(db_path, read_only=True) as cur:
+            if cur.execute('PRAGMA user_version').fetchone()[0] >= version:
+                return False
+
+        AbstractModel.init_db(db_path, False)
+        registry = AbstractModel.registry
+        for model in registry.models(db_path):
+            if model.get_fts_cols():
+                QueryBuilder(model).rebuild_fts().build().execute()
+        with Connection(db_path) as cur:
+            cur.execute(f'PRAGMA user_version = {int(version)}')
+
+        return True
+
+    @classmethod
+    def _get_identity_map(cls):
+        """
+        Return the identity map of the current transaction, None outside transactions.
+        :return: IdentityMap
+        """
+        from src.core_modules.utils import Connection
+
+        transaction = Connection.get_transaction(cls.DB_PATH)
+
+        return transaction.identity_map if transaction is not None else None
 
     @classmethod
     def _gen_pk(cls, name='id'):
@@ -0,0 +1,55 @@
+class Aggregate:
+    """
+    Aggregate function computed by SQLite, see QueryBuilder.aggregate() and QueryBuilder.having(),
+    e.g. 'Count()', 'Max("expires_at")'.
+    """
+    FUNCTION = str()
+
+    def __init__(self, field: ['FieldType', str] = '*', distinct=False):
+        """
+        :param field: Aggregated column or its name, all the rows by default
+        :param distinct: Aggregate the distinct values only
+        """
+        self.field = field
+        self.distinct = distinct
+
+    @property
+    def default_alias(self) -> str:
+        """
+        Name of the result if the alias is not provided, e.g. 'max_expires_at'.
+        :return:
+        """
+        field = getattr(self.field, 'name', self.field)
+        if '*' == field:
+            return self.FUNCTION.lower()
+
+        return f'{self.FUNCTION.lower()}_{field}'
+
+    def to_sql(self, col_sql: str) -> str:
+        """
+        :param col_sql: Qualified name of the aggregated column, or '*'
+        :return:
+        """
+        distinct = 'DISTINCT ' if self.distinct else ''
+
+        return f'{self.FUNCTION}({distinct}{col_sql})'
+
+
+class Count(Aggregate):
+    FUNCTION = 'COUNT'
+
+
+class Sum(Aggregate):
+    FUNCTION = 'SUM'
+
+
+class Min(Aggregate):
+    FUNCTION = 'MIN'
+
+
+class Max(Aggregate):
+    FUNCTION = 'MAX'
+
+
+class Avg(Aggregate):
+    FUNCTION = 'AVG'
@@ -0,0 +1,29 @@
+from src.core_modules.ORM.query_builder import QueryBuilder
+
+
+class AsyncQueryBuilder(QueryBuilder):
+    """
+    Chained query builder awaited from asyncio code, e.g.
+    'rows = (await AsyncQueryBuilder(Task).select().build().execute()).res'.
+    The statements are executed by the thread of the model's database (see DBExecutor),
+    or by its writer thread for the writes (see DBWriter), so the event loop is not blocked while SQLite works.
+    """
+    async def execute(self):
+        """
+        Execute the accumulated statements
+        :return:
+        """
+        if self.read_only or self.script:  # the scripts commit by themselves
+            executor = self.model.get_executor()
+        else:
+            executor = self.model.get_writer()
+
+        return await executor.run(super().execute)
+
+    async def fetch(self, batch_size: int = None) -> list:
+        """
+        Execute the accumulated SELECT statement and return all the rows, see iterate().
+        :param batch_size: Number of rows fetched at once
+        :return:
+        """
+        return await self.model.get_executor().run(lambda: list(self.iterate(batch_size)))
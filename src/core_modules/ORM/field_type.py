@@ -5,7 +5,7 @@ from src.core_modules import exceptions
 
 
 class FieldType:
-    def __init__(self, primary_key=False, not_null=True, unique=False, default=None, use_default=False):
+    def __init__(self, primary_key=False, not_null=True, unique=False, default=None, use_default=False, index=False):
         self.primary_key = primary_key
 
         if primary_key:
@@ -23,10 +23,13 @@ class FieldType:
         self.unique = unique
         self.default = default
         self.use_default = use_default
+        self.index = index
 
         self._name = None
         self.model = None  # type: 'AbstractModel'
 
+        self._slot = None  # storage of the compact models' values, see ModelMeta
+
     @property
     def name(self):
         return self._name
@@ -35,6 +38,59 @@ class FieldType:
     def name(self, val: str):
         self._name = val
 
+    def __get__(self, inst, owner):
+        """
+        The empty value of an instance is the field itself, the deferred value is loaded on access.
+        The assigned values are stored in the instance and bypass the field.
+        """
+        if inst is not None and self._name in getattr(inst, '_deferred', ()):
+            inst.load_deferred(self._name)
+            return self.get_stored(inst, self)
+
+        return self
+
+    def get_stored(self, inst, default=None):
+        """
+        Return the value stored in the instance without loading it.
+        :param inst:
+        :param default: Returned if the value is not set
+        :return:
+        """
+        if self._slot is not None:
+            try:
+                return self._slot.__get__(inst, type(inst))
+            except AttributeError:
+                return default
+
+        return inst.__dict__.get(self._name, default)
+
+    def set_stored(self, inst, val):
+        """
+        Store the value in the instance.
+        :param inst:
+        :param val:
+        :return:
+        """
+        if self._slot is not None:
+            self._slot.__set__(inst, val)
+        else:
+            inst.__dict__[self._name] = val
+
+    def bind_slot(self, slot):
+        """
+        Store the values in the slot of the compact model, see ModelMeta.
+        The field becomes a data descriptor.
+        :param slot: Member descriptor generated by '__slots__'
+        :return:
+        """
+        self._slot = slot
+
+        field_type = type(self)
+        if not hasattr(field_type, '__set__'):
+            if field_type not in _slotted_types:
+                _slotted_types[field_type] = type(f'Slotted{field_type.__name__}', (SlottedField, field_type), {})
+            self.__class__ = _slotted_types[field_type]
+
     @abc.abstractmethod
     def get_type(self) -> str:
         """
@@ -66,3 +122,24 @@ class FieldType:
             sql += f'DEFAULT {default_val}'
 
         return sql.strip()
+
+
+class SlottedField:
+    """
+    Columns of the compact models: the values are read from and written to the slots.
+    """
+    def __get__(self, inst, owner):
+        if inst is None:
+            return self
+
+        try:
+            return self._slot.__get__(inst, owner)
+        except AttributeError:  # empty or deferred value
+            return super().__get__(inst, owner)
+
+    def __set__(self, inst, val):
+        self._slot.__set__(inst, val)
+
+
+# the field types of the compact models, by field type
+_slotted_types = dict()
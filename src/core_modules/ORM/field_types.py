@@ -51,6 +51,13 @@ class TextField(FieldType):
         return 'TEXT'
 
 
+class FTSField(TextField):
+    """
+    SQLite TEXT type indexed in the model's full-text search (FTS5) shadow table.
+    Searched via QueryBuilder.match()
+    """
+
+
 class BlobField(FieldType):
     """
     SQLite BLOB type
@@ -70,7 +77,7 @@ class ForeignKey(FieldType):
         """
         Relation field.
         :param ref: Referenced class or its name in CamelCase
-        :param reversed_by:
+        :param reversed_by: Name of the reverse relation of the referenced model, see QueryBuilder.prefetch()
         :param kwargs:
         """
         super().__init__(**kwargs)
@@ -80,6 +87,50 @@ class ForeignKey(FieldType):
 
         self.on_delete = on_delete
 
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.model = owner
+
+    def __get__(self, inst, owner):
+        """
+        Lazy relation: return the referenced model, load it on first access.
+        The class attribute is the column itself.
+        """
+        if inst is None:
+            return self
+
+        if self.name in getattr(inst, '_deferred', ()):
+            inst.load_deferred(self.name)
+
+        val = self.get_stored(inst, self)
+        if val is self:  # empty value
+            return self
+
+        if val is None or isinstance(val, AbstractModel):
+            return val
+
+        loader = getattr(inst, '_loader', None)
+        if loader is None:
+            from src.core_modules.factories import LazyLoader
+            from src.core_modules.utils import IdentityMap
+
+            loader = LazyLoader(inst._get_identity_map() or IdentityMap())
+            loader.add(inst)
+        loader.load(self)
+
+        return self.get_stored(inst)
+
+    def __set__(self, inst, val):
+        self.set_stored(inst, val)
+
+    def get_raw(self, inst: AbstractModel):
+        """
+        Return the stored value without loading: the referenced model, its primary key value or None.
+        :param inst:
+        :return:
+        """
+        return self.get_stored(inst)
+
     def get_type(self) -> str:
         return self.get_ref().get_pk_col().get_type()
 
@@ -105,12 +156,11 @@ class ForeignKey(FieldType):
         :return: Model
         """
         if isinstance(self._ref, str):
-            for cls in AbstractModel.__subclasses__():
-                if self._ref == cls.__name__:
-                    self._ref = cls
-                    break
-            else:
+            # the model declared in the same scope is preferred
+            ref = AbstractModel.registry.get(self._ref, self.model)
+            if ref is None:
                 raise exceptions.NoReferencedModelError(f'Model named {self._ref} does not exist')
+            self._ref = ref
         elif not issubclass(self._ref, AbstractModel):
             raise TypeError(f'Referenced model expected to be "str" or "Model"')
 
@@ -0,0 +1,20 @@
+from typing import Tuple
+
+
+class Index:
+    """
+    Index of one or several columns declared on the model,
+    e.g. 'by_state = Index("is_active", "expires_at")'.
+    Single column indexes are declared via 'FieldType(index=True)'.
+    """
+    def __init__(self, *cols: ['FieldType', str], unique=False, name: str = None):
+        """
+        :param cols: Indexed columns or their names, in order
+        :param unique: If True, create an UNIQUE INDEX
+        :param name: Index name, generated from the table and columns names by default
+        """
+        self.cols = cols  # type: Tuple['FieldType', str]
+        self.unique = unique
+
+        self.name = name
+        self.model = None  # type: 'AbstractModel'
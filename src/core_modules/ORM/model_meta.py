@@ -0,0 +1,66 @@
+from src.core_modules.ORM.model_metadata import ModelMetadata
+
+
+class ModelMeta(type):
+    """
+    Metaclass of the models.
+    The model metadata (see ModelMetadata) is computed once the class is created,
+    and again only if a column or an index is assigned to the class afterwards.
+    The models are registered in 'AbstractModel.registry', see ModelRegistry.
+    The compact models, e.g. 'class Task(AbstractModel, compact=True)', store the columns values in '__slots__'
+    generated from the declared fields: their instances have no '__dict__'.
+    """
+    # prefix of the slots storing the columns values
+    SLOT_PREFIX = '_col_'
+    # instance state of the models, see AbstractModel.__init__
+    STATE_SLOTS = ('_pk_val', '_snapshot', '_loader', '_deferred', '_related', '__weakref__')
+
+    def __new__(mcs, name, bases, namespace, compact=False, **kwargs):
+        compact_base = any(getattr(base, '_compact', False) for base in bases)
+        if not compact and not compact_base:
+            cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+            if bases:  # not AbstractModel itself
+                type.__setattr__(cls, '_meta', ModelMetadata(cls))
+                cls.registry.add(cls)
+            return cls
+
+        from src.core_modules.ORM import FieldType, IntegerField
+
+        fields = [attr_name for attr_name, attr in namespace.items() if isinstance(attr, FieldType)]
+        if not any(namespace[field].primary_key for field in fields):
+            # the synthetic primary key (see AbstractModel._gen_pk) must be stored in a slot too
+            namespace = {'id': IntegerField(primary_key=True, autoincrement=True), **namespace}
+            fields.insert(0, 'id')
+
+        slots = tuple(mcs.SLOT_PREFIX + field for field in fields)
+        if not compact_base:
+            slots += mcs.STATE_SLOTS
+        namespace['__slots__'] = slots
+        namespace['_compact'] = True
+
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        for field in fields:
+            namespace[field].bind_slot(cls.__dict__[mcs.SLOT_PREFIX + field])
+        type.__setattr__(cls, '_meta', ModelMetadata(cls))
+        cls.registry.add(cls)
+
+        return cls
+
+    def __init__(cls, name, bases, namespace, compact=False, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+
+    def __setattr__(cls, name, val):
+        """
+        Recompute the metadata if a column or an index is assigned to the model.
+        :param name:
+        :param val:
+        :return:
+        """
+        from src.core_modules.ORM import FieldType, Index, QueryBuilder
+
+        super().__setattr__(name, val)
+
+        if isinstance(val, (FieldType, Index)):
+            type.__setattr__(cls, '_meta', ModelMetadata(cls))
+            QueryBuilder.cache.invalidate(cls)  # the compiled statements depend on the columns
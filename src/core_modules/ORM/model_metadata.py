@@ -0,0 +1,140 @@
+import string
+import types
+from typing import Dict, Tuple, Mapping
+
+
+class ModelMetadata:
+    """
+    Immutable description of a model: columns, primary key, foreign keys, indexes.
+    Computed once when the model class is created, see ModelMeta.
+    The parts depending on the referenced models (SQL names and types of the foreign keys, eager columns)
+    are computed on first use, since the referenced models can be declared later.
+    """
+    __slots__ = ('model', 'table_name', 'cols', 'pk_col', 'fields', 'fks', 'fts_cols', 'indexes', '_resolved')
+
+    def __init__(self, model):
+        """
+        Bind the name and the model to the declared columns.
+        :param model: Model class
+        """
+        from src.core_modules.ORM import FieldType, ForeignKey, FTSField, Index
+
+        self.model = model
+        self.table_name = model.__dict__.get('_name') or self._gen_table_name(model)
+
+        cols = list()
+        for attr_name, attr in model.__dict__.items():
+            if isinstance(attr, FieldType):
+                attr.model = model
+                attr.name = attr_name
+                cols.append(attr)
+
+        pk_col = next((col for col in cols if col.primary_key), None)
+        if pk_col is None:  # the user has not specified a PK field
+            pk_col = model._gen_pk()
+            cols.insert(0, pk_col)
+
+        self.cols = tuple(cols)  # type: Tuple[FieldType, ...]
+        self.pk_col = pk_col  # type: FieldType
+        # columns by property name
+        self.fields = types.MappingProxyType({col.name: col for col in cols})  # type: Mapping[str, FieldType]
+        self.fks = tuple(col for col in cols if isinstance(col, ForeignKey))  # type: Tuple[ForeignKey, ...]
+        self.fts_cols = tuple(col for col in cols if isinstance(col, FTSField))  # type: Tuple[FTSField, ...]
+
+        indexes = list()
+        for attr in model.__dict__.values():
+            if isinstance(attr, Index):
+                attr.model = model
+                indexes.append(attr)
+        for col in cols:
+            if col.index:
+                index = Index(col)
+                index.model = model
+                indexes.append(index)
+        self.indexes = tuple(indexes)  # type: Tuple[Index, ...]
+
+        self._resolved = None  # type: tuple
+
+    def get_col(self, name: str):
+        """
+        Return the column by its property name or by its SQL name, None if it does not exist.
+        :param name:
+        :return: FieldType
+        """
+        col = self.fields.get(name)
+        if col is None:
+            col = self.col_names.get(name)
+
+        return col
+
+    @property
+    def col_names(self) -> Mapping[str, 'FieldType']:
+        """
+        Columns by SQL name, e.g. 'user_id' for the foreign key 'owner'.
+        :return:
+        """
+        return self._resolve()[0]
+
+    @property
+    def sql_types(self) -> Mapping[str, str]:
+        """
+        SQL types by property name.
+        :return:
+        """
+        return self._resolve()[1]
+
+    @property
+    def eager_cols(self) -> Tuple['FieldType', ...]:
+        """
+        Columns where the foreign keys are replaced by the columns of the referenced models, recursively.
+        :return:
+        """
+        return self._resolve()[2]
+
+    def _resolve(self) -> tuple:
+        """
+        Compute the parts depending on the referenced models once.
+        :return:
+        """
+        from src.core_modules.ORM import ForeignKey
+
+        if self._resolved is None:
+            col_names = dict()  # type: Dict[str, 'FieldType']
+            for col in self.cols:
+                col_names[col.get_ref_col_name() if isinstance(col, ForeignKey) else col.name] = col
+
+            sql_types = {col.name: col.get_type() for col in self.cols}
+
+            def walker(cols, path):  # the foreign keys of the path are not followed twice
+                for col in cols:
+                    if isinstance(col, ForeignKey) and col not in path:
+                        yield from walker(col.get_ref().get_cols(), path | {col})
+                    else:
+                        yield col
+
+            eager_cols = tuple(walker(self.cols, frozenset()))
+
+            self._resolved = (types.MappingProxyType(col_names), types.MappingProxyType(sql_types), eager_cols)
+
+        return self._resolved
+
+    @staticmethod
+    def _gen_table_name(model) -> str:
+        """
+        Return the table name based on the class name.
+        Capital letter will be lowered.
+        The first capital letter is simply lowered.
+        The other capital letters will be preceded by the word joiner.
+        :param model:
+        :return:
+        """
+        name = ''.join(
+            map(
+                lambda ch: model.WORD_JOINER + ch.lower() if ch in string.ascii_uppercase else ch.lower(),
+                model.__name__
+            )
+        )
+        if name.startswith(model.WORD_JOINER):
+            name = name[len(model.WORD_JOINER):]
+
+        return name
@@ -0,0 +1,89 @@
+import threading
+import weakref
+from typing import Dict, List, Iterable
+
+
+class ModelRegistry:
+    """
+    Models by class name, populated by ModelMeta when the model classes are created (nested subclasses included).
+    The models are referenced weakly: the discarded classes, e.g. declared in a function, disappear.
+    """
+    def __init__(self):
+        # class name -> models declared with the name, in the order of declaration
+        self._models = dict()  # type: Dict[str, List[weakref.ref]]
+        # all the models, in the order of declaration
+        self._ordered = list()  # type: List[weakref.ref]
+        self._lock = threading.Lock()
+
+    def add(self, model):
+        """
+        Register the model.
+        :param model: Model class
+        :return:
+        """
+        ref = weakref.ref(model)
+        with self._lock:
+            self._models.setdefault(model.__name__, list()).append(ref)
+            self._ordered.append(ref)
+
+    def get(self, name: str, near=None):
+        """
+        Return the last declared model named so, None if it does not exist.
+        :param name: Class name
+        :param near: Model declared in the same scope (module and enclosing class or function) is preferred
+        :return:
+        """
+        refs = self._models.get(name)
+        if not refs:
+            return None
+
+        models = [model for model in (ref() for ref in refs) if model is not None]
+        if near is not None:
+            scope = self._get_scope(near)
+            for model in reversed(models):
+                if self._get_scope(model) == scope:
+                    return model
+
+        return models[-1] if models else None
+
+    def models(self, db_path: str = None) -> list:
+        """
+        Return the registered models in the order of declaration.
+        :param db_path: Only the models bound to the database, all by default
+        :return:
+        """
+        with self._lock:
+            self._ordered = [ref for ref in self._ordered if ref() is not None]
+            models = [ref() for ref in self._ordered]
+
+        return [model for model in models if model is not None and (db_path is None or model.DB_PATH == db_path)]
+
+    @staticmethod
+    def creation_order(models: Iterable) -> list:
+        """
+        Sort the models topologically: the referenced models precede the models referencing them.
+        The models of a cycle follow the order of declaration.
+        :param models:
+        :return:
+        """
+        models = list(models)
+        pending = set(models)
+
+        deps = dict()
+        for model in models:
+            deps[model] = {fk.get_ref() for fk in model._meta.fks} & pending - {model}
+
+        ordered = list()
+        while pending:
+            ready = [model for model in models if model in pending and not deps[model] & pending]
+            if not ready:  # cycle: SQLite does not check the referenced tables on creation
+                ready = [next(model for model in models if model in pending)]
+            for model in ready:
+                pending.discard(model)
+                ordered.append(model)
+
+        return ordered
+
+    @staticmethod
+    def _get_scope(model) -> tuple:
+        return model.__module__, model.__qualname__.rpartition('.')[0]
@@ -1,8 +1,14 @@
-from typing import List, Type
+import array
+import base64
+import collections
+import itertools
+import json
+from typing import List, Type, Iterable, Iterator, Sequence, Union
 
 
 from src.core_modules.ORM import Statement
-from src.core_modules.utils import Connection
+from src.core_modules.ORM.statement_cache import StatementCache
+from src.core_modules.utils import Connection, Transaction
 from src.core_modules.ORM.exceptions import UndefinedFieldException
 from src.core_modules.ORM.exceptions import EmptyQueryException
 from src.core_modules.ORM.exceptions import SQLSyntaxError
@@ -12,24 +18,43 @@ from src.core_modules.ORM.exceptions import SQLSyntaxError
 class QueryBuilder:
     """
     Chained query builder
+    An instance accumulates its statements, it must be built and executed by one thread.
     """
     from src.core_modules.ORM import AbstractModel
     from src.core_modules.ORM import FieldType
+    from src.core_modules.ORM import Aggregate
 
     # predicates
     EQUALS = '='
     LIKE = 'LIKE'
     IN = 'IN'
     IS = 'IS'
+    GREATER = '>'
+    GREATER_OR_EQUALS = '>='
+    LESS = '<'
 
     # sorting predicates
     ASC = "ASC"
     DESC = "DESC"
 
+    # join types
+    LEFT = 'LEFT'
+    INNER = 'INNER'
+
     # response types
     RES_ALL = 1
     RES_ROW = 2
 
+    # number of rows sent per executemany
+    CHUNK_SIZE = 500
+    # number of rows fetched at once while iterating
+    BATCH_SIZE = 500
+    # maximum number of parameters of one statement (SQLITE_MAX_VARIABLE_NUMBER of old SQLite versions)
+    MAX_VARIABLES = 999
+
+    # compiled SQL shared by all the builders
+    cache = StatementCache()
+
     def __init__(self, model: [AbstractModel, Type[AbstractModel]]):
         from src.core_modules.ORM import AbstractModel
 
@@ -47,6 +72,32 @@ class QueryBuilder:
 
         # the last inserted id
         self._last_id = None
+        # the ids inserted by bulk_insert
+        self._last_ids = list()
+        # number of rows modified by the last statement
+        self._row_count = None
+
+        # keyset pagination: positions of the key columns in the row and the page size
+        self._page = None  # type: tuple
+        # continuation cursor of the fetched page
+        self._next_cursor = None
+        # bulk insert: inserted items, chunk size, conversions of an item to its row and to its primary key
+        self._bulk = None  # type: tuple
+        # joined foreign keys and the aliases of the joined tables
+        self._joins = list()
+        self._join_aliases = list()  # type: List[str]
+        # reverse relations loaded after the SELECT
+        self._prefetches = list()  # type: List[str]
+        # the selected columns of the model
+        self._cols = list()  # type: List[FieldType]
+        # fetched rows conversion, see values() and values_list()
+        self._row_factory = None
+        # columnar response, see columns()
+        self._columnar = None
+        # names of the aggregated results, see aggregate() and group_by()
+        self._result_names = list()  # type: List[str]
+        # wrap the SELECT into 'SELECT EXISTS', see exists()
+        self._exists = False
         # the fetched response
         self._res = None  # type: [list, tuple]
 
@@ -91,8 +142,116 @@ class QueryBuilder:
         stmt = Statement(sql, final=True, type_=Statement.CREATE_TABLE)
         self.stmts.append(stmt)
 
+        for index in self.model.get_indexes():
+            self.create_index(index, eager)
+
+        if self.model.get_fts_cols():
+            self.create_fts_table(eager)
+
+        return self
+
+    def create_index(self, index: 'Index', eager=True):
+        """
+        CREATE INDEX statement.
+        The statements are run as script with the preceding ones.
+        :param index: Index declared on the model
+        :param eager: If True, execute without 'IF NOT EXISTS'
+        :return:
+        """
+        table_name = self.model.get_table_name()
+        col_names = [self._ensure_col_name(col) for col in index.cols]
+        if not col_names:
+            raise SQLSyntaxError('Indexes must contain at least one column')
+
+        index_name = index.name
+        if index_name is None:
+            index_name = self.model.WORD_JOINER.join([table_name, *col_names, 'idx'])
+
+        sql = 'CREATE UNIQUE INDEX ' if index.unique else 'CREATE INDEX '
+        if not eager:
+            sql += 'IF NOT EXISTS '
+        sql += f'"{index_name}" ON "{table_name}" ('
+        sql += ', '.join(f'"{col_name}"' for col_name in col_names)
+        sql += ')'
+
+        stmt = Statement(sql, final=True, type_=Statement.CREATE_INDEX)
+        self.stmts.append(stmt)
+        self._script = True
+
+        return self
+
+    def create_fts_table(self, eager=True):
+        """
+        CREATE VIRTUAL TABLE statement of the full-text search (FTS5) shadow table
+        indexing the model's 'FTSField' columns, and the triggers keeping it up to date.
+        The statements are run as script with the preceding ones.
+        :param eager: If True, execute without 'IF NOT EXISTS'. Otherwise the triggers are recreated,
+            and the index of the existing rows must be rebuilt, see rebuild_fts().
+        :return:
+        """
+        table_name = self.model.get_table_name()
+        fts_name = self.model.get_fts_table_name()
+        col_names = [col.name for col in self.model.get_fts_cols()]
+        if not col_names:
+            raise SQLSyntaxError('Full-text search tables must contain at least one column')
+
+        if_not_exists = '' if eager else 'IF NOT EXISTS '
+        cols_sql = ', '.join(f'"{col_name}"' for col_name in col_names)
+        new_sql = ', '.join(f'new."{col_name}"' for col_name in col_names)
+        old_sql = ', '.join(f'old."{col_name}"' for col_name in col_names)
+
+        insert_sql = f'INSERT INTO "{fts_name}"(rowid, {cols_sql}) VALUES (new.rowid, {new_sql});'
+        delete_sql = f'INSERT INTO "{fts_name}"("{fts_name}", rowid, {cols_sql}) VALUES (\'delete\', old.rowid, {old_sql});'
+
+        triggers = [
+            ('ai', f'AFTER INSERT ON "{table_name}"', insert_sql),
+            ('ad', f'AFTER DELETE ON "{table_name}"', delete_sql),
+            # the other columns are updated without touching the index
+            ('au', f'AFTER UPDATE OF {cols_sql} ON "{table_name}"', f'{delete_sql}\n{insert_sql}'),
+        ]
+
+        sqls = [f'CREATE VIRTUAL TABLE {if_not_exists}"{fts_name}" USING fts5({cols_sql}, content="{table_name}")']
+        for suffix, event, body in triggers:
+            if not eager:  # replace the triggers created by the previous versions
+                sqls.append(f'DROP TRIGGER IF EXISTS "{fts_name}_{suffix}"')
+            sqls.append(f'CREATE TRIGGER "{fts_name}_{suffix}" {event} BEGIN\n{body}\nEND')
+        for sql in sqls:
+            self.stmts.append(Statement(sql, final=True, type_=Statement.CREATE_TABLE))
+        self._script = True
+
         return self
 
+    def rebuild_fts(self):
+        """
+        Rebuild the full-text search index from the model's table, e.g. for the rows inserted
+        before the full-text search table has been created.
+        :return:
+        """
+        if not self.model.get_fts_cols():
+            raise SQLSyntaxError(f'The model {self.model.__name__} does not have full-text search columns')
+
+        fts_name = self.model.get_fts_table_name()
+        self.stmts.append(Statement(f'INSERT INTO "{fts_name}"("{fts_name}") VALUES (\'rebuild\')', final=True))
+
+        return self
+
+    def index_list(self) -> dict:
+        """
+        Introspect the indexes of the model's table in the database.
+        :return: Pairs (index name, list of the indexed columns names)
+        """
+        table_name = self.model.get_table_name()
+        indexes = dict()
+
+        with Connection(self.model.DB_PATH, read_only=True) as cur:
+            cur.execute(f'PRAGMA index_list("{table_name}")')
+            index_names = [row[1] for row in cur.fetchall()]
+            for index_name in index_names:
+                cur.execute(f'PRAGMA index_info("{index_name}")')
+                indexes[index_name] = [row[2] for row in sorted(cur.fetchall())]
+
+        return indexes
+
     def insert(self, inst: AbstractModel, eager=True):
         """
         INSERT statement
@@ -105,22 +264,23 @@ class QueryBuilder:
         from src.core_modules.ORM import ForeignKey
         from src.core_modules.ORM import AbstractModel
 
-        table_name = self.model.get_table_name()
-
-        sql = f'INSERT INTO "{table_name}" ('
+        col_names = list()
         params = list()  # to be escaped
 
         for col in self.model.get_cols():
             if not isinstance(col, FieldType):  # PyCharm type hinting
                 continue
             elif isinstance(col, ForeignKey):  # recursive saving
-                ref_inst = getattr(inst, col.name)
-                if not isinstance(ref_inst, AbstractModel):  # The related model is not provided
+                ref_inst = col.get_raw(inst)  # the referenced model is not loaded
+                if ref_inst is None:  # The related model is not provided
                     continue
-                if eager:  # proceed recursive saving
-                    ref_inst.save(eager)
                 col_name = col.get_ref_col_name()
-                col_val = ref_inst.pk
+                if isinstance(ref_inst, AbstractModel):
+                    if eager:  # proceed recursive saving, unchanged models are not written
+                        ref_inst.save(eager)
+                    col_val = ref_inst.pk
+                else:  # not loaded reference
+                    col_val = ref_inst
             else:  # the recursion's base case
                 col_name = col.name
                 col_val = getattr(inst, col_name, None)
@@ -135,68 +295,125 @@ class QueryBuilder:
                 # continue  # ' INSERT INTO "book" () VALUES ()'
                 col_val = None
 
-            sql += f'"{col_name}", '
+            col_names.append(col_name)
             params.append(col_val)
 
-        if sql.endswith(', '):
-            sql = sql[:-2]
+        if not col_names:
+            if not getattr(self.model.get_pk_col(), 'autoincrement', False):
+                raise EmptyQueryException(f'The query does not contain columns or values')
 
-        sql += ') VALUES ('
+        sql = self.cache.get(self.model, ('insert', tuple(col_names)), lambda: self._compile_insert(col_names))
 
-        sql += '?, ' * len(params)
-        if sql.endswith(', '):
-            sql = sql[:-2]
+        stmt = Statement(sql, final=True)
+        stmt.params.extend(params)
+        self.stmts.append(stmt)
+        self.params.extend(params)
 
-        sql += ')'
+        return self
 
-        if '()' in sql:
-            if not self.model.get_pk_col().autoincrement:
-                raise EmptyQueryException(f'The query does not contain columns or values')
+    def bulk_insert(self, instances: Iterable[AbstractModel], chunk_size: int = None, eager=True):
+        """
+        INSERT statement shared by many instances.
+        The SQL is generated once, the rows are streamed through 'executemany' by chunks.
+        :param instances: Model instances to be inserted
+        :param chunk_size: Number of rows sent at once
+        :param eager: If True, insert or update all nested models
+        :return:
+        """
+        from src.core_modules.ORM import IntegerField
+
+        cols = [
+            col for col in self.model.get_cols()
+            if not (isinstance(col, IntegerField) and col.autoincrement)
+        ]
+        col_names = [self._get_col_name(col) for col in cols]
+        sql = self.cache.get(self.model, ('insert', tuple(col_names)), lambda: self._compile_insert(col_names))
 
         stmt = Statement(sql, final=True)
-        stmt.params.extend(params)
         self.stmts.append(stmt)
-        self.params.extend(params)
+
+        pk_name = self.model.get_pk_col().name
+        self._bulk = (
+            instances,
+            chunk_size or self.CHUNK_SIZE,
+            lambda inst: self._get_insert_row(inst, cols, eager),
+            lambda inst: getattr(inst, pk_name, None),
+        )
+
+        return self
+
+    def insert_rows(self, fields: Iterable[Union[str, FieldType]], rows: Iterable[Sequence], chunk_size: int = None):
+        """
+        INSERT statement shared by many raw rows, without model instances, see bulk_insert().
+        The values are not converted nor validated: the rows must contain the database values.
+        :param fields: Inserted columns or their names
+        :param rows: Values of the columns, in the order of the fields
+        :param chunk_size: Number of rows sent at once
+        :return:
+        """
+        col_names = [self._ensure_col_name(field) for field in fields]
+        sql = self.cache.get(self.model, ('insert', tuple(col_names)), lambda: self._compile_insert(col_names))
+
+        self.stmts.append(Statement(sql, final=True))
+
+        pk_name = self._get_col_name(self.model.get_pk_col())
+        pk_pos = col_names.index(pk_name) if pk_name in col_names else None
+        self._bulk = (
+            rows,
+            chunk_size or self.CHUNK_SIZE,
+            None,
+            (lambda row: None) if pk_pos is None else (lambda row: row[pk_pos]),
+        )
 
         return self
 
     def update(self, inst: AbstractModel, eager=True):
+        """
+        UPDATE the columns modified since the instance has been fetched or saved.
+        All the columns are written if none of them has been modified.
+        :param inst:
+        :param eager: Save the loaded referenced models
+        :return:
+        """
         from src.core_modules.ORM import FieldType
         from src.core_modules.ORM import ForeignKey
         from src.core_modules.ORM import AbstractModel
 
-        sql = f'UPDATE "{self.model.get_table_name()}"\nSET '
+        col_names = list()
         params = list()
 
+        changes = inst.get_changes()
+
         for col in self.model.get_cols():
             if not isinstance(col, FieldType):  # PyCharm type hinting
                 continue
-            elif isinstance(col, (ForeignKey, AbstractModel)):
-                ref_inst = getattr(inst, col.name, None)
-                if eager:
-                    if ref_inst is None:
-                        continue
-                    elif isinstance(ref_inst, AbstractModel):
-                        ref_inst.save(eager)
-                    else:
-                        continue  # TODO: check if the referenced model is bound via the correct primary key value
+            elif isinstance(col, ForeignKey):
+                ref_inst = col.get_raw(inst)  # the referenced model is not loaded
+                if isinstance(ref_inst, AbstractModel) and eager:  # unchanged models are not written
+                    ref_inst.save(eager)
+                if changes and col.name not in changes:
+                    continue
+                if ref_inst is None and eager:
+                    continue
+                if isinstance(ref_inst, AbstractModel):
+                    param = ref_inst.pk
+                else:  # not loaded reference
+                    param = ref_inst
                 col_name = col.get_ref_col_name()
-                param = ref_inst.pk if ref_inst is not None else None
+            elif changes and col.name not in changes:
+                continue
             else:
                 col_name = col.name
                 param = getattr(inst, col_name)
                 if isinstance(param, FieldType):  # empty value
                     param = None
-            sql += f'"{col_name}"=?, '
+            col_names.append(col_name)
             params.append(param)
 
-        if sql.endswith(', '):
-            sql = sql[:-2] + '\n'
-
-        pk_col_name = self.model.get_pk_col().name
-        sql += f'WHERE "{pk_col_name}"=?'
         params.append(inst.pk)
 
+        sql = self.cache.get(self.model, ('update', tuple(col_names)), lambda: self._compile_update(col_names))
+
         stmt = Statement(sql, final=True)  # TODO: not final (WHERE clause)
         stmt.params.extend(params)
         self.stmts.append(stmt)
@@ -209,15 +426,13 @@ class QueryBuilder:
         from src.core_modules.ORM import AbstractModel
 
         cols = self.model.get_cols()
-        table_name = self.model.get_table_name()
-        pk_col_name = self.model.get_pk_col().name
         pk_val = inst.pk
 
-        sql = f'DELETE FROM "{table_name}" WHERE "{pk_col_name}"=?'
+        sql = self.cache.get(self.model, ('delete', ), self._compile_delete)
 
         if eager:
             for ref_col in filter(lambda col: isinstance(col, ForeignKey), cols):
-                ref_inst = getattr(inst, ref_col.name, None)
+                ref_inst = ref_col.get_raw(inst)  # only the loaded models
                 if isinstance(ref_inst, AbstractModel):
                     ref_inst.delete()
 
@@ -230,37 +445,271 @@ class QueryBuilder:
 
         return self
 
-    def select(self):
+    def update_where(self, values: dict):
+        """
+        UPDATE statement without instances.
+        Followed by WHERE statements, e.g. update_where({'title': 'lorem'}).where('id', '>', 3).
+        :param values: Pairs (column or its name, new value). The value can be a raw SQL 'Statement'.
+        :return:
+        """
+        from src.core_modules.ORM import AbstractModel
+
+        if not values:
+            raise EmptyQueryException('The query does not contain columns or values')
+
+        sql = f'UPDATE "{self.model.get_table_name()}"\nSET '
+        params = list()
+
+        for col, val in values.items():
+            col_name = self._ensure_col_name(col)
+            if isinstance(val, Statement):  # raw expression
+                sql += f'"{col_name}"={val.to_sql().strip()}, '
+                params.extend(val.params)
+                continue
+            if isinstance(val, AbstractModel):
+                val = val.pk
+            sql += f'"{col_name}"=?, '
+            params.append(val)
+
+        sql = sql[:-2] + '\n'
+
+        stmt = Statement(sql, final=False, type_=Statement.UPDATE)
+        stmt.params.extend(params)
+        self.stmts.append(stmt)
+        self.params.extend(params)
+
+        return self
+
+    def delete_where(self):
+        """
+        DELETE statement without instances.
+        Followed by WHERE statements, e.g. delete_where().where('id', '>', 3).
+        :return:
+        """
+        sql = f'DELETE FROM "{self.model.get_table_name()}"\n'
+
+        stmt = Statement(sql, final=False, type_=Statement.DELETE)
+        self.stmts.append(stmt)
+
+        return self
+
+    def select(self, *fields: [str, FieldType]):
         """
         SELECT statement.
         Create two parts of the statement: {SELECT, FROM}.
+        The not selected columns are deferred: ModelFactory leaves them to be loaded on access.
+        :param fields: Columns to be selected, all by default. The primary key is always selected.
         :return:
         """
-        from src.core_modules.ORM import FieldType, ForeignKey
-        from src.core_modules.ORM import AbstractModel
+        return self._select(self._get_selected_cols(fields))
 
-        sql = 'SELECT '
+    def values(self, *fields: [str, FieldType]):
+        """
+        SELECT the columns, the rows are fetched as dictionaries {field name: value}.
+        No model is hydrated, the foreign keys hold the referenced primary key values.
+        :param fields: Columns to be selected, all by default
+        :return:
+        """
+        cols = self._get_selected_cols(fields, False)
+        names = [col.name for col in cols]
+        self._select(cols)
+        self._row_factory = lambda cur, row: dict(zip(names, row))
 
-        cols = self.model.get_cols(False)
-        for col in cols:
-            if not isinstance(col, FieldType) and not isinstance(col.model, AbstractModel):
-                raise TypeError(f'Unsupported type of the column {col}')
-            elif isinstance(col, ForeignKey):
-                col_name = f'{col.get_ref_col_name()}'
-            else:
-                col_name = col.name
-            sql += f'"{self.model.get_table_name()}"."{col_name}", '
+        return self
 
-        if sql.endswith(', '):
-            sql = sql[:-2]
+    def values_list(self, *fields: [str, FieldType], named=False):
+        """
+        SELECT the columns, the rows are fetched as tuples without hydration.
+        :param fields: Columns to be selected, all by default
+        :param named: Fetch named tuples
+        :return:
+        """
+        cols = self._get_selected_cols(fields, False)
+        self._select(cols)
+        if named:
+            row_type = collections.namedtuple(f'{self.model.__name__}Row', [col.name for col in cols])
+            self._row_factory = lambda cur, row: row_type._make(row)
+
+        return self
+
+    def columns(self, *fields: [str, FieldType], numpy=False):
+        """
+        SELECT the columns, the response is columnar: {field name: values}.
+        The INTEGER and REAL columns are stored in arrays ('array' module, or NumPy if required),
+        so aggregations over large tables do not create one object per row.
+        A column holding a NULL or a value of another type (SQLite's type affinity allows both) is returned as a list.
+        :param fields: Columns to be selected, all by default
+        :param numpy: Return NumPy arrays, requires NumPy
+        :return:
+        """
+        if numpy:
+            import numpy  # optional dependency, required on demand only
+
+        self._select(self._get_selected_cols(fields, False))
+        self._columnar = 'numpy' if numpy else 'array'
+
+        return self
+
+    def aggregate(self, *aggregates: Aggregate, **named_aggregates: Aggregate):
+        """
+        SELECT aggregate functions computed by SQLite, e.g. aggregate(Count(), latest=Max('expires_at')).
+        The response is the dictionary {alias: value}, or the list of dictionaries per group, see group_by().
+        :param aggregates: Aggregates named by their default alias, e.g. 'count', 'max_expires_at'
+        :param named_aggregates: Aggregates named by the keys
+        :return:
+        """
+        pairs = [(agg.default_alias, agg) for agg in aggregates] + list(named_aggregates.items())
+        if not pairs:
+            raise SQLSyntaxError('No aggregate function is provided')
+
+        table_name = self.model.get_table_name()
+        exprs = tuple((alias, agg.to_sql(self._get_aggregated_col_sql(agg))) for alias, agg in pairs)
+
+        select_sql = self.cache.get(
+            self.model,
+            ('aggregate', exprs),
+            lambda: 'SELECT ' + ', '.join(f'{expr} AS "{alias}"' for alias, expr in exprs) + '\n'
+        )
+
+        self._result_names = [alias for alias, _ in pairs]
+        names = self._result_names  # extended by group_by()
+        self._row_factory = lambda cur, row: dict(zip(names, row))
+
+        self.stmts.append(Statement(select_sql, f'FROM "{table_name}"\n', final=False, type_=Statement.SELECT))
+        self._res_type = self.RES_ROW
+
+        return self
+
+    def count(self, field: [str, FieldType] = '*', distinct=False):
+        """
+        SELECT COUNT, the response is the number of rows.
+        :param field: Counted column, the NULL values are not counted. All the rows by default.
+        :param distinct: Count the distinct values only
+        :return:
+        """
+        from src.core_modules.ORM import Count
+
+        self.aggregate(count=Count(field, distinct))
+        self._row_factory = lambda cur, row: row[0]
+
+        return self
+
+    def exists(self):
+        """
+        SELECT EXISTS, the response is True if at least one row matches the following WHERE statements.
+        :return:
+        """
+        table_name = self.model.get_table_name()
+
+        self.stmts.append(Statement('SELECT 1\n', f'FROM "{table_name}"\n', final=False, type_=Statement.SELECT))
+        self._exists = True
+        self._row_factory = lambda cur, row: bool(row[0])
+        self._res_type = self.RES_ROW
+
+        return self
+
+    def group_by(self, *fields: [str, FieldType]):
+        """
+        GROUP BY statement, follows aggregate() and WHERE statements.
+        The grouping columns are selected before the aggregates.
+        :param fields: Grouping columns
+        :return:
+        """
+        table_name = self.model.get_table_name()
+        col_names = [self._ensure_col_name(field) for field in fields]
+        if not col_names:
+            raise SQLSyntaxError('No grouping column is provided')
+
+        positions = [i for i, stmt in enumerate(self.stmts) if stmt.type == Statement.SELECT]
+        if not positions or not self._result_names:
+            raise SQLSyntaxError('Unexpected "GROUP BY" statement, aggregate() must precede it')
+        select_stmt = self.stmts[positions[0]]
+
+        cols_sql = ', '.join(f'"{table_name}"."{col_name}"' for col_name in col_names)
+        select_stmt.terms[0] = select_stmt.terms[0].replace('SELECT ', f'SELECT {cols_sql}, ', 1)
+        self._result_names[:0] = col_names
+
+        sql = self.cache.get(self.model, ('group_by', tuple(col_names)), lambda: f'GROUP BY {cols_sql}')
+        self.stmts.append(Statement(sql, final=False, type_=Statement.GROUP_BY))
+        self._res_type = self.RES_ALL
+
+        return self
+
+    def having(self, aggregate: [Aggregate, str], predicate: str, term: [str, int, float]):
+        """
+        HAVING statement, follows group_by().
+        :param aggregate: Aggregate function or alias of an aggregated result
+        :param predicate: The predicate, e.g. QueryBuilder.GREATER
+        :param term: The right term
+        :return:
+        """
+        from src.core_modules.ORM import Aggregate
+
+        if isinstance(aggregate, Aggregate):
+            expr = aggregate.to_sql(self._get_aggregated_col_sql(aggregate))
+        elif aggregate in self._result_names:
+            expr = f'"{aggregate}"'
         else:
-            sql += '*'
+            raise SQLSyntaxError(f'The aggregated result {aggregate} is not selected')
 
-        sql += '\n'
+        prefix = 'AND' if self._group_clause(Statement.HAVING) else 'HAVING'
+
+        stmt = Statement(f'{prefix} {expr} {predicate} ?', final=False, type_=Statement.HAVING)
+        stmt.params.append(term)
+        self.stmts.append(stmt)
+        self.params.append(term)
 
-        stmt = Statement(sql, final=False, type_=Statement.SELECT)
+        return self
+
+    def _group_clause(self, type_: int) -> bool:
+        """
+        Parenthesize the WHERE or HAVING clause accumulated by the last statements,
+        so the next predicate is AND-ed with the whole clause, e.g. 'WHERE (a OR b) AND c'.
+        :param type_: Statement.WHERE or Statement.HAVING
+        :return: Whether the clause is accumulated
+        """
+        start = len(self.stmts)
+        while start and self.stmts[start - 1].type == type_:
+            start -= 1
+        clause = self.stmts[start:]
+        if not clause:
+            return False
 
-        sql = f'FROM "{self.model.get_table_name()}"\n'
+        if len(clause) > 1:
+            keyword, sql = clause[0].terms[0].strip().split(' ', 1)
+            clause[0].terms[0] = f'{keyword} ({sql}'
+            clause[-1].terms[-1] = clause[-1].terms[-1].rstrip() + ')'
+
+        return True
+
+    def _get_aggregated_col_sql(self, aggregate: Aggregate) -> str:
+        """
+        Return the qualified name of the aggregated column, or '*'.
+        :param aggregate:
+        :return:
+        """
+        if '*' == aggregate.field:
+            return '*'
+
+        return f'"{self.model.get_table_name()}"."{self._ensure_col_name(aggregate.field)}"'
+
+    def _select(self, cols: List[FieldType]):
+        """
+        SELECT the columns of the model.
+        :param cols:
+        :return:
+        """
+        col_names = tuple(col.name for col in cols)
+        select_sql, from_sql = self.cache.get(
+            self.model,
+            ('select', ) if tuple(cols) == self.model.get_cols(False) else ('select', col_names),
+            lambda: self._compile_select(cols)
+        )
+        self._cols = cols
+
+        stmt = Statement(select_sql, final=False, type_=Statement.SELECT)
+
+        sql = from_sql
 
         stmt.terms.append(sql)
         self.stmts.append(stmt)  # SELECT
@@ -268,27 +717,56 @@ class QueryBuilder:
 
         return self
 
+    def only(self, *fields: [str, FieldType]):
+        """
+        SELECT the columns, the others are deferred.
+        :param fields:
+        :return:
+        """
+        return self.select(*fields)
+
+    def defer(self, *fields: [str, FieldType]):
+        """
+        SELECT all the columns but the provided ones, e.g. large TEXT or BLOB columns.
+        :param fields:
+        :return:
+        """
+        deferred = {col.name for col in self._get_selected_cols(fields) if not col.primary_key}
+
+        return self.select(*(col for col in self.model.get_cols(False) if col.name not in deferred))
+
     def where(self, param: [str, FieldType], predicate: str, term: [str, int, float, bool, AbstractModel]):
         """
         WHERE statement.
         :param param: The left term
         :param predicate: The predicate
-        :param term: The right term
+        :param term: The right term, a list of terms for the IN predicate
         :return:
         """
         from src.core_modules.ORM import AbstractModel
 
         col_name = self._ensure_col_name(param)
+        table_name = self.model.get_table_name()
 
-        if isinstance(term, AbstractModel):
-            term = term.pk
-        if term is None:
-            predicate = self.IS
-
-        sql = f'WHERE "{col_name}" {predicate} ?'
-        if predicate == self.LIKE:
-            term = '%' + term + '%'
-        params = [term]
+        if predicate == self.IN and isinstance(term, (list, tuple, set)):
+            params = [t.pk if isinstance(t, AbstractModel) else t for t in term]
+            sql = self.cache.get(
+                self.model,
+                ('where', col_name, predicate, len(params)),
+                lambda: f'WHERE "{table_name}"."{col_name}" IN ({", ".join("?" * len(params))})'
+            )
+        else:
+            if isinstance(term, AbstractModel):
+                term = term.pk
+            if term is None:
+                predicate = self.IS
+
+            sql = self.cache.get(
+                self.model, ('where', col_name, predicate), lambda: f'WHERE "{table_name}"."{col_name}" {predicate} ?'
+            )
+            if predicate == self.LIKE:
+                term = '%' + term + '%'
+            params = [term]
 
         stmt = Statement(sql, final=False, type_=Statement.WHERE)
         stmt.params.extend(params)
@@ -342,6 +820,41 @@ class QueryBuilder:
 
         return self
 
+    def match(self, query: str, rank=False):
+        """
+        Full-text search predicate on the model's 'FTSField' columns (FTS5 MATCH).
+        In SELECT queries the shadow table is joined, so the results can be ordered by relevance.
+        :param query: FTS5 query, e.g. 'lorem ipsum' or '"lorem ipsum" OR dolor*'
+        :param rank: If True, order by relevance. Must follow all the WHERE statements.
+        :return:
+        """
+        if not self.model.get_fts_cols():
+            raise SQLSyntaxError(f'The model {self.model.__name__} does not have full-text search columns')
+
+        table_name = self.model.get_table_name()
+        fts_name = self.model.get_fts_table_name()
+
+        select_stmt = next((stmt for stmt in self.stmts if stmt.type == Statement.SELECT), None)
+        if select_stmt is not None:
+            select_stmt.terms.append(f'JOIN "{fts_name}" ON "{fts_name}"."rowid"="{table_name}"."rowid"\n')
+            sql = f'"{fts_name}" MATCH ?'
+        elif rank:
+            raise SQLSyntaxError('Only SELECT queries can be ordered by relevance')
+        else:
+            sql = f'"{table_name}"."rowid" IN (SELECT "rowid" FROM "{fts_name}" WHERE "{fts_name}" MATCH ?)'
+
+        prefix = 'AND' if self._group_clause(Statement.WHERE) else 'WHERE'
+
+        stmt = Statement(f'{prefix} {sql}', final=False, type_=Statement.WHERE)
+        stmt.params.append(query)
+        self.stmts.append(stmt)
+        self.params.append(query)
+
+        if rank:
+            self.stmts.append(Statement(f'ORDER BY "{fts_name}"."rank"', final=True, type_=Statement.ORDER))
+
+        return self
+
     def limit(self, limit: int):
         """
         LIMIT statement.
@@ -395,14 +908,146 @@ class QueryBuilder:
 
         col_name = self._ensure_col_name(by)
 
-        sql = f'ORDER BY {col_name} {order}'
+        sql = f'ORDER BY "{self.model.get_table_name()}"."{col_name}" {order}'
 
         stmt = Statement(sql, final=True, type_=Statement.ORDER)
         self.stmts.append(stmt)
 
         return self
 
-    # TODO: JOIN
+    def paginate(self, order_by: [str, FieldType] = None, page_size=20, after: str = None, order='ASC'):
+        """
+        Keyset (seek) pagination: WHERE (col, pk) > (?, ?) ORDER BY col, pk LIMIT ?
+        Unlike OFFSET, the preceding rows are not scanned.
+        Must follow the SELECT and WHERE statements. The ordering column must not contain NULL.
+        :param order_by: The column (name) by which is ordered the query, the primary key by default
+        :param page_size: Number of rows per page
+        :param after: Cursor returned by 'next_cursor' of the previous page
+        :param order: Type of ordering
+        :return:
+        """
+        if order not in [self.ASC, self.DESC]:
+            raise SQLSyntaxError(f'Unexpected ORDER type {order}')
+
+        table_name = self.model.get_table_name()
+        pk_col_name = self.model.get_pk_col().name
+        col_name = pk_col_name if order_by is None else self._ensure_col_name(order_by)
+        keys = [col_name] if col_name == pk_col_name else [col_name, pk_col_name]
+
+        # the cursor is read from the fetched rows
+        col_names = [self._get_col_name(col) for col in self.cols]
+        missing = [key for key in keys if key not in col_names]
+        if missing:
+            raise SQLSyntaxError(f'The key columns {", ".join(missing)} must be selected to paginate')
+
+        if after is not None:
+            vals = self.decode_cursor(after)
+            if len(vals) != len(keys):
+                raise SQLSyntaxError('The cursor does not match the ordering')
+
+            predicate = '>' if order == self.ASC else '<'
+            keys_sql = ', '.join(f'"{table_name}"."{key}"' for key in keys)
+            placeholders = ', '.join('?' * len(keys))
+            if len(keys) > 1:
+                keys_sql, placeholders = f'({keys_sql})', f'({placeholders})'
+
+            prefix = 'AND' if self._group_clause(Statement.WHERE) else 'WHERE'
+
+            stmt = Statement(f'{prefix} {keys_sql} {predicate} {placeholders}', final=False, type_=Statement.WHERE)
+            stmt.params.extend(vals)
+            self.stmts.append(stmt)
+            self.params.extend(vals)
+
+        sql = 'ORDER BY ' + ', '.join(f'"{table_name}"."{key}" {order}' for key in keys)
+        self.stmts.append(Statement(sql, final=True, type_=Statement.ORDER))
+
+        self.limit(page_size)
+        self._res_type = self.RES_ALL
+
+        self._page = (tuple(col_names.index(key) for key in keys), page_size)
+
+        return self
+
+    def join(self, fk: [str, FieldType], kind='LEFT'):
+        """
+        JOIN statement: the referenced model is fetched by the same SELECT.
+        The referenced columns are appended to the selected ones, see 'joins' and ModelFactory.append_joins().
+        :param fk: ForeignKey column of the model or of an already joined model,
+                   or its dotted path from the model, e.g. 'owner' or 'owner.company'
+        :param kind: LEFT or INNER
+        :return:
+        """
+        from src.core_modules.ORM import ForeignKey
+
+        kind = kind.upper()
+        if kind not in [self.LEFT, self.INNER]:
+            raise SQLSyntaxError(f'Unexpected JOIN type {kind}')
+
+        if isinstance(fk, str):
+            fk = self._resolve_fk_path(fk)
+        if not isinstance(fk, ForeignKey):
+            raise TypeError(f'Unsupported type of the joined column {fk}')
+
+        # the owner of the foreign key: the model itself or an already joined model
+        if fk.model is self.model:
+            owner_alias = self.model.get_table_name()
+        else:
+            for joined_fk, joined_alias in zip(reversed(self._joins), reversed(self._join_aliases)):
+                if joined_fk.get_ref() is fk.model:
+                    owner_alias = joined_alias
+                    break
+            else:
+                raise SQLSyntaxError(f'The model {fk.model.__name__} must be joined before {fk.name}')
+
+        positions = [i for i, stmt in enumerate(self.stmts) if stmt.type & (Statement.SELECT | Statement.JOIN)]
+        if not positions:
+            raise SQLSyntaxError('Unexpected "JOIN" statement')
+        select_stmt = self.stmts[positions[0]]
+
+        ref = fk.get_ref()
+        ref_table_name = ref.get_table_name()
+        alias = f'{owner_alias}.{fk.name}'
+
+        # the referenced columns follow the selected ones
+        ref_cols_sql = ', '.join(f'"{alias}"."{self._get_col_name(col)}"' for col in ref.get_cols(False))
+        select_stmt.terms[0] = f'{select_stmt.terms[0].rstrip()}, {ref_cols_sql}\n'
+
+        sql = f'{kind} JOIN "{ref_table_name}" AS "{alias}" '
+        sql += f'ON "{alias}"."{ref.get_pk_col().name}"="{owner_alias}"."{fk.get_ref_col_name()}"\n'
+
+        stmt = Statement(sql, final=False, type_=Statement.JOIN)
+        self.stmts.insert(positions[-1] + 1, stmt)
+
+        self._joins.append(fk)
+        self._join_aliases.append(alias)
+
+        return self
+
+    def prefetch(self, *relations: str):
+        """
+        Load the reverse relations of the selected rows (see ForeignKey 'reversed_by'),
+        one 'WHERE fk IN (...)' query per relation instead of one query per row.
+        The relations are loaded by ModelFactory, see 'prefetches' and ModelFactory.append_prefetches().
+        :param relations: Names given by 'reversed_by'
+        :return:
+        """
+        for relation in relations:
+            self.model.get_reversed_fk(relation)  # ensure the relation exists
+            self._prefetches.append(relation)
+
+        return self
+
+    def select_related(self, *paths: str, kind='LEFT'):
+        """
+        Join the referenced models, e.g. select_related('owner', 'owner.company').
+        :param paths: Dotted paths of the foreign keys
+        :param kind: LEFT or INNER
+        :return:
+        """
+        for path in paths:
+            self.join(path, kind)
+
+        return self
 
     def build(self):
         """
@@ -418,23 +1063,31 @@ class QueryBuilder:
             if stmt.final:
                 # the single statement without concatenations
                 sql += stmt.to_sql()
+                if self.script:
+                    sql += ';\n'
                 params.extend(stmt.params)
                 i += 1
             else:
                 # terms = stmt.terms
                 try:
                     next_stmt = self.stmts[i + 1]
-                    if next_stmt.type & (Statement.WHERE | Statement.LIMIT | Statement.OFFSET | Statement.ORDER):
+                    if next_stmt.type & (
+                            Statement.WHERE | Statement.LIMIT | Statement.OFFSET | Statement.ORDER | Statement.JOIN |
+                            Statement.GROUP_BY | Statement.HAVING
+                    ):
                         sql += stmt.to_sql()
                         params.extend(stmt.params)
                         i += 1
-                    elif next_stmt.type == Statement.JOIN:
-                        pass  # TODO: join
+                    else:
+                        raise SQLSyntaxError(f'Unexpected statement {next_stmt.terms}')
                 except IndexError:
                     sql += stmt.to_sql()
                     params.extend(stmt.params)
                     i += 1
 
+        if self._exists:
+            sql = f'SELECT EXISTS ({sql.strip()})'
+
         self.sql = sql
         self.params = params
 
@@ -449,11 +1102,16 @@ class QueryBuilder:
 
         last_id = None
 
-        with Connection(self.model.DB_PATH, True) as cur:
+        if self._bulk is not None:
+            return self._execute_many()
+
+        with Connection(self.model.DB_PATH, True, read_only=self.read_only) as cur:
             if self.script:
                 cur.executescript(self.sql)
             else:
+                cur.row_factory = self._row_factory
                 cur.execute(self.sql, tuple(self.params))
+                self._row_count = cur.rowcount
                 pk_col = self.model.get_pk_col()
 
                 if self._res_type is not None:
@@ -466,12 +1124,48 @@ class QueryBuilder:
         self._destructor()
         self._last_id = last_id
 
+        if self._page is not None:
+            self._next_cursor = self._get_next_cursor()
+
         return self
 
+    def iterate(self, batch_size: int = None) -> Iterator[tuple]:
+        """
+        Execute the accumulated SELECT statement and yield the rows one by one.
+        The rows are fetched by batches, so the memory usage does not depend on the response size.
+        The connection is held until the generator is exhausted or closed.
+        :param batch_size: Number of rows fetched at once
+        :return:
+        """
+        if not self.sql:
+            self.build()
+
+        sql = self.sql
+        params = tuple(self.params)
+        read_only = self.read_only
+        self._destructor()
+
+        with Connection(self.model.DB_PATH, False, read_only=read_only) as cur:
+            cur.row_factory = self._row_factory
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(batch_size or self.BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+
     @property
     def script(self):
         return self._script
 
+    @property
+    def read_only(self) -> bool:
+        """
+        The accumulated statements only read the database: they are executed by a read-only connection.
+        :return:
+        """
+        return not self.script and bool(self.stmts) and Statement.SELECT == self.stmts[0].type
+
     @property
     def last_id(self):
         """
@@ -480,6 +1174,65 @@ class QueryBuilder:
         """
         return self._last_id
 
+    @property
+    def last_ids(self) -> list:
+        """
+        Primary keys of the rows inserted by bulk_insert
+        :return:
+        """
+        return self._last_ids
+
+    @property
+    def row_count(self) -> int:
+        """
+        Number of rows modified by the last UPDATE or DELETE statement
+        :return:
+        """
+        return self._row_count
+
+    @property
+    def joins(self) -> list:
+        """
+        Joined foreign keys, in the order of the selected columns blocks
+        :return:
+        """
+        return self._joins
+
+    @property
+    def cols(self) -> List[FieldType]:
+        """
+        Selected columns of the model, in the order of the row
+        :return:
+        """
+        return self._cols or self.model.get_cols(False)
+
+    @property
+    def prefetches(self) -> List[str]:
+        """
+        Reverse relations to be loaded
+        :return:
+        """
+        return self._prefetches
+
+    @property
+    def next_cursor(self) -> [str, None]:
+        """
+        Opaque cursor of the next page, None if the fetched page is the last one
+        :return:
+        """
+        return self._next_cursor
+
+    @staticmethod
+    def encode_cursor(vals: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps(vals).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (ValueError, TypeError, AttributeError):
+            raise SQLSyntaxError(f'Malformed cursor {cursor}')
+
     @property
     def res(self):
         """
@@ -502,26 +1255,248 @@ class QueryBuilder:
                 col_name = col_name.get_ref_col_name()
             else:
                 col_name = col_name.name
-        # the user provides the column name
+        # the user provides the column name or the property name
         elif isinstance(col_name, str):
-            for col_meta in self.model.get_cols(False):
-                if isinstance(col_meta, ForeignKey):
-                    if col_name == col_meta.get_ref_col_name():
-                        break
-                elif isinstance(col_meta, FieldType):
-                    if col_name == col_meta.name:
-                        break
-                else:
-                    continue
-            else:
+            col_meta = self.model.get_col(col_name)
+            if col_meta is None:
                 raise SQLSyntaxError(f'The field {col_name} is not defined in the model')
+            col_name = self._get_col_name(col_meta)
         else:
             raise TypeError(f'Unsupported type of term "{col_name}" ({type(col_name)}')
 
         return col_name
 
+    def _get_selected_cols(self, fields: Iterable[Union[str, FieldType]], with_pk=True) -> List[FieldType]:
+        """
+        Return the columns designated by their fields or names, in the order of the model's columns.
+        :param fields:
+        :param with_pk: Include the primary key
+        :return:
+        """
+        from src.core_modules.ORM import FieldType
+
+        cols = self.model.get_cols(False)
+        if not fields:
+            return cols
+
+        names = set()
+        for field in fields:
+            col = field if isinstance(field, FieldType) else self.model.get_col(field)
+            if col is None:
+                raise SQLSyntaxError(f'The field {field} is not defined in the model')
+            names.add(col.name)
+
+        return [col for col in cols if col.primary_key and with_pk or col.name in names]
+
+    def _resolve_fk_path(self, path: str) -> FieldType:
+        """
+        Return the foreign key designated by its dotted path from the model, e.g. 'owner.company'.
+        :param path:
+        :return:
+        """
+        from src.core_modules.ORM import ForeignKey
+
+        model = self.model
+        fk = None
+        for name in path.split('.'):
+            fk = model._meta.fields.get(name)
+            if not isinstance(fk, ForeignKey):
+                raise SQLSyntaxError(f'The foreign key {name} is not defined in the model {model.__name__}')
+            model = fk.get_ref()
+
+        return fk
+
+    def _get_next_cursor(self) -> [str, None]:
+        """
+        Encode the key columns of the last fetched row.
+        :return:
+        """
+        positions, page_size = self._page
+
+        rows = self._res or list()
+        if isinstance(rows, dict):  # see columns()
+            rows = list(zip(*(vals[-page_size:] for vals in rows.values())))
+        if len(rows) < page_size:
+            return None
+
+        row = rows[-1]
+        if isinstance(row, dict):  # see values()
+            row = tuple(row.values())
+
+        return self.encode_cursor([row[pos] for pos in positions])
+
+    def _fetch_columns(self, cur) -> dict:
+        """
+        Fetch the rows by batches and append them to the per-column buffers, see columns().
+        The rows are not materialized all at once.
+        :param cur:
+        :return:
+        """
+        typecodes = {'INTEGER': 'q', 'REAL': 'd'}
+
+        sql_types = self.model._meta.sql_types
+        buffers = list()
+        for col in self.cols:
+            typecode = typecodes.get(sql_types[col.name])
+            buffers.append(list() if typecode is None else array.array(typecode))
+
+        while True:
+            rows = cur.fetchmany(self.BATCH_SIZE)
+            if not rows:
+                break
+            for i, vals in enumerate(zip(*rows)):
+                buffer = buffers[i]
+                if isinstance(buffer, array.array):
+                    try:
+                        buffer.fromlist(list(vals))  # unchanged on error
+                        continue
+                    except TypeError:  # NULL or a value stored with another type
+                        buffer = buffers[i] = buffer.tolist()
+                buffer.extend(vals)
+
+        columns = dict()
+        for col, vals in zip(self.cols, buffers):
+            if self._columnar == 'numpy':
+                import numpy
+
+                vals = numpy.array(vals)
+            columns[col.name] = vals
+
+        return columns
+
+    def _compile_insert(self, col_names: List[str]) -> str:
+        table_name = self.model.get_table_name()
+
+        if not col_names:
+            return f'INSERT INTO "{table_name}" DEFAULT VALUES'
+
+        cols_sql = ', '.join(f'"{col_name}"' for col_name in col_names)
+        placeholders = ', '.join('?' * len(col_names))
+
+        return f'INSERT INTO "{table_name}" ({cols_sql}) VALUES ({placeholders})'
+
+    def _compile_update(self, col_names: List[str]) -> str:
+        sql = f'UPDATE "{self.model.get_table_name()}"\nSET '
+        sql += ', '.join(f'"{col_name}"=?' for col_name in col_names)
+        sql += f'\nWHERE "{self.model.get_pk_col().name}"=?'
+
+        return sql
+
+    def _compile_delete(self) -> str:
+        return f'DELETE FROM "{self.model.get_table_name()}" WHERE "{self.model.get_pk_col().name}"=?'
+
+    def _compile_select(self, cols: List[FieldType]) -> tuple:
+        """
+        Return the SELECT and FROM terms of the model.
+        :param cols: Selected columns
+        :return:
+        """
+        from src.core_modules.ORM import FieldType, ForeignKey
+        from src.core_modules.ORM import AbstractModel
+
+        table_name = self.model.get_table_name()
+
+        sql = 'SELECT '
+
+        for col in cols:
+            if not isinstance(col, FieldType) and not isinstance(col.model, AbstractModel):
+                raise TypeError(f'Unsupported type of the column {col}')
+            elif isinstance(col, ForeignKey):
+                col_name = f'{col.get_ref_col_name()}'
+            else:
+                col_name = col.name
+            sql += f'"{table_name}"."{col_name}", '
+
+        if sql.endswith(', '):
+            sql = sql[:-2]
+        else:
+            sql += '*'
+
+        sql += '\n'
+
+        return sql, f'FROM "{table_name}"\n'
+
+    def _execute_many(self):
+        """
+        Stream the bulk insert rows by chunks in one transaction.
+        :return:
+        """
+        items, chunk_size, to_row, to_pk = self._bulk
+        pk_col = self.model.get_pk_col()
+        autoincrement = getattr(pk_col, 'autoincrement', False)
+        sql = self.sql
+        last_ids = list()
+
+        items = iter(items)
+        with Transaction(self.model.DB_PATH):  # the rowids of a chunk stay consecutive
+            while True:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                rows = chunk if to_row is None else [to_row(item) for item in chunk]
+                with Connection(self.model.DB_PATH, True) as cur:
+                    cur.executemany(sql, rows)
+                    if autoincrement:
+                        cur.execute('SELECT last_insert_rowid()')
+                        last_id = cur.fetchone()[0]
+                        last_ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+                if not autoincrement:
+                    last_ids.extend(to_pk(item) for item in chunk)
+
+        self._destructor()
+        self._bulk = None
+        self._last_ids = last_ids
+        self._last_id = last_ids[-1] if last_ids else None
+
+        return self
+
+    @staticmethod
+    def _get_col_name(col: FieldType) -> str:
+        """
+        Return the database column name of the field.
+        :param col:
+        :return:
+        """
+        from src.core_modules.ORM import ForeignKey
+
+        if isinstance(col, ForeignKey):
+            return col.get_ref_col_name()
+        return col.name
+
+    @staticmethod
+    def _get_insert_row(inst: AbstractModel, cols: List[FieldType], eager=True) -> tuple:
+        """
+        Return the parameters of the instance row.
+        :param inst: Model instance to be inserted
+        :param cols: Inserted columns
+        :param eager: If True, insert or update all nested models
+        :return:
+        """
+        from src.core_modules.ORM import FieldType, ForeignKey
+        from src.core_modules.ORM import AbstractModel
+
+        row = list()
+        for col in cols:
+            if isinstance(col, ForeignKey):
+                col_val = col.get_raw(inst)  # the referenced model is not loaded
+                if isinstance(col_val, AbstractModel):
+                    if eager:
+                        col_val.save(eager)
+                    col_val = col_val.pk
+            else:
+                col_val = getattr(inst, col.name, None)
+            if col_val is None or isinstance(col_val, FieldType):
+                if col.not_null and not col.use_default:
+                    raise UndefinedFieldException(f'Column "{col.name}" requires a value')
+                col_val = None
+            row.append(col_val)
+
+        return tuple(row)
+
     def _fetch(self, cur):
-        if self._res_type == self.RES_ALL:
+        if self._columnar is not None:
+            return self._fetch_columns(cur)
+        elif self._res_type == self.RES_ALL:
             return cur.fetchall()
         elif self._res_type == self.RES_ROW:
             return cur.fetchone()
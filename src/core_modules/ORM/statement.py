@@ -9,6 +9,11 @@ class Statement:
     JOIN = 16
     ORDER = 32
     CREATE_TABLE = 64
+    UPDATE = 128
+    DELETE = 256
+    CREATE_INDEX = 512
+    GROUP_BY = 1024
+    HAVING = 2048
 
     def __init__(self, *terms: str, final=False, type_=None):
         self.terms = [*terms]  # type: List[str]
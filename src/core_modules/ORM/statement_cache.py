@@ -0,0 +1,67 @@
+import threading
+import weakref
+from typing import Callable, Hashable
+
+
+class StatementCache:
+    """
+    Compiled SQL per model and per statement shape.
+    The same shape always produces the same SQL string,
+    so sqlite3 reuses its prepared statements.
+    """
+    def __init__(self):
+        # model -> {shape: sql}
+        self._cache = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model, shape: Hashable, compiler: Callable[[], str]) -> str:
+        """
+        Return the cached SQL of the shape, compile it on miss.
+        :param model: Model class the statement belongs to
+        :param shape: Operation, column set and predicate shape
+        :param compiler: Callable returning the SQL
+        :return:
+        """
+        with self._lock:  # the weak dictionary and the counters are shared by the threads
+            shapes = self._cache.get(model)
+            sql = None if shapes is None else shapes.get(shape)
+            if sql is not None:
+                self.hits += 1
+                return sql
+
+        sql = compiler()  # outside of the lock, the compilers may use the cache
+        with self._lock:
+            self.misses += 1
+            self._cache.setdefault(model, dict())[shape] = sql
+
+        return sql
+
+    def invalidate(self, model):
+        """
+        Forget the statements of the model, e.g. after its columns have changed.
+        :param model:
+        :return:
+        """
+        with self._lock:
+            self._cache.pop(model, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for tuning.
+        :return:
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': sum(len(shapes) for shapes in self._cache.values())
+            }
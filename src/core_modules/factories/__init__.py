@@ -1 +1,2 @@
 from src.core_modules.factories.model_factory import ModelFactory
+from src.core_modules.factories.lazy_loader import LazyLoader
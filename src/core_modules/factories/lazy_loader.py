@@ -0,0 +1,58 @@
+import weakref
+from typing import Type
+
+
+class LazyLoader:
+    """
+    Deferred loading of the models referenced by the foreign keys of the instances hydrated together.
+    The first access to a foreign key loads the referenced models of all the instances at once.
+    """
+    from src.core_modules.ORM import AbstractModel
+    from src.core_modules.ORM import ForeignKey
+    from src.core_modules.utils import IdentityMap
+
+    def __init__(self, identity_map: IdentityMap):
+        """
+        :param identity_map: Registry of the referenced instances
+        """
+        self.identity_map = identity_map
+        self._instances = weakref.WeakSet()  # instances hydrated together
+
+    def add(self, inst: AbstractModel):
+        self._instances.add(inst)
+        inst._loader = self
+
+    def load(self, fk_col: ForeignKey):
+        """
+        Replace the raw foreign key values of the instances with the referenced models.
+        :param fk_col:
+        :return:
+        """
+        from src.core_modules.ORM import AbstractModel, QueryBuilder
+        from src.core_modules.factories import ModelFactory
+
+        ref_model = fk_col.get_ref()  # type: Type[AbstractModel]
+        pending = [
+            inst for inst in list(self._instances)
+            if type(inst) is fk_col.model and fk_col.get_raw(inst) is not None
+            and not isinstance(fk_col.get_raw(inst), AbstractModel)
+        ]
+        pks = list({fk_col.get_raw(inst) for inst in pending})
+
+        refs = dict()
+        for pk in pks:
+            ref = self.identity_map.get(ref_model, pk)
+            if ref is not None:
+                refs[pk] = ref
+        pks = [pk for pk in pks if pk not in refs]
+
+        for i in range(0, len(pks), QueryBuilder.MAX_VARIABLES):
+            qb = QueryBuilder(ref_model).select()
+            qb.where(ref_model.get_pk_col(), QueryBuilder.IN, pks[i:i + QueryBuilder.MAX_VARIABLES]).build().execute()
+            for ref in ModelFactory(ref_model, qb.res, self.identity_map).to_list():
+                refs[ref.pk] = ref
+
+        for inst in pending:
+            ref = refs.get(fk_col.get_raw(inst))
+            if ref is not None:  # dangling references stay raw
+                fk_col.__set__(inst, ref)
@@ -1,4 +1,5 @@
-from typing import Type, List, Iterable, Union
+import itertools
+from typing import Type, List, Iterable, Iterator, Union
 
 
 class ModelFactory:
@@ -6,13 +7,48 @@ class ModelFactory:
     Create objects
     """
     from src.core_modules.ORM import AbstractModel
+    from src.core_modules.ORM import FieldType
     from src.core_modules.ORM import ForeignKey
+    from src.core_modules.utils import IdentityMap
+
+    def __init__(self, constructor: Type[AbstractModel], data: [list, tuple], identity_map: IdentityMap = None):
+        """
+        :param constructor: Model to be filled
+        :param data: Fetched row or rows
+        :param identity_map: Registry of the already hydrated instances, the current transaction's one by default
+        """
+        from src.core_modules.utils import Connection, IdentityMap
+        from src.core_modules.factories import LazyLoader
 
-    def __init__(self, constructor: Type[AbstractModel], data: [list, tuple]):
         self.constructor = constructor  # basic constructor
         self.data = data  # fetched row or rows
 
+        if identity_map is None:
+            transaction = Connection.get_transaction(constructor.DB_PATH)
+            if transaction is not None:
+                identity_map = transaction.identity_map
+        self.identity_map = identity_map  # type: IdentityMap
+
+        self._cols = list()  # selected columns of the constructor, all by default
+        self._plan = None  # (columns, deferred names, has foreign keys) of the constructor, see fill_row
         self._joins = list()  # joined columns
+        self._prefetches = list()  # loaded reverse relations
+        # the joined rows referenced by several rows are hydrated once
+        self._joined_map = identity_map if identity_map is not None else IdentityMap()
+        # the not joined referenced models are loaded on first access, for all the hydrated rows at once
+        self._loader = LazyLoader(self._joined_map)
+
+    def only(self, *cols: Iterable[FieldType]):
+        """
+        Set the selected columns of the constructor, see QueryBuilder.cols.
+        The other columns are deferred: they are loaded on access.
+        :param cols:
+        :return:
+        """
+        self._cols = list(cols)
+        self._plan = None
+
+        return self
 
     @property
     def joins(self) -> List[ForeignKey]:
@@ -38,17 +74,39 @@ class ModelFactory:
             if isinstance(joined_col, ForeignKey):
                 self._joins.append(joined_col)
             elif isinstance(joined_col, str):
-                for col in self.constructor.get_cols(False):
-                    if col.name == joined_col:
-                        self._joins.append(col)
-                        break
-                else:
+                col = self.constructor._meta.fields.get(joined_col)
+                if col is None:
                     raise KeyError(f'The column with name "{joined_col}" does not exist')
+                self._joins.append(col)
             else:
                 raise TypeError(f'Unsupported parameter as column identifier {joined_col}, {type(joined_col)}')
 
         return self
 
+    @property
+    def prefetches(self) -> List[str]:
+        """
+        Reverse relations loaded with the models.
+        :return:
+        """
+        return self._prefetches
+
+    def append_prefetches(self, *relations: Iterable[str], reset=False):
+        """
+        Append the reverse relations (ForeignKey 'reversed_by') to be loaded, see QueryBuilder.prefetch().
+        :param relations: Names of the reverse relations.
+        :param reset: If True, clear the current list of relations
+        :return:
+        """
+        if reset:
+            self._prefetches.clear()
+
+        for relation in relations:
+            self.constructor.get_reversed_fk(relation)  # ensure the relation exists
+            self._prefetches.append(relation)
+
+        return self
+
     def to_list(self) -> List[AbstractModel]:
         """
         Map the data to list of models.
@@ -56,44 +114,121 @@ class ModelFactory:
         """
         if isinstance(self.data, tuple):
             objects = self.fill_row(self.data)
+            self.prefetch([objects])
         elif isinstance(self.data, list):
             objects = [self.fill_row(row) for row in self.data]
+            self.prefetch(objects)
         elif self.data is None:
             objects = list()
         else:
             raise TypeError('Inappropriate data to be filled')
         return objects
 
+    def iter_models(self) -> Iterator[AbstractModel]:
+        """
+        Map the data to models lazily.
+        The data can be any iterable of rows, e.g. QueryBuilder.iterate().
+        The reverse relations are loaded by batches of rows.
+        :return:
+        """
+        from src.core_modules.ORM import QueryBuilder
+
+        if isinstance(self.data, tuple):
+            yield from self.prefetch([self.fill_row(self.data)])
+        elif self.data is not None:
+            if not self._prefetches:
+                for row in self.data:
+                    yield self.fill_row(row)
+                return
+            rows = iter(self.data)
+            while True:
+                objects = [self.fill_row(row) for row in itertools.islice(rows, QueryBuilder.BATCH_SIZE)]
+                if not objects:
+                    break
+                yield from self.prefetch(objects)
+
+    def prefetch(self, objects: List[AbstractModel]) -> List[AbstractModel]:
+        """
+        Load the reverse relations of the models: one query per relation and per chunk of primary keys.
+        Each model receives the list of its related models as the relation's property.
+        :param objects: Models of the constructor
+        :return:
+        """
+        from src.core_modules.ORM import AbstractModel, QueryBuilder
+
+        for relation in self._prefetches:
+            fk_col = self.constructor.get_reversed_fk(relation)
+            owners = {obj.pk: obj for obj in objects if obj.pk is not None}
+            related = {pk: list() for pk in owners}
+
+            pks = list(related)
+            for i in range(0, len(pks), QueryBuilder.MAX_VARIABLES):
+                qb = QueryBuilder(fk_col.model).select()
+                qb.where(fk_col, QueryBuilder.IN, pks[i:i + QueryBuilder.MAX_VARIABLES]).build().execute()
+                for ref_obj in ModelFactory(fk_col.model, qb.res, self.identity_map).to_list():
+                    ref_pk = fk_col.get_raw(ref_obj)  # not loaded
+                    if isinstance(ref_pk, AbstractModel):  # bound by a join
+                        ref_pk = ref_pk.pk
+                    else:  # the owner is known already
+                        fk_col.__set__(ref_obj, owners[ref_pk])
+                    related[ref_pk].append(ref_obj)
+
+            for obj in objects:
+                obj.set_related(relation, related.get(obj.pk, list()))
+
+        return objects
+
     def fill_row(self, row: tuple) -> AbstractModel:
         """
         Fill one object with the fetched row.
+        The columns of the joined models follow the model's columns, in the order of the joins.
         :param row:
         :return:
         """
-        from src.core_modules.ORM import ForeignKey
-
-        joins = self.joins
+        identity_map = self.identity_map
+        loader = self._loader
 
-        def filler(model, cols, start):
-            # create instance and fill it
-            inst = model()
+        def filler(model, cols, start, registry, deferred=frozenset(), has_fks=True):
             end = start + len(cols)
             data = row[start:end]
-            for col, val in zip(cols, data):
-                if col.primary_key:
-                    inst.pk = val
-                setattr(inst, col.name, val)
-
-            # pass recursively the related model constructors
-            for fk_col in filter(lambda c: isinstance(c, ForeignKey), cols):
-                try:
-                    ref_model = joins.pop(joins.index(fk_col)).get_ref()
-                    ref_cols = ref_model.get_cols(False)
-                    ref_start = end + len(ref_cols)
-                    filler(ref_model, ref_cols, ref_start)
-                except ValueError:
-                    continue
+
+            # the row has been hydrated already, the values may have changed since, e.g. by update_where()
+            if registry is not None:
+                pk_col = model.get_pk_col()
+                inst = registry.get(model, next((val for col, val in zip(cols, data) if col is pk_col), None))
+                if inst is not None:
+                    return inst.refresh_row(cols, data)
+
+            # create instance and fill it
+            inst = model.from_row(cols, data, deferred)
+
+            if has_fks:
+                loader.add(inst)
+            if registry is not None:
+                registry.add(inst)
 
             return inst
 
-        return filler(self.constructor, self.constructor.get_cols(False), 0)
+        if self._plan is None:  # computed once for all the rows
+            all_cols = self.constructor.get_cols(False)
+            cols = tuple(self._cols) or all_cols
+            deferred = frozenset(col.name for col in all_cols) - {col.name for col in cols}
+            fks = self.constructor._meta.fks
+            self._plan = (cols, deferred, any(col in fks for col in cols))
+        cols, deferred, has_fks = self._plan
+        inst = filler(self.constructor, cols, 0, identity_map, deferred, has_fks)
+
+        # bind the joined models to the foreign keys of their owners
+        owners = {self.constructor: inst}
+        start = len(cols)
+        for fk_col in self.joins:
+            ref_model = fk_col.get_ref()
+            ref_cols = ref_model.get_cols(False)
+            owner = owners.get(fk_col.model)
+            if owner is not None and fk_col.get_raw(owner) is not None:  # LEFT JOIN without match otherwise
+                ref_inst = filler(ref_model, ref_cols, start, self._joined_map, has_fks=bool(ref_model._meta.fks))
+                setattr(owner, fk_col.name, ref_inst)
+                owners[ref_model] = ref_inst
+            start += len(ref_cols)
+
+        return inst
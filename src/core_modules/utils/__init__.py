@@ -1,4 +1,10 @@
 from src.core_modules.utils.observer_interface import ObserverInterface
 from src.core_modules.utils.subject_interface import SubjectInterface
 from src.core_modules.utils.settings_provider_interface import SettingsProviderInterface
-from src.core_modules.utils.connection import Connection
+from src.core_modules.utils.identity_map import IdentityMap
+from src.core_modules.utils.reiterable import Reiterable
+from src.core_modules.utils.pragma_profile import PragmaProfile
+from src.core_modules.utils.db_executor import DBExecutor
+from src.core_modules.utils.db_writer import DBWriter
+from src.core_modules.utils.connection import Connection, ConnectionPool
+from src.core_modules.utils.transaction import Transaction
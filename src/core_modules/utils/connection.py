@@ -1,27 +1,375 @@
+import os
+import pathlib
 import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+from src.core_modules.utils.pragma_profile import PragmaProfile
+from src.core_modules.utils.db_executor import DBExecutor
+from src.core_modules.utils.db_writer import DBWriter
+
+
+class ConnectionPool:
+    """
+    Persistent sqlite3 connections bound to one database file.
+    Idle connections are kept open and reused instead of being reopened per statement.
+    The read-only pools open the file with 'mode=ro' and 'query_only': their connections never take write locks,
+    and read the pages through a memory map instead of copying them into the page cache.
+    Their idle connections are kept per thread, so each reading thread keeps reusing its own connections.
+    An idle connection is only validated (database file identity, liveness probe) once it has been idle longer than
+    'validate_after' seconds, or when a statement failed on it.
+    """
+    SIZE = 5  # default number of idle connections kept open per database
+    VALIDATE_AFTER = 1.0  # default seconds a connection stays idle before being validated again
+    MMAP_SIZE = 268435456  # bytes memory-mapped by the read-only connections, unless the profile sets 'mmap_size'
+
+    def __init__(self, db_path: str, size: int = None, profile: PragmaProfile = None, read_only=False,
+                 validate_after: float = None):
+        """
+        :param db_path:
+        :param size: Number of idle connections kept open (per thread for the read-only pools)
+        :param profile: Pragmas applied to the new connections, SQLite defaults otherwise
+        :param read_only: Open the connections in read-only mode
+        :param validate_after: Seconds a connection stays idle before being validated on checkout
+        """
+        self._db_path = db_path
+        self.size = ConnectionPool.SIZE if size is None else size
+        self.profile = profile
+        self.read_only = read_only
+        self.validate_after = ConnectionPool.VALIDATE_AFTER if validate_after is None else validate_after
+
+        # idle connections with the time they have been released at
+        self._idle = list()  # type: List[Tuple[sqlite3.Connection, float]]
+        # read-only pools: thread identifier -> idle connections of the thread
+        self._readers = dict()  # type: Dict[int, List[Tuple[sqlite3.Connection, float]]]
+        self._lock = threading.Lock()
+
+        # identity of the database file the idle connections are opened on
+        self._file_id = None
+
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Return a connection: either an idle one or a new one.
+        The connections idle for longer than 'validate_after' are checked first.
+        :return:
+        """
+        with self._lock:
+            idle = self._get_idle()
+            if idle and time.monotonic() - idle[-1][1] > self.validate_after:
+                if self._file_id != self._get_file_id():
+                    # the database file has been removed or replaced
+                    self._close_idle()
+                while idle:
+                    con, released_at = idle.pop()
+                    if self._is_healthy(con):
+                        return con
+                    self._close(con)
+            elif idle:
+                return idle.pop()[0]
+
+        con = self._connect()
+        with self._lock:
+            self._file_id = self._get_file_id()
+
+        return con
+
+    def release(self, con: sqlite3.Connection, validate=False):
+        """
+        Give the connection back to the pool.
+        Close it if the pool is full.
+        :param con:
+        :param validate: A statement failed on the connection: close it unless it is healthy
+        :return:
+        """
+        try:
+            if con.in_transaction:
+                con.rollback()
+        except sqlite3.Error:
+            self._close(con)
+            return
+
+        if validate and not (self._is_healthy(con) and self._file_id == self._get_file_id()):
+            self._close(con)
+            return
+
+        with self._lock:
+            idle = self._get_idle()
+            if len(idle) < self.size:
+                idle.append((con, time.monotonic()))
+                return
+
+        self._close(con)
+
+    def has_idle(self) -> bool:
+        """
+        The current thread has an idle connection to reuse, i.e. the pool has already opened the database.
+        Lock-free hint.
+        :return:
+        """
+        idle = self._readers.get(threading.get_ident()) if self.read_only else self._idle
+
+        return bool(idle)
+
+    def close(self):
+        """
+        Close all idle connections.
+        :return:
+        """
+        with self._lock:
+            self._close_idle()
+
+    def checkpoint(self):
+        """
+        Checkpoint the WAL file through a short-lived writable connection.
+        The last closed connection removes the WAL file, unless it is read-only.
+        :return:
+        """
+        if not os.path.isfile(self._db_path + '-wal'):
+            return
+        try:
+            con = sqlite3.connect(self._db_path)
+            con.execute('PRAGMA schema_version').fetchone()  # open the WAL
+        except sqlite3.Error:
+            return
+        self._close(con)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection configured with the profile.
+        :return:
+        """
+        if not self.read_only:
+            con = sqlite3.connect(self._db_path, check_same_thread=False)
+            if self.profile is not None:
+                self.profile.apply(con)
+            return con
+
+        uri = pathlib.Path(os.path.abspath(self._db_path)).as_uri() + '?mode=ro'
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        pragmas = dict()
+        if self.profile is not None:
+            pragmas.update(self.profile.pragmas)
+        pragmas.pop('journal_mode', None)  # persistent, set by the writers
+        pragmas.setdefault('mmap_size', self.MMAP_SIZE)
+        pragmas['query_only'] = 'ON'
+        for name, val in pragmas.items():
+            con.execute(f'PRAGMA {name} = {val}').fetchall()
+
+        return con
+
+    def _get_idle(self) -> List[sqlite3.Connection]:
+        """
+        Return the idle connections the current thread reuses.
+        Must be invoked with the lock.
+        :return:
+        """
+        if not self.read_only:
+            return self._idle
+
+        idle = self._readers.get(threading.get_ident())
+        if idle is None:
+            # a new thread: close the connections of the finished ones
+            alive = {thread.ident for thread in threading.enumerate()}
+            for ident in [ident for ident in self._readers if ident not in alive]:
+                for con, released_at in self._readers.pop(ident):
+                    self._close(con)
+            idle = self._readers[threading.get_ident()] = list()
+
+        return idle
+
+    def _close_idle(self):
+        while self._idle:
+            self._close(self._idle.pop()[0])
+        for idle in self._readers.values():
+            while idle:
+                self._close(idle.pop()[0])
+
+    def _get_file_id(self):
+        """
+        Return the identity of the database file, None if it does not exist.
+        :return:
+        """
+        if self._db_path in (':memory:', '') or self._db_path.startswith('file:'):
+            return self._db_path
+        try:
+            stat = os.stat(self._db_path)
+        except (OSError, TypeError, ValueError):
+            return None
+
+        return stat.st_dev, stat.st_ino
+
+    @staticmethod
+    def is_file(db_path: str) -> bool:
+        """
+        The database is stored in an existing file, i.e. not in memory.
+        :param db_path:
+        :return:
+        """
+        if db_path in (':memory:', '') or db_path.startswith('file:'):
+            return False
+
+        return os.path.isfile(db_path)
+
+    @staticmethod
+    def _is_healthy(con: sqlite3.Connection) -> bool:
+        """
+        Health check: the connection is still open and answers.
+        :param con:
+        :return:
+        """
+        try:
+            con.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+
+        return True
+
+    @staticmethod
+    def _close(con: sqlite3.Connection):
+        try:
+            con.close()
+        except sqlite3.Error:
+            pass
 
 
 class Connection:
     """
-    Sqlite3 connection context
+    Sqlite3 connection context.
+    The connection is borrowed from the pool bound to the database path.
+    The read-only contexts borrow from the read-only pool, unless a transaction is opened by the current thread:
+    its connection is used to read the uncommitted changes.
     """
+    # pools registry: (database path, read-only) -> pool
+    _pools = dict()  # type: Dict[tuple, ConnectionPool]
+    _pools_lock = threading.Lock()
+
+    # per-thread state: database path -> stack of active transactions
+    _local = threading.local()
+
     # instance's properties
     _con = None  # type: sqlite3.Connection
     _cur = None  # type: sqlite3.Cursor
+    _pool = None  # type: ConnectionPool
+    _pinned = False  # the connection belongs to a transaction
 
-    def __init__(self, db_path: str, commit=True):
+    def __init__(self, db_path: str, commit=True, read_only=False):
+        """
+        :param db_path:
+        :param commit: Commit on exit
+        :param read_only: Only read the database: nothing is committed
+        """
         self._db_path = db_path
-        self.commit = commit
+        self.commit = commit and not read_only
+        self.read_only = read_only
 
     def __enter__(self) -> sqlite3.Cursor:
-        self._con = sqlite3.connect(self._db_path)
+        transaction = Connection.get_transaction(self._db_path)
+        if transaction is None:
+            read_only = self.read_only
+            if read_only:
+                # the read-only connections cannot create the database file
+                pool = Connection.get_pool(self._db_path, True)
+                read_only = pool.has_idle() or ConnectionPool.is_file(self._db_path)
+            self._pool = Connection.get_pool(self._db_path, read_only)
+            self._con = self._pool.acquire()
+            self._pinned = False
+        else:  # the transaction commits itself
+            self._con = transaction.con
+            self._pinned = True
         self._cur = self._con.cursor()
 
         return self._cur
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.commit:
-            self._con.commit()
-
         self._cur.close()
-        self._con.close()
+
+        if not self._pinned:
+            if self.commit:
+                self._con.commit()
+            self._pool.release(self._con, validate=isinstance(exc_val, sqlite3.Error))
+
+        self._cur = None
+        self._con = None
+        self._pool = None
+
+    @staticmethod
+    def get_pool(db_path: str, read_only=False) -> ConnectionPool:
+        """
+        Return the pool bound to the database path, create it if needed.
+        :param db_path:
+        :param read_only: The read-only pool, see ConnectionPool
+        :return:
+        """
+        key = (db_path, read_only)
+        pool = Connection._pools.get(key)
+        if pool is None:
+            with Connection._pools_lock:
+                pool = Connection._pools.setdefault(key, ConnectionPool(db_path, read_only=read_only))
+
+        return pool
+
+    @staticmethod
+    def get_transaction(db_path: str):
+        """
+        Return the innermost transaction opened by the current thread on the database.
+        :param db_path:
+        :return: 'Transaction' or None
+        """
+        stack = Connection.get_transactions(db_path)
+
+        return stack[-1] if stack else None
+
+    @staticmethod
+    def get_transactions(db_path: str) -> list:
+        """
+        Return the stack of transactions opened by the current thread on the database.
+        :param db_path:
+        :return:
+        """
+        transactions = getattr(Connection._local, 'transactions', None)
+        if transactions is None:
+            transactions = Connection._local.transactions = dict()
+
+        return transactions.setdefault(db_path, list())
+
+    @staticmethod
+    def configure(db_path: str, size: int = None, profile: PragmaProfile = None):
+        """
+        Set the number of idle connections kept open for the database and the pragmas of its connections.
+        :param db_path:
+        :param size: Number of idle connections, unchanged if None
+        :param profile: Pragmas applied to the new connections, unchanged if None
+        :return:
+        """
+        for pool in (Connection.get_pool(db_path), Connection.get_pool(db_path, True)):
+            if size is not None:
+                pool.size = size
+            if profile is not None:
+                pool.profile = profile
+                pool.close()  # the idle connections have been opened with the previous profile
+
+    @staticmethod
+    def close_all():
+        """
+        Close every pooled connection once the queued asynchronous calls and writes are executed.
+        Must be invoked at shutdown.
+        :return:
+        """
+        DBExecutor.shutdown_all()
+        DBWriter.shutdown_all()
+
+        with Connection._pools_lock:
+            pools = list(Connection._pools.values())
+            Connection._pools.clear()
+
+        for pool in pools:
+            pool.close()
+        for pool in pools:
+            if pool.read_only:
+                pool.checkpoint()
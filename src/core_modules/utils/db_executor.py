@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Callable, Dict
+
+
+class DBExecutor:
+    """
+    Dedicated thread executing the database calls of one database one by one, see AsyncQueryBuilder.
+    The calls are queued in a bounded queue: the producers wait while it is full.
+    Every call runs on the same thread, hence it reuses the same pooled connections
+    and the transactions opened by a call (see Transaction) are visible to it only.
+    """
+    MAX_SIZE = 1024  # default number of queued calls
+    THREAD_NAME = 'db-executor'
+
+    # executors registry: database path -> executor
+    _executors = dict()  # type: Dict[str, DBExecutor]
+    _executors_lock = threading.Lock()
+
+    def __init__(self, db_path: str = None, max_size: int = None):
+        """
+        :param db_path: Database the calls work on
+        :param max_size: Number of queued calls
+        """
+        self._db_path = db_path
+        self._queue = queue.Queue(self.MAX_SIZE if max_size is None else max_size)
+        self._thread = threading.Thread(target=self._work, name=f'{self.THREAD_NAME} {db_path}', daemon=True)
+        self._thread.start()
+
+    @property
+    def thread(self) -> threading.Thread:
+        return self._thread
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Queue the call, wait while the queue is full.
+        :param fn:
+        :param args:
+        :param kwargs:
+        :return: Future of the call's result
+        """
+        future = concurrent.futures.Future()
+        self._queue.put((future, fn, args, kwargs))
+
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Queue the call and wait for its result without blocking the event loop.
+        :param fn:
+        :param args:
+        :param kwargs:
+        :return: Result of the call
+        """
+        future = concurrent.futures.Future()
+        item = (future, fn, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:  # back pressure: wait for a free slot outside of the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the thread once the queued calls are executed.
+        :param wait: Wait for the thread
+        :return:
+        """
+        self._queue.put(None)
+        if wait and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                res = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(res)
+
+    @classmethod
+    def get(cls, db_path: str) -> 'DBExecutor':
+        """
+        Return the executor bound to the database path, start it if needed.
+        :param db_path:
+        :return:
+        """
+        executor = cls._executors.get(db_path)
+        if executor is None:
+            with cls._executors_lock:
+                executor = cls._executors.get(db_path)
+                if executor is None:
+                    executor = cls._executors[db_path] = cls(db_path)
+
+        return executor
+
+    @classmethod
+    def shutdown_all(cls):
+        """
+        Stop every executor once their queued calls are executed.
+        :return:
+        """
+        with cls._executors_lock:
+            executors = list(cls._executors.values())
+            cls._executors.clear()
+
+        for executor in executors:
+            executor.shutdown()
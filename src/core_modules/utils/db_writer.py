@@ -0,0 +1,86 @@
+import queue
+import threading
+from typing import Dict
+
+
+from src.core_modules.utils.db_executor import DBExecutor
+
+
+class DBWriter(DBExecutor):
+    """
+    Single thread executing the writes of one database, submitted by any number of threads.
+    The calls queued meanwhile are coalesced into one transaction (up to BATCH_SIZE calls),
+    each call in its own savepoint: a failing call is rolled back alone, the instances it wrote are evicted
+    from the identity map of the transaction and expired (they can be submitted again),
+    the others are committed together.
+    The futures are resolved once the transaction is committed.
+    The calls must not commit by themselves, e.g. with 'executescript()'.
+    """
+    BATCH_SIZE = 256  # default number of calls per transaction
+    THREAD_NAME = 'db-writer'
+
+    # writers registry: database path -> writer
+    _executors = dict()  # type: Dict[str, DBWriter]
+    _executors_lock = threading.Lock()
+
+    def __init__(self, db_path: str = None, max_size: int = None, batch_size: int = None):
+        """
+        :param db_path: Database the calls write to
+        :param max_size: Number of queued calls
+        :param batch_size: Number of calls per transaction
+        """
+        self.batch_size = self.BATCH_SIZE if batch_size is None else batch_size
+
+        super().__init__(db_path, max_size)
+
+    def _work(self):
+        stopped = False
+        while not stopped:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopped = True
+                    break
+                batch.append(item)
+
+            self._execute(batch)
+
+    def _execute(self, batch: list):
+        """
+        Execute the calls in one transaction.
+        :param batch: Queued calls
+        :return:
+        """
+        from src.core_modules.utils.transaction import Transaction
+
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+
+        results = list()
+        try:
+            with Transaction(self._db_path):
+                for future, fn, args, kwargs in batch:
+                    try:
+                        with Transaction(self._db_path):  # savepoint
+                            res = fn(*args, **kwargs)
+                    except Exception as e:
+                        results.append((future, None, e))
+                    else:
+                        results.append((future, res, None))
+        except Exception as e:  # the transaction has not been committed
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+
+        for future, res, e in results:
+            if e is None:
+                future.set_result(res)
+            else:
+                future.set_exception(e)
@@ -0,0 +1,95 @@
+import weakref
+
+
+class IdentityMap:
+    """
+    Session scoped registry of the hydrated instances:
+    at most one instance per (model, primary key) while the instance is referenced.
+    The keys registered and the instances written inside a transaction or a savepoint are journaled,
+    so they can be evicted and expired when it is rolled back.
+    """
+    def __init__(self):
+        self._instances = weakref.WeakValueDictionary()
+        # per open transaction or savepoint, innermost last:
+        # (registered keys, {id(instance): (written instance, its primary key before the scope)})
+        self._journals = list()
+
+    def get(self, model: type, pk):
+        """
+        Return the registered instance, None if the row has not been hydrated.
+        :param model:
+        :param pk:
+        :return:
+        """
+        if pk is None:
+            return None
+
+        return self._instances.get((model, pk))
+
+    def add(self, inst):
+        """
+        Register the instance under its primary key.
+        :param inst:
+        :return:
+        """
+        if inst.pk is not None:
+            key = (type(inst), inst.pk)
+            self._instances[key] = inst
+            if self._journals:
+                self._journals[-1][0].add(key)
+
+    def track(self, inst, pk):
+        """
+        Journal the instance written (inserted, updated or deleted) inside the open scope.
+        :param inst:
+        :param pk: Primary key of the instance before the write, None if it has been inserted
+        :return:
+        """
+        if self._journals:
+            self._journals[-1][1].setdefault(id(inst), (inst, pk))
+
+    def discard(self, inst, pk=None):
+        """
+        Forget the instance, e.g. after DELETE.
+        :param inst:
+        :param pk: Primary key under which the instance has been registered, the current one by default
+        :return:
+        """
+        key = (type(inst), inst.pk if pk is None else pk)
+        if self._instances.get(key) is inst:
+            del self._instances[key]
+
+    def begin(self):
+        """
+        Start journaling the registered keys and the written instances, see Transaction.
+        :return:
+        """
+        self._journals.append((set(), dict()))
+
+    def end(self, rollback: bool = False):
+        """
+        Stop journaling the keys and the instances since the matching begin().
+        :param rollback: Evict the keys: the rows have been rolled back, their primary keys may be reused.
+        Expire the written instances: they are saved again as a whole, the inserted ones are inserted again.
+        :return:
+        """
+        keys, written = self._journals.pop()
+        if rollback:
+            for key in keys:
+                self._instances.pop(key, None)
+            for inst, pk in written.values():
+                inst.expire(pk)
+        elif self._journals:  # released into the enclosing savepoint
+            parent_keys, parent_written = self._journals[-1]
+            parent_keys.update(keys)
+            for key, val in written.items():
+                parent_written.setdefault(key, val)  # the state before the enclosing scope
+
+    def clear(self):
+        self._instances.clear()
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __contains__(self, inst) -> bool:
+        return self.get(type(inst), inst.pk) is inst
@@ -0,0 +1,87 @@
+import re
+import sqlite3
+from typing import Dict, Union
+
+
+class PragmaProfile:
+    """
+    PRAGMA statements applied to each new connection of a pool, see Connection.configure().
+    """
+    # tunable pragmas
+    PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout', 'foreign_keys')
+
+    # named profiles selectable from the settings
+    PROFILES = {
+        # SQLite defaults: rollback journal, synchronous=FULL
+        'default': dict(),
+        # concurrent readers do not block the writer, one fsync per checkpoint instead of per transaction
+        'balanced': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -8000,  # KiB
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,  # ms
+        },
+        # bulk loading: the last transactions can be lost on power failure, the database is not corrupted
+        'fast': {
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',
+            'cache_size': -64000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+        # WAL without durability trade-off
+        'safe': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+        },
+    }
+
+    def __init__(self, **pragmas: Union[str, int]):
+        """
+        :param pragmas: Pragma values by name, see PRAGMAS
+        """
+        for name, val in pragmas.items():
+            if name not in self.PRAGMAS:
+                raise ValueError(f'Unsupported pragma {name}')
+            if not isinstance(val, int) and not re.fullmatch(r'[A-Za-z]+', str(val)):
+                raise ValueError(f'Unexpected value of the pragma {name}: {val}')
+
+        self.pragmas = dict(pragmas)  # type: Dict[str, Union[str, int]]
+
+    @classmethod
+    def get(cls, name: str, **overrides: Union[str, int]) -> 'PragmaProfile':
+        """
+        Return the named profile.
+        :param name: See PROFILES
+        :param overrides: Pragma values replacing the profile's ones
+        :return:
+        """
+        try:
+            pragmas = cls.PROFILES[name]
+        except KeyError:
+            raise ValueError(f'Unknown pragma profile {name}')
+
+        return cls(**{**pragmas, **overrides})
+
+    @classmethod
+    def from_settings(cls, settings: dict, default='balanced') -> 'PragmaProfile':
+        """
+        Return the profile selected by the settings:
+        "db_profile" is the profile's name, "db_pragmas" overrides its values.
+        :param settings: Loaded by the settings provider
+        :param default: Profile name used if the settings do not select one
+        :return:
+        """
+        return cls.get(settings.get('db_profile') or default, **(settings.get('db_pragmas') or dict()))
+
+    def apply(self, con: sqlite3.Connection):
+        """
+        Execute the pragmas on the connection.
+        :param con:
+        :return:
+        """
+        for name, val in self.pragmas.items():
+            con.execute(f'PRAGMA {name} = {val}').fetchall()
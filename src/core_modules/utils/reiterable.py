@@ -0,0 +1,16 @@
+from typing import Callable, Iterator
+
+
+class Reiterable:
+    """
+    Iterable restarted by each iteration, e.g. the streamed tasks sent to several observers:
+    every consumer gets its own iterator from the factory, nothing is buffered.
+    """
+    def __init__(self, factory: Callable[[], Iterator]):
+        """
+        :param factory: Callable returning a fresh iterator, e.g. lambda: Task.iterate(params, schema)
+        """
+        self._factory = factory
+
+    def __iter__(self) -> Iterator:
+        return iter(self._factory())
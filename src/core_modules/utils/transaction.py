@@ -0,0 +1,72 @@
+import sqlite3
+
+
+from src.core_modules.utils.connection import Connection
+from src.core_modules.utils.identity_map import IdentityMap
+
+
+class Transaction:
+    """
+    Unit of work context.
+    Every statement executed through 'Connection' by the current thread inside the context
+    belongs to one sqlite3 transaction committed on exit.
+    Nested contexts are mapped to savepoints.
+    The instances hydrated or saved inside the context are shared via its identity map.
+    """
+    def __init__(self, db_path: str):
+        self._db_path = db_path
+
+        self._con = None  # type: sqlite3.Connection
+        self._savepoint = None  # savepoint name of a nested transaction
+
+        self.identity_map = None  # type: IdentityMap
+
+    @property
+    def con(self) -> sqlite3.Connection:
+        return self._con
+
+    @property
+    def nested(self) -> bool:
+        return self._savepoint is not None
+
+    def __enter__(self):
+        stack = Connection.get_transactions(self._db_path)
+
+        if stack:
+            self._con = stack[-1].con
+            self.identity_map = stack[-1].identity_map
+            self._savepoint = f'sp_{len(stack)}'
+            self._con.execute(f'SAVEPOINT "{self._savepoint}"')
+            self.identity_map.begin()
+        else:
+            self._con = Connection.get_pool(self._db_path).acquire()
+            self._con.execute('BEGIN')
+            self.identity_map = IdentityMap()
+            self.identity_map.begin()
+
+        stack.append(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        stack = Connection.get_transactions(self._db_path)
+        stack.pop()
+
+        try:
+            if self.nested:
+                self.identity_map.end(exc_type is not None)  # evict and expire the rolled back instances
+                if exc_type is not None:
+                    self._con.execute(f'ROLLBACK TO "{self._savepoint}"')
+                self._con.execute(f'RELEASE "{self._savepoint}"')
+            elif exc_type is None:
+                self._con.commit()
+                self.identity_map.end()
+            else:
+                self._con.rollback()
+                self.identity_map.end(True)
+                self.identity_map.clear()  # the instances do not match the database anymore
+        finally:
+            if not self.nested:
+                Connection.get_pool(self._db_path).release(self._con, validate=isinstance(exc_val, sqlite3.Error))
+            self._con = None
+            self.identity_map = None
@@ -0,0 +1,42 @@
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.utils import Connection, Reiterable
+
+from src.affaire.exceptions import UndefinedValueException
+from src.affaire.models import Task
+
+
+class TestTaskModel(unittest.TestCase):
+    DB_PATH = './test.db'
+    SCHEMA = {'-q': {'aliases': ['--search'], 'field': 'body', 'match': True}}
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+        Task.create_table()
+
+        for body in ('buy some milk', 'walk the dog'):
+            task = Task()
+            task.body = body
+            task.save()
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def test_search(self):
+        self.assertEqual(['walk the dog'], [task.body for task in Task.select({'-q': 'dog'}, self.SCHEMA)])
+        self.assertEqual(1, Task.count({'--search': 'milk'}, self.SCHEMA))
+
+    def test_empty_search(self):
+        for val in (None, '', '  '):
+            self.assertRaises(UndefinedValueException, Task.select, {'-q': val}, self.SCHEMA)
+
+    def test_iterate_per_consumer(self):
+        tasks = Reiterable(lambda: Task.iterate(fields=Task.LISTED_FIELDS))
+        first, second = [task.body for task in tasks], [task.body for task in tasks]  # e.g. two observers
+        self.assertEqual(['buy some milk', 'walk the dog'], first)
+        self.assertEqual(first, second)
@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.utils import Connection
+
+from src.affaire.exceptions import UndefinedValueException
+from src.affaire.models import Task
+from src.affaire.utils.task_transfer import FIELDS, get_format, get_workers, parse_chunk, to_row, TaskImporter, TaskExporter
+
+
+class TestTaskTransfer(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_TASKS = 30
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+        Task.create_table()
+
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def _clear(self):
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('DELETE FROM "task"')
+
+    def _rows(self) -> list:
+        return QueryBuilder(Task).values_list(*FIELDS).order(Task.get_pk_col().name).build().execute().res
+
+    def test_get_format(self):
+        self.assertEqual('jsonl', get_format('tasks.json'))
+        self.assertEqual('jsonl', get_format('tasks'))
+        self.assertEqual('csv', get_format('tasks.txt', 'CSV'))
+        self.assertRaises(UndefinedValueException, get_format, 'tasks.xml')
+
+    def test_get_workers(self):
+        with mock.patch('os.cpu_count', return_value=4):
+            self.assertEqual(4, get_workers())
+            self.assertEqual(2, get_workers(2))
+            self.assertEqual(4, get_workers(16))
+
+    def test_to_row(self):
+        row = to_row({'body': 'lorem', 'created_at': '2024-01-02 03:04:05', 'is_active': 'false'})
+        self.assertEqual(('lorem', '2024-01-02 03:04:05', '2024-01-02 03:04:05', None, 0), row)
+        self.assertEqual(1, to_row({'body': 'lorem', 'is_active': ''})[-1])
+        self.assertEqual('2024-05-06 00:00:00', to_row({'body': 'lorem', 'expires_at': '2024-05-06'})[3])
+
+        for record in ({}, {'body': ' '}, {'body': 1},
+                       {'body': 'lorem', 'created_at': 'yesterday'},
+                       {'body': 'lorem', 'is_active': 'maybe'}):
+            self.assertRaises(ValueError, to_row, record)
+
+    def test_parse_chunk(self):
+        lines = [json.dumps({'body': 'lorem'}), '\n', '{"body": ', json.dumps({'body': ''}), '[1]']
+        rows, errors = parse_chunk('jsonl', lines)
+        self.assertEqual(['lorem'], [row[0] for row in rows])
+        self.assertEqual(3, errors)
+
+        rows, errors = parse_chunk('csv', [{'body': 'ipsum', 'is_active': '0'}, {'body': None}])
+        self.assertEqual([('ipsum', 0)], [(row[0], row[-1]) for row in rows])
+        self.assertEqual(1, errors)
+
+    def test_round_trip(self):
+        src_path = self._path('tasks.jsonl')
+        with open(src_path, 'w', encoding='utf-8') as f:
+            for i in range(self.NUM_OF_TASKS):
+                record = {'body': f'Task {i}', 'created_at': f'2024-01-01 00:00:{i:02}', 'is_active': i % 2}
+                f.write(json.dumps(record) + '\n')
+            f.write('not a record\n')
+
+        for workers in (1, 2):
+            # the workers are capped by the CPU count
+            with self.subTest(workers=workers), mock.patch('os.cpu_count', return_value=workers):
+                self._clear()
+
+                report = TaskImporter(src_path, workers=workers, chunk_size=7).run()
+                self.assertEqual((self.NUM_OF_TASKS, 1), (report['count'], report['errors']))
+                rows = self._rows()
+
+                for fmt in ('jsonl', 'csv'):
+                    out_path = self._path(f'out_{workers}.{fmt}')
+                    report = TaskExporter(out_path, workers=workers, partition_size=10).run()
+                    self.assertEqual(self.NUM_OF_TASKS, report['count'])
+
+                    self._clear()
+                    report = TaskImporter(out_path, workers=workers).run()
+                    self.assertEqual((self.NUM_OF_TASKS, 0), (report['count'], report['errors']))
+                    self.assertEqual(rows, self._rows())
+
+    def test_export_empty(self):
+        path = self._path('empty.csv')
+        self.assertEqual(0, TaskExporter(path, workers=2).run()['count'])
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(','.join(FIELDS), f.read().strip())
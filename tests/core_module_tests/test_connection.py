@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+
+from src.core_modules.utils import Connection, ConnectionPool, PragmaProfile, Transaction
+
+
+class TestConnection(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        for path in (self.DB_PATH, self.DB_PATH + '-wal', self.DB_PATH + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_reuse_connection(self):
+        with Connection(self.DB_PATH) as cur:
+            first_con = cur.connection
+            cur.execute('CREATE TABLE "lorem" ("ipsum" TEXT)')
+        with Connection(self.DB_PATH) as cur:
+            self.assertIs(first_con, cur.connection)
+            cur.execute('INSERT INTO "lorem" VALUES (?)', ('dolor', ))
+
+        con = sqlite3.connect(self.DB_PATH)
+        self.assertEqual(1, len(con.execute('SELECT * FROM "lorem"').fetchall()))
+        con.close()
+
+    def test_pool_size(self):
+        Connection.configure(self.DB_PATH, 1)
+        outer = Connection(self.DB_PATH)
+        inner = Connection(self.DB_PATH)
+        outer_cur = outer.__enter__()
+        inner_cur = inner.__enter__()
+        self.assertIsNot(outer_cur.connection, inner_cur.connection)
+        inner.__exit__(None, None, None)
+        outer.__exit__(None, None, None)
+
+        pool = Connection.get_pool(self.DB_PATH)
+        self.assertEqual(1, len(pool._idle))
+
+    def test_health_check(self):
+        Connection.get_pool(self.DB_PATH).validate_after = 0
+        with Connection(self.DB_PATH) as cur:
+            con = cur.connection
+        con.close()  # broken idle connection
+        with Connection(self.DB_PATH) as cur:
+            self.assertIsNot(con, cur.connection)
+            cur.execute('SELECT 1')
+
+    def test_validate_after(self):
+        pool = Connection.get_pool(self.DB_PATH)
+        pool.validate_after = 60
+        with Connection(self.DB_PATH) as cur:
+            con = cur.connection
+        with mock.patch.object(ConnectionPool, '_is_healthy', return_value=True) as is_healthy, \
+                mock.patch.object(ConnectionPool, '_get_file_id', return_value=pool._file_id) as get_file_id:
+            for _ in range(3):
+                with Connection(self.DB_PATH) as cur:
+                    self.assertIs(con, cur.connection)
+            self.assertFalse(is_healthy.called)  # recently released: not validated
+            self.assertFalse(get_file_id.called)
+
+            pool.validate_after = 0
+            with Connection(self.DB_PATH) as cur:
+                self.assertIs(con, cur.connection)
+            self.assertEqual(1, is_healthy.call_count)
+            self.assertEqual(1, get_file_id.call_count)
+
+    def test_validate_on_error(self):
+        with Connection(self.DB_PATH) as cur:
+            con = cur.connection
+        with self.assertRaises(sqlite3.OperationalError):
+            with Connection(self.DB_PATH) as cur:
+                cur.execute('SELECT * FROM "lorem"')
+        with Connection(self.DB_PATH) as cur:
+            self.assertIs(con, cur.connection)  # still healthy: kept
+
+        with mock.patch.object(ConnectionPool, '_is_healthy', return_value=False):
+            with self.assertRaises(sqlite3.DatabaseError):
+                with Connection(self.DB_PATH):
+                    raise sqlite3.DatabaseError('database disk image is malformed')
+        self.assertRaises(sqlite3.ProgrammingError, con.execute, 'SELECT 1')  # broken: closed
+        with Connection(self.DB_PATH) as cur:
+            self.assertIsNot(con, cur.connection)
+
+    def test_removed_database(self):
+        Connection.get_pool(self.DB_PATH).validate_after = 0
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('CREATE TABLE "lorem" ("ipsum" TEXT)')
+        os.remove(self.DB_PATH)
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('SELECT name FROM sqlite_master WHERE type="table"')
+            self.assertFalse(cur.fetchall())
+
+    def test_close_all(self):
+        with Connection(self.DB_PATH) as cur:
+            con = cur.connection
+        Connection.close_all()
+        self.assertRaises(sqlite3.ProgrammingError, con.execute, 'SELECT 1')
+
+    def test_pragma_profile(self):
+        Connection.configure(self.DB_PATH, profile=PragmaProfile.get('balanced', cache_size=-4000))
+        with Connection(self.DB_PATH) as cur:
+            self.assertEqual('wal', cur.execute('PRAGMA journal_mode').fetchone()[0])
+            self.assertEqual(1, cur.execute('PRAGMA synchronous').fetchone()[0])  # NORMAL
+            self.assertEqual(-4000, cur.execute('PRAGMA cache_size').fetchone()[0])
+            self.assertEqual(5000, cur.execute('PRAGMA busy_timeout').fetchone()[0])
+
+    def test_pragma_profile_reconfigure(self):
+        with Connection(self.DB_PATH) as cur:
+            con = cur.connection
+        Connection.configure(self.DB_PATH, profile=PragmaProfile.get('fast'))
+        with Connection(self.DB_PATH) as cur:
+            self.assertIsNot(con, cur.connection)  # opened with the previous profile
+            self.assertEqual(0, cur.execute('PRAGMA synchronous').fetchone()[0])
+
+    def test_pragma_profile_from_settings(self):
+        profile = PragmaProfile.from_settings({'db_profile': 'safe', 'db_pragmas': {'busy_timeout': 100}})
+        self.assertEqual('FULL', profile.pragmas['synchronous'])
+        self.assertEqual(100, profile.pragmas['busy_timeout'])
+        self.assertEqual(PragmaProfile.PROFILES['balanced'], PragmaProfile.from_settings(dict()).pragmas)
+
+        self.assertRaises(ValueError, PragmaProfile.get, 'lorem')
+        self.assertRaises(ValueError, PragmaProfile, user_version=1)
+        self.assertRaises(ValueError, PragmaProfile, journal_mode='WAL; DROP TABLE "lorem"')
+
+    def test_read_only(self):
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('CREATE TABLE "lorem" ("ipsum" TEXT)')
+            cur.execute('INSERT INTO "lorem" VALUES (?)', ('dolor', ))
+            writer = cur.connection
+        with Connection(self.DB_PATH, read_only=True) as cur:
+            self.assertIsNot(writer, cur.connection)
+            self.assertEqual([('dolor', )], cur.execute('SELECT * FROM "lorem"').fetchall())
+            self.assertEqual(1, cur.execute('PRAGMA query_only').fetchone()[0])
+            self.assertEqual(ConnectionPool.MMAP_SIZE, cur.execute('PRAGMA mmap_size').fetchone()[0])
+            self.assertRaises(sqlite3.OperationalError, cur.execute, 'INSERT INTO "lorem" VALUES (?)', ('sit', ))
+
+    def test_read_only_wal(self):
+        Connection.configure(self.DB_PATH, profile=PragmaProfile.get('balanced'))
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('CREATE TABLE "lorem" ("ipsum" TEXT)')
+        with Connection(self.DB_PATH, read_only=True) as reader:
+            with Connection(self.DB_PATH) as writer:
+                writer.execute('INSERT INTO "lorem" VALUES (?)', ('dolor', ))
+            self.assertEqual('wal', reader.execute('PRAGMA journal_mode').fetchone()[0])
+            self.assertEqual(1, len(reader.execute('SELECT * FROM "lorem"').fetchall()))
+
+    def test_read_only_transaction(self):
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('CREATE TABLE "lorem" ("ipsum" TEXT)')
+        with Transaction(self.DB_PATH) as transaction:
+            with Connection(self.DB_PATH) as cur:
+                cur.execute('INSERT INTO "lorem" VALUES (?)', ('dolor', ))
+            with Connection(self.DB_PATH, read_only=True) as cur:
+                self.assertIs(transaction.con, cur.connection)  # the uncommitted changes are visible
+                self.assertEqual(1, len(cur.execute('SELECT * FROM "lorem"').fetchall()))
+
+    def test_read_only_missing_database(self):
+        with Connection(self.DB_PATH, read_only=True) as cur:
+            cur.execute('SELECT name FROM sqlite_master WHERE type="table"')
+            self.assertFalse(cur.fetchall())
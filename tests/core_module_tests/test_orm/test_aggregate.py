@@ -0,0 +1,89 @@
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import Count, Sum, Min, Max, Avg
+from src.core_modules.ORM.exceptions import SQLSyntaxError
+from src.core_modules.utils import Connection
+
+
+class TestAggregate(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    ITEMS = (('fruit', 1.5), ('fruit', 2.5), ('fruit', None), ('vegetable', 4.0), ('bread', 1.0))
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Item(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            kind = ft.TextField()
+            price = ft.RealField(not_null=False)
+
+        QueryBuilder(Item).create_table(True).build().execute()
+
+        instances = list()
+        for kind, price in self.ITEMS:
+            inst = Item()
+            inst.kind = kind
+            inst.price = price
+            instances.append(inst)
+        Item.save_all(instances)
+
+        self.item = Item
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def test_count(self):
+        qb = QueryBuilder(self.item).count().build()
+        self.assertEqual('SELECT COUNT(*) AS "count" FROM "item"', qb.sql.strip())
+        self.assertEqual(len(self.ITEMS), qb.execute().res)
+
+        qb = QueryBuilder(self.item).count().where('kind', QueryBuilder.EQUALS, 'fruit').build()
+        self.assertEqual(3, qb.execute().res)
+
+        self.assertEqual(4, QueryBuilder(self.item).count('price').build().execute().res)
+        self.assertEqual(3, QueryBuilder(self.item).count('kind', distinct=True).build().execute().res)
+
+    def test_exists(self):
+        qb = QueryBuilder(self.item).exists().where('kind', QueryBuilder.EQUALS, 'bread').build()
+        self.assertTrue(qb.sql.startswith('SELECT EXISTS'))
+        self.assertIs(True, qb.execute().res)
+
+        qb = QueryBuilder(self.item).exists().where('kind', QueryBuilder.EQUALS, 'meat').build()
+        self.assertIs(False, qb.execute().res)
+
+    def test_aggregate(self):
+        res = QueryBuilder(self.item)\
+            .aggregate(Min('price'), Max(self.item.price), Sum('price'), avg=Avg('price'))\
+            .build().execute().res
+        self.assertEqual({'min_price': 1.0, 'max_price': 4.0, 'sum_price': 9.0, 'avg': 2.25}, res)
+
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.item).aggregate)
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.item).aggregate, Sum('lorem'))
+
+    def test_group_by(self):
+        qb = QueryBuilder(self.item)\
+            .aggregate(Count(), total=Sum('price'))\
+            .where('price', QueryBuilder.GREATER, 1)\
+            .group_by('kind')\
+            .order('kind')\
+            .build()
+        self.assertEqual(
+            [{'kind': 'fruit', 'count': 2, 'total': 4.0}, {'kind': 'vegetable', 'count': 1, 'total': 4.0}],
+            qb.execute().res
+        )
+
+        qb = QueryBuilder(self.item).aggregate(Count()).group_by('kind').having('count', QueryBuilder.GREATER, 1)
+        self.assertEqual([{'kind': 'fruit', 'count': 3}], qb.build().execute().res)
+
+        qb = QueryBuilder(self.item).aggregate(Count()).group_by('kind').having(Max('price'), QueryBuilder.LESS, 2)
+        self.assertEqual([{'kind': 'bread', 'count': 1}], qb.build().execute().res)
+
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.item).select().group_by, 'kind')
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import AsyncQueryBuilder
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.utils import Connection, DBExecutor
+
+
+class TestAsync(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Note(AbstractModel):
+            body = ft.TextField()
+
+        self.note = Note
+        self.note.create_table()
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        if os.path.exists(self.DB_PATH):
+            os.remove(self.DB_PATH)
+
+    def test_save_select_delete(self):
+        async def scenario():
+            notes = [self.note() for _ in range(10)]
+            for i, note in enumerate(notes):
+                note.body = f'Note {i}'
+            await asyncio.gather(*(note.asave() for note in notes))
+            self.assertTrue(all(note.pk is not None for note in notes))
+
+            qb = AsyncQueryBuilder(self.note).select().where('body', AsyncQueryBuilder.EQUALS, 'Note 3').build()
+            rows = (await qb.execute()).res
+            self.assertEqual(1, len(rows))
+
+            await notes[3].adelete()
+            rows = await AsyncQueryBuilder(self.note).select().build().fetch()
+            self.assertEqual(9, len(rows))
+
+            new_notes = [self.note() for _ in range(5)]
+            for note in new_notes:
+                note.body = 'New note'
+            pks = await self.note.asave_all(new_notes)
+            self.assertEqual(5, len(pks))
+
+        asyncio.run(scenario())
+
+    def test_executor_thread(self):
+        threads = set()
+
+        async def scenario():
+            executor = self.note.get_executor()
+            self.assertIs(executor, DBExecutor.get(self.DB_PATH))
+            await asyncio.gather(*(executor.run(lambda: threads.add(threading.current_thread())) for _ in range(10)))
+
+        asyncio.run(scenario())
+        self.assertEqual(1, len(threads))  # connection affinity
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_bounded_queue(self):
+        executor = DBExecutor(max_size=2)
+        gate = threading.Event()
+        executor.submit(gate.wait)  # occupies the thread
+
+        async def scenario():
+            tasks = [asyncio.ensure_future(executor.run(lambda i=i: i)) for i in range(5)]
+            await asyncio.sleep(0.05)
+            self.assertFalse(any(task.done() for task in tasks))
+            gate.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(list(range(5)), sorted(asyncio.run(scenario())))
+        executor.shutdown()
+
+    def test_exception(self):
+        async def scenario():
+            with self.assertRaises(ZeroDivisionError):
+                await self.note.get_executor().run(lambda: 1 / 0)
+
+        asyncio.run(scenario())
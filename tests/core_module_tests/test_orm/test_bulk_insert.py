@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM.exceptions import UndefinedFieldException
+from src.core_modules.utils import Connection
+
+
+class TestBulkInsert(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_ROWS = 1234
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Scalar(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            txt = ft.TextField()
+
+        class Complex(AbstractModel):
+            name = ft.TextField(primary_key=True)
+            ref = ft.ForeignKey(Scalar, not_null=False)
+
+        QueryBuilder(Scalar).create_table(True).build().execute()
+        QueryBuilder(Complex).create_table(True).build().execute()
+
+        self.scalar_model = Scalar
+        self.complex_model = Complex
+
+        self.con = sqlite3.connect(AbstractModel.DB_PATH)
+
+    def tearDown(self) -> None:
+        self.con.close()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def make_scalars(self, num: int):
+        for i in range(num):
+            inst = self.scalar_model()
+            inst.txt = f'txt {i}'
+            yield inst
+
+    def test_bulk_insert(self):
+        qb = QueryBuilder(self.scalar_model).bulk_insert(self.make_scalars(self.NUM_OF_ROWS), 100).build()
+        self.assertEqual(1, qb.sql.count('INSERT'))
+        qb.execute()
+        self.assertEqual(list(range(1, self.NUM_OF_ROWS + 1)), qb.last_ids)
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "id", "txt" FROM "scalar" ORDER BY "id"')
+        rows = cur.fetchall()
+        self.assertEqual(self.NUM_OF_ROWS, len(rows))
+        self.assertEqual((1, 'txt 0'), rows[0])
+        cur.close()
+
+    def test_insert_rows(self):
+        rows = ((f'txt {i}', ) for i in range(self.NUM_OF_ROWS))
+        qb = QueryBuilder(self.scalar_model).insert_rows(['txt'], rows, 100).build().execute()
+        self.assertEqual(list(range(1, self.NUM_OF_ROWS + 1)), qb.last_ids)
+
+        qb = QueryBuilder(self.complex_model).insert_rows(['name', 'ref'], [('first', 1), ('second', None)]).build()
+        self.assertEqual(['first', 'second'], qb.execute().last_ids)
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "id", "txt" FROM "scalar" ORDER BY "id" DESC')
+        self.assertEqual((self.NUM_OF_ROWS, f'txt {self.NUM_OF_ROWS - 1}'), cur.fetchone())
+        cur.execute('SELECT * FROM "complex" ORDER BY "name"')
+        self.assertEqual([('first', 1), ('second', None)], cur.fetchall())
+        cur.close()
+
+    def test_save_all(self):
+        instances = list(self.make_scalars(10))
+        pks = self.scalar_model.save_all(instances)
+        self.assertEqual(10, len(pks))
+        for inst, pk in zip(instances, pks):
+            self.assertEqual(pk, inst.pk)
+            self.assertEqual(pk, inst.id)
+
+        # the rows are appended after the existing ones
+        pks = self.scalar_model.save_all(self.make_scalars(5))
+        self.assertEqual(list(range(11, 16)), pks)
+
+    def test_save_all_related(self):
+        instances = list()
+        for scalar in self.make_scalars(3):
+            inst = self.complex_model()
+            inst.name = scalar.txt
+            inst.ref = scalar
+            instances.append(inst)
+
+        pks = self.complex_model.save_all(instances)
+        self.assertEqual(['txt 0', 'txt 1', 'txt 2'], pks)
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "name", "scalar_id" FROM "complex"')
+        self.assertEqual([('txt 0', 1), ('txt 1', 2), ('txt 2', 3)], cur.fetchall())
+        cur.close()
+
+    def test_rollback_on_error(self):
+        instances = list(self.make_scalars(3))
+        instances[-1].txt = None
+        self.assertRaises(UndefinedFieldException, self.scalar_model.save_all, instances, True, 2)
+
+        cur = self.con.cursor()
+        cur.execute('SELECT COUNT(*) FROM "scalar"')
+        self.assertEqual(0, cur.fetchone()[0])
+        cur.close()
@@ -0,0 +1,156 @@
+import gc
+import os
+import sqlite3
+import tracemalloc
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
+
+
+class TestCompactModel(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_NOTES = 3
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Folder(AbstractModel, compact=True):
+            title = ft.TextField()
+
+        class Note(AbstractModel, compact=True):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            body = ft.TextField()
+            attachment = ft.BlobField(not_null=False)
+            folder = ft.ForeignKey(Folder, reversed_by='notes', not_null=False)
+
+        QueryBuilder(Folder).create_table(True).build().execute()
+        QueryBuilder(Note).create_table(True).build().execute()
+
+        folder = Folder()
+        folder.title = 'inbox'
+        for i in range(self.NUM_OF_NOTES):
+            note = Note()
+            note.body = f'note {i}'
+            note.folder = folder
+            note.save()
+
+        self.folder = Folder
+        self.note = Note
+
+        self.con = sqlite3.connect(AbstractModel.DB_PATH)
+
+    def tearDown(self) -> None:
+        self.con.close()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def select_notes(self, qb: QueryBuilder = None) -> list:
+        qb = (qb or QueryBuilder(self.note).select()).build().execute()
+        return ModelFactory(self.note, qb.res).only(*qb.cols).to_list()
+
+    def test_slots(self):
+        note = self.note()
+        self.assertFalse(hasattr(note, '__dict__'))
+        self.assertRaises(AttributeError, setattr, note, 'lorem', 'ipsum')
+        self.assertIn('_col_body', self.note.__slots__)
+
+        # the empty value is the field itself
+        self.assertIs(self.note.body, note.body)
+        note.body = 'lorem'
+        self.assertEqual('lorem', note.body)
+
+        # the synthetic primary key is stored in a slot too
+        self.assertEqual('id', self.folder.get_pk_col().name)
+        self.assertIn('_col_id', self.folder.__slots__)
+
+    def test_hydration(self):
+        notes = self.select_notes()
+        self.assertEqual(self.NUM_OF_NOTES, len(notes))
+        for i, note in enumerate(notes):
+            self.assertEqual(i + 1, note.pk)
+            self.assertEqual(f'note {i}', note.body)
+            self.assertFalse(note.is_dirty())
+            self.assertEqual('inbox', note.folder.title)
+        self.assertIs(notes[0].folder, notes[1].folder)
+
+        notes[0].body = 'updated'
+        notes[0].save()
+        cur = self.con.cursor()
+        cur.execute('SELECT "body" FROM "note" WHERE "id" = 1')
+        self.assertEqual('updated', cur.fetchone()[0])
+        cur.close()
+
+    def test_deferred(self):
+        note = self.select_notes(QueryBuilder(self.note).defer('body'))[0]
+        self.assertEqual({'body'}, note._deferred)
+        self.assertEqual('note 0', note.body)
+
+    def test_prefetch(self):
+        qb = QueryBuilder(self.folder).select().prefetch('notes').build().execute()
+        folder = ModelFactory(self.folder, qb.res).append_prefetches(*qb.prefetches).to_list()[0]
+        self.assertEqual(self.NUM_OF_NOTES, len(folder.notes))
+        self.assertRaises(AttributeError, getattr, folder, 'lorem')
+
+    def test_from_row(self):
+        note = self.note.from_row(self.note.get_cols(), (42, 'lorem', None, 1))
+        self.assertEqual(42, note.pk)
+        self.assertEqual('lorem', note.body)
+        self.assertIsNone(note.attachment)
+        self.assertEqual(1, self.note.folder.get_raw(note))
+        self.assertFalse(note.is_dirty())
+        self.assertIsInstance(note._snapshot, tuple)
+
+    def test_snapshot_is_row(self):
+        row = (42, 'lorem', None, 1)
+        note = self.note.from_row(self.note.get_cols(), row)
+        self.assertIs(row, note._snapshot)  # not copied
+        note.body = 'ipsum'
+        self.assertEqual({'body'}, note.get_changes())
+
+        cols = [col for col in self.note.get_cols() if 'attachment' != col.name]
+        note = self.note.from_row(cols, (42, 'lorem', 1), {'attachment'})
+        self.assertFalse(note.is_dirty())
+        self.assertEqual(set(), note.get_changes())
+
+    def test_memory(self):
+        class CompactRow(AbstractModel, compact=True):
+            body = ft.TextField()
+            attachment = ft.BlobField(not_null=False)
+            rank = ft.IntegerField(not_null=False)
+
+        class PlainRow(AbstractModel):  # same columns, not compact
+            body = ft.TextField()
+            attachment = ft.BlobField(not_null=False)
+            rank = ft.IntegerField(not_null=False)
+
+        rows = [(i, f'note {i}', None, i) for i in range(10000)]
+
+        def allocated(hydrate) -> int:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                instances = hydrate()
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            self.assertEqual(len(rows), len(instances))
+            return size
+
+        def hydrate_dicts():  # the values in '__dict__', without snapshot
+            names = [col.name for col in PlainRow.get_cols()]
+            instances = list()
+            for row in rows:
+                inst = PlainRow.__new__(PlainRow)
+                inst.__dict__.update(zip(names, row))
+                instances.append(inst)
+            return instances
+
+        compact = allocated(lambda: ModelFactory(CompactRow, rows).to_list())
+        self.assertLess(compact, allocated(lambda: ModelFactory(PlainRow, rows).to_list()))
+        self.assertLess(compact, allocated(hydrate_dicts))  # the snapshot is the fetched row
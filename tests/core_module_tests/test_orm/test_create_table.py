@@ -7,6 +7,8 @@ import itertools
 from src.core_modules.ORM import AbstractModel
 from src.core_modules.ORM import field_types as ft
 from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import Index
+from src.core_modules.utils import Connection
 
 
 class TestCreateTable(unittest.TestCase):
@@ -20,6 +22,7 @@ class TestCreateTable(unittest.TestCase):
 
     def tearDown(self) -> None:
         self.con.close()
+        Connection.close_all()  # the pooled connections of the removed file
         os.remove(self.DB_PATH)
         AbstractModel.DB_PATH = None
 
@@ -67,3 +70,22 @@ class TestCreateTable(unittest.TestCase):
 
         self.assertIn('model', tables)
         self.assertIn('ref', tables)
+
+    def test_create_index(self):
+        class Indexed(AbstractModel):
+            lorem = ft.IntegerField(index=True)
+            ipsum = ft.TextField()
+
+            by_lorem_ipsum = Index('lorem', 'ipsum', unique=True)
+
+        qb = QueryBuilder(Indexed)
+        qb.create_table(True).build()
+        sql = qb.sql
+        self.assertEqual(3, sql.count('CREATE'))
+        self.assertEqual(1, sql.count('CREATE UNIQUE INDEX'))
+        self.assertIn('"indexed_lorem_idx"', sql)
+        qb.execute()
+
+        indexes = QueryBuilder(Indexed).index_list()
+        self.assertEqual(['lorem'], indexes['indexed_lorem_idx'])
+        self.assertEqual(['lorem', 'ipsum'], indexes['indexed_lorem_ipsum_idx'])
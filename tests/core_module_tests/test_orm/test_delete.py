@@ -6,6 +6,7 @@ import unittest
 from src.core_modules.ORM import AbstractModel
 from src.core_modules.ORM import field_types as ft
 from src.core_modules.ORM import QueryBuilder
+from src.core_modules.utils import Connection
 
 
 class TestDelete(unittest.TestCase):
@@ -46,6 +47,7 @@ class TestDelete(unittest.TestCase):
 
     def tearDown(self) -> None:
         self.con.close()
+        Connection.close_all()  # the pooled connections of the removed file
         AbstractModel.DB_PATH = None
         os.remove(self.DB_PATH)
 
@@ -95,3 +97,22 @@ class TestDelete(unittest.TestCase):
             self.assertIsNone(row)
 
         cur.close()
+
+    def test_delete_where(self):
+        cur = self.con.cursor()
+        for txt in ('lorem', 'ipsum', 'lorem'):
+            inst = self.scalar_model()
+            inst.txt = txt
+            QueryBuilder(self.scalar_model).insert(inst).build().execute()
+
+        qb = QueryBuilder(self.scalar_model).delete_where().where('txt', QueryBuilder.EQUALS, 'lorem').build()
+        sql = qb.sql
+        self.assertIn('DELETE', sql)
+        self.assertIn('WHERE', sql)
+        self.assertEqual(['lorem'], qb.params)
+        self.assertEqual(2, qb.execute().row_count)
+
+        cur.execute('SELECT "txt" FROM "scalar" ORDER BY "id"')
+        self.assertEqual([('test_delete', ), ('ipsum', )], cur.fetchall())
+
+        cur.close()
@@ -0,0 +1,108 @@
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM.exceptions import SQLSyntaxError
+from src.core_modules.utils import Connection
+
+
+class TestFullTextSearch(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    BODIES = ('buy some milk', 'walk the dog', 'milk the cow, milk the goat', 'read a book')
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Note(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            body = ft.FTSField()
+            tag = ft.TextField(not_null=False)
+
+        QueryBuilder(Note).create_table(True).build().execute()
+
+        for body in self.BODIES:
+            inst = Note()
+            inst.body = body
+            inst.save()
+
+        self.note = Note
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def search(self, query: str, rank=False) -> list:
+        qb = QueryBuilder(self.note).select().match(query, rank).build().execute()
+        return [row[1] for row in qb.res]
+
+    def test_create_table(self):
+        qb = QueryBuilder(self.note).create_table(True).build()
+        self.assertIn('USING fts5', qb.sql)
+        self.assertEqual(3, qb.sql.count('CREATE TRIGGER'))
+
+    def test_match(self):
+        self.assertEqual(['buy some milk', 'milk the cow, milk the goat'], self.search('milk'))
+        self.assertEqual(['walk the dog'], self.search('walk dog'))
+        self.assertFalse(self.search('cat'))
+
+    def test_match_or_where(self):
+        qb = QueryBuilder(self.note).select().where('id', '=', 1).or_where('id', '=', 2).match('dog')
+        self.assertEqual(['walk the dog'], [row[1] for row in qb.build().execute().res])
+
+    def test_rank(self):
+        self.assertEqual(['milk the cow, milk the goat', 'buy some milk'], self.search('milk', True))
+
+    def test_triggers(self):
+        inst = self.note()
+        inst.body = 'feed the cat'
+        inst.save()
+        self.assertEqual(['feed the cat'], self.search('cat'))
+
+        inst.body = 'feed the fish'
+        inst.save()
+        self.assertFalse(self.search('cat'))
+        self.assertEqual(['feed the fish'], self.search('fish'))
+
+        inst.delete()
+        self.assertFalse(self.search('fish'))
+
+    def test_update_other_columns(self):
+        with Connection(self.DB_PATH) as cur:
+            cur.execute('SELECT "sql" FROM "sqlite_master" WHERE "name" = ?', (self.note.get_fts_table_name() + '_au', ))
+            self.assertIn('AFTER UPDATE OF "body" ON', cur.fetchone()[0])
+
+        QueryBuilder(self.note).update_where({'tag': 'farm'}).build().execute()
+        self.assertEqual(['walk the dog'], self.search('dog'))
+
+    def test_upgrade_db(self):
+        fts_name = self.note.get_fts_table_name()
+        with Connection(self.DB_PATH) as cur:  # database of a version without full-text search
+            cur.execute(f'DROP TABLE "{fts_name}"')
+            cur.execute(f'DROP TRIGGER "{fts_name}_au"')
+            cur.execute(f'CREATE TRIGGER "{fts_name}_au" AFTER UPDATE ON "note" BEGIN SELECT 1; END')
+
+        self.assertTrue(AbstractModel.upgrade_db(self.DB_PATH, 1))
+        self.assertEqual(['buy some milk', 'milk the cow, milk the goat'], self.search('milk'))
+        self.test_update_other_columns()
+
+    def test_match_with_where(self):
+        QueryBuilder(self.note).update_where({'tag': 'farm'}).match('cow').build().execute()
+        qb = QueryBuilder(self.note).select()\
+            .where('tag', QueryBuilder.EQUALS, 'farm')\
+            .match('milk')\
+            .build().execute()
+        self.assertEqual(1, len(qb.res))
+
+        qb = QueryBuilder(self.note).delete_where().match('milk').build().execute()
+        self.assertEqual(2, qb.row_count)
+
+    def test_no_fts_cols(self):
+        class Plain(AbstractModel):
+            body = ft.TextField()
+
+        self.assertRaises(SQLSyntaxError, QueryBuilder(Plain).select().match, 'lorem')
@@ -0,0 +1,78 @@
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection, IdentityMap
+
+
+class TestIdentityMap(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Scalar(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            txt = ft.TextField()
+
+        QueryBuilder(Scalar).create_table(True).build().execute()
+        for txt in ('lorem', 'ipsum'):
+            inst = Scalar()
+            inst.txt = txt
+            inst.save()
+
+        self.scalar_model = Scalar
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def select(self, identity_map: IdentityMap = None) -> list:
+        qb = QueryBuilder(self.scalar_model).select().build().execute()
+        return ModelFactory(self.scalar_model, qb.res, identity_map).to_list()
+
+    def test_without_session(self):
+        first, second = self.select(), self.select()
+        self.assertIsNot(first[0], second[0])
+
+    def test_explicit_map(self):
+        identity_map = IdentityMap()
+        first = self.select(identity_map)
+        first[0].txt = 'modified'  # not re-hydrated
+        second = self.select(identity_map)
+        self.assertIs(first[0], second[0])
+        self.assertEqual('modified', second[0].txt)
+        self.assertEqual(2, len(identity_map))
+
+    def test_transaction_scope(self):
+        with self.scalar_model.transaction() as transaction:
+            first = self.select()
+            self.assertIs(first[1], self.select()[1])
+
+            inst = self.scalar_model()
+            inst.txt = 'dolor'
+            inst.save()
+            self.assertIn(inst, transaction.identity_map)
+            self.assertIs(inst, self.select()[2])
+
+            inst.delete()
+            self.assertNotIn(inst, transaction.identity_map)
+        self.assertIsNot(first[0], self.select()[0])
+
+    def test_refresh(self):
+        with self.scalar_model.transaction():
+            first, second = self.select()
+            second.txt = 'modified'  # not saved
+            QueryBuilder(self.scalar_model).update_where({'txt': 'updated'}).build().execute()
+
+            refreshed = self.select()
+            self.assertIs(first, refreshed[0])
+            self.assertEqual('updated', first.txt)
+            self.assertFalse(first.is_dirty())
+            self.assertIs(second, refreshed[1])
+            self.assertEqual('modified', second.txt)  # the changes are kept
@@ -8,6 +8,7 @@ from src.core_modules.ORM import field_types as ft
 from src.core_modules.ORM import QueryBuilder
 from src.core_modules.ORM.exceptions import UndefinedFieldException
 from src.core_modules.ORM.exceptions import EmptyQueryException
+from src.core_modules.utils import Connection
 
 
 class TestInsert(unittest.TestCase):
@@ -35,6 +36,7 @@ class TestInsert(unittest.TestCase):
 
     def tearDown(self) -> None:
         self.con.close()
+        Connection.close_all()  # the pooled connections of the removed file
         os.remove(self.DB_PATH)
         AbstractModel.DB_PATH = None
 
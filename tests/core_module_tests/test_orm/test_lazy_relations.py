@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
+
+
+class TestLazyRelations(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_OWNERS = 3
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Owner(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            name = ft.TextField()
+
+        class Pet(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            name = ft.TextField()
+            owner = ft.ForeignKey(Owner, not_null=False)
+
+        QueryBuilder(Owner).create_table(True).build().execute()
+        QueryBuilder(Pet).create_table(True).build().execute()
+
+        for i in range(self.NUM_OF_OWNERS):
+            owner = Owner()
+            owner.name = f'owner {i}'
+            for j in range(2):
+                pet = Pet()
+                pet.name = f'pet {i}.{j}'
+                pet.owner = owner
+                pet.save()
+
+        self.owner = Owner
+        self.pet = Pet
+
+        self.con = sqlite3.connect(AbstractModel.DB_PATH)
+
+    def tearDown(self) -> None:
+        self.con.close()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def select_pets(self) -> list:
+        qb = QueryBuilder(self.pet).select().build().execute()
+        return ModelFactory(self.pet, qb.res).to_list()
+
+    def test_lazy_load(self):
+        pets = self.select_pets()
+        self.assertEqual(self.NUM_OF_OWNERS * 2, len(pets))
+        for pet in pets:
+            self.assertNotIsInstance(self.pet.owner.get_raw(pet), AbstractModel)  # not loaded yet
+
+        owner = pets[0].owner
+        self.assertIsInstance(owner, self.owner)
+        self.assertEqual('owner 0', owner.name)
+
+        # the siblings have been loaded with the first access
+        for pet in pets:
+            self.assertIsInstance(self.pet.owner.get_raw(pet), self.owner)
+        self.assertIs(pets[0].owner, pets[1].owner)
+        self.assertIsNot(pets[0].owner, pets[2].owner)
+
+    def test_dangling_reference(self):
+        self.con.execute('PRAGMA foreign_keys = OFF')
+        self.con.execute('UPDATE "pet" SET "owner_id" = 42 WHERE "id" = 1')
+        self.con.commit()
+
+        pets = self.select_pets()
+        self.assertEqual(42, pets[0].owner)
+        self.assertIsInstance(pets[1].owner, self.owner)
+
+    def test_dirty(self):
+        pet = self.select_pets()[0]
+        self.assertFalse(pet.is_dirty())
+        pet.name = 'lorem'
+        self.assertTrue(pet.is_dirty())
+        pet.save()
+        self.assertFalse(pet.is_dirty())
+
+        pet.owner = self.select_pets()[2].owner
+        self.assertTrue(pet.is_dirty())
+
+    def test_clean_refs_are_not_saved(self):
+        pet = self.select_pets()[0]
+        owner = pet.owner
+
+        # the row is modified behind the ORM, saving the clean instances must not overwrite it
+        self.con.execute('UPDATE "owner" SET "name" = \'ipsum\' WHERE "id" = ?', (owner.pk,))
+        self.con.commit()
+
+        pet.name = 'lorem'
+        pet.save()
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "name" FROM "owner" WHERE "id" = ?', (owner.pk,))
+        self.assertEqual('ipsum', cur.fetchone()[0])
+        cur.execute('SELECT "name", "owner_id" FROM "pet" WHERE "id" = ?', (pet.pk,))
+        self.assertEqual(('lorem', owner.pk), cur.fetchone())
+        cur.close()
+
+    def test_unloaded_ref_is_kept(self):
+        pet = self.select_pets()[0]
+        pet.name = 'lorem'
+        pet.save()  # the raw foreign key value is written back
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "owner_id" FROM "pet" WHERE "id" = ?', (pet.pk,))
+        self.assertEqual(1, cur.fetchone()[0])
+        cur.close()
+
+    def test_unsaved_ref_is_a_change(self):
+        pet = self.pet()
+        pet.name = 'stray'
+        pet.save()
+        pet = ModelFactory(self.pet, QueryBuilder(self.pet).select().build().execute().res).to_list()[-1]
+        self.assertIsNone(self.pet.owner.get_raw(pet))  # NULL foreign key
+
+        owner = self.owner()
+        owner.name = 'adopter'
+        pet.owner = owner  # not saved yet: no primary key, like the NULL
+        self.assertTrue(pet.is_dirty())
+        self.assertEqual({'owner'}, pet.get_changes())
+        pet.save()
+
+        self.assertIsNotNone(owner.pk)
+        cur = self.con.cursor()
+        cur.execute('SELECT "owner_id" FROM "pet" WHERE "id" = ?', (pet.pk,))
+        self.assertEqual(owner.pk, cur.fetchone()[0])
+        cur.close()
+        self.assertFalse(pet.is_dirty())
@@ -66,7 +66,8 @@ class TestModelInitialization(unittest.TestCase):
         self.assertEqual(total_cols, len(super_cols))
 
         nested_cols = NestedModel.get_cols(True)
-        self.assertEqual(len(nested_model_cols), len(nested_cols))
+        self.assertEqual(len(nested_model_cols) + 1, len(nested_cols))  # the synthetic primary key
+        self.assertEqual(NestedModel.get_cols(), nested_cols)  # the columns are not rebuilt
 
     def test_get_pk_col(self):
         class Model(AbstractModel):
@@ -129,3 +130,24 @@ class TestModelInitialization(unittest.TestCase):
         for col_name, col_meta in cols.items():
             setattr(model, col_name, col_meta)
         return model
+
+    def test_metadata(self):
+        class Author(AbstractModel):
+            name = ft.TextField(index=True)
+
+        class Post(AbstractModel):
+            id = ft.IntegerField(primary_key=True)
+            author = ft.ForeignKey(Author)
+
+        self.assertIs(Post.id, Post.get_pk_col())
+        self.assertIs(Post.author, Post.get_col('author'))
+        self.assertIs(Post.author, Post.get_col('author_id'))
+        self.assertIsNone(Post.get_col('lorem'))
+        self.assertEqual({'id': 'INTEGER', 'author': 'INTEGER'}, dict(Post._meta.sql_types))
+        self.assertEqual(1, len(Author.get_indexes()))
+
+        # assigning a column recomputes the metadata
+        meta = Author._meta
+        Author.bio = ft.TextField()
+        self.assertIsNot(meta, Author._meta)
+        self.assertIs(Author.bio, Author.get_col('bio'))
@@ -0,0 +1,123 @@
+import gc
+import os
+import sqlite3
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import ModelRegistry
+from src.core_modules.utils import Connection
+
+
+class TestModelRegistry(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        if os.path.exists(self.DB_PATH):
+            os.remove(self.DB_PATH)
+
+    def test_get(self):
+        class Base(AbstractModel):
+            pass
+
+        class Nested(Base):
+            title = ft.TextField()
+
+        registry = AbstractModel.registry
+        self.assertIs(Nested, registry.get('Nested'))
+        self.assertIn(Nested, registry.models())
+        self.assertIsNone(registry.get('NotDeclared'))
+
+    def test_scope(self):
+        def declare():
+            class Owner(AbstractModel):
+                pass
+            return Owner
+
+        other_owner = declare()
+
+        class Owner(AbstractModel):
+            pass
+
+        class Pet(AbstractModel):
+            owner = ft.ForeignKey('Owner')
+
+        def declare_later():
+            class Owner(AbstractModel):
+                pass
+            return Owner
+
+        later_owner = declare_later()
+
+        self.assertIs(later_owner, AbstractModel.registry.get('Owner'))
+        # the model declared in the same scope is referenced
+        self.assertIs(Owner, Pet.owner.get_ref())
+        self.assertIsNot(other_owner, Pet.owner.get_ref())
+
+    def test_weak_references(self):
+        class Ephemeral(AbstractModel):
+            pass
+
+        self.assertIsNotNone(AbstractModel.registry.get('Ephemeral'))
+        del Ephemeral
+        gc.collect()
+        self.assertIsNone(AbstractModel.registry.get('Ephemeral'))
+
+    def test_creation_order(self):
+        class Comment(AbstractModel):
+            post = ft.ForeignKey('Post')
+            author = ft.ForeignKey('Writer')
+
+        class Post(AbstractModel):
+            author = ft.ForeignKey('Writer')
+            parent = ft.ForeignKey('Post', not_null=False)  # self reference
+
+        class Writer(AbstractModel):
+            name = ft.TextField()
+
+        order = ModelRegistry.creation_order([Comment, Post, Writer])
+        self.assertEqual([Writer, Post, Comment], order)
+
+    def test_init_db(self):
+        class Shelf(AbstractModel):
+            DB_PATH = self.DB_PATH
+
+            label = ft.TextField()
+
+        class Volume(AbstractModel):
+            DB_PATH = self.DB_PATH
+
+            shelf = ft.ForeignKey('Shelf')
+
+        AbstractModel.init_db(self.DB_PATH)
+
+        con = sqlite3.connect(self.DB_PATH)
+        cur = con.cursor()
+        cur.execute(
+            'SELECT "name" FROM "sqlite_master" WHERE "type" = \'table\' AND "name" NOT LIKE \'sqlite_%\' ORDER BY "rowid"'
+        )
+        self.assertEqual(['shelf', 'volume'], [row[0] for row in cur.fetchall()])
+        cur.close()
+        con.close()
+
+    def test_upgrade_db(self):
+        class Drawer(AbstractModel):
+            DB_PATH = self.DB_PATH
+
+            label = ft.TextField()
+
+        con = sqlite3.connect(self.DB_PATH)
+        con.execute('CREATE TABLE "drawer" ("id" INTEGER PRIMARY KEY, "label" TEXT)')  # previous version
+        con.execute('INSERT INTO "drawer" ("label") VALUES (\'first\')')
+        con.commit()
+
+        Drawer.label = ft.TextField(index=True)
+        self.assertTrue(AbstractModel.upgrade_db(self.DB_PATH, 1))
+        self.assertFalse(AbstractModel.upgrade_db(self.DB_PATH, 1))  # once per version
+
+        self.assertEqual(1, con.execute('PRAGMA user_version').fetchone()[0])
+        self.assertIn('drawer_label_idx', [row[1] for row in con.execute('PRAGMA index_list("drawer")')])
+        self.assertEqual([('first', )], con.execute('SELECT "label" FROM "drawer"').fetchall())
+        con.close()
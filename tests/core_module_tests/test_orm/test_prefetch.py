@@ -0,0 +1,75 @@
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM.exceptions import UndefinedFieldException
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
+
+
+class TestPrefetch(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_AUTHORS = 5
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Author(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            name = ft.TextField()
+
+        class Article(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            title = ft.TextField()
+            author = ft.ForeignKey(Author, reversed_by='articles', not_null=False)
+
+        QueryBuilder(Author).create_table(True).build().execute()
+        QueryBuilder(Article).create_table(True).build().execute()
+
+        for i in range(self.NUM_OF_AUTHORS):
+            author = Author()
+            author.name = f'author {i}'
+            author.save()
+            for j in range(i):
+                article = Article()
+                article.title = f'article {i}.{j}'
+                article.author = author
+                article.save(False)
+
+        self.author = Author
+        self.article = Article
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        QueryBuilder.MAX_VARIABLES = 999
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def select_authors(self) -> list:
+        qb = QueryBuilder(self.author).select().prefetch('articles').build().execute()
+        return ModelFactory(self.author, qb.res).append_prefetches(*qb.prefetches).to_list()
+
+    def test_prefetch(self):
+        authors = self.select_authors()
+        self.assertEqual(self.NUM_OF_AUTHORS, len(authors))
+        for i, author in enumerate(authors):
+            self.assertEqual(i, len(author.articles))
+            for article in author.articles:
+                self.assertIsInstance(article, self.article)
+                self.assertIs(author, article.author)
+
+    def test_chunks(self):
+        QueryBuilder.MAX_VARIABLES = 2
+        authors = self.select_authors()
+        self.assertEqual(list(range(self.NUM_OF_AUTHORS)), [len(author.articles) for author in authors])
+
+    def test_iter_models(self):
+        rows = QueryBuilder(self.author).select().iterate(2)
+        authors = ModelFactory(self.author, rows).append_prefetches('articles').iter_models()
+        self.assertEqual(list(range(self.NUM_OF_AUTHORS)), [len(author.articles) for author in authors])
+
+    def test_undefined_relation(self):
+        self.assertRaises(UndefinedFieldException, QueryBuilder(self.author).select().prefetch, 'books')
@@ -1,5 +1,8 @@
+import array
+import importlib.util
 import os
 import sqlite3
+import threading
 import unittest
 import time
 import random
@@ -9,6 +12,9 @@ from collections import namedtuple
 from src.core_modules.ORM import QueryBuilder
 from src.core_modules.ORM import AbstractModel
 from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM.exceptions import SQLSyntaxError
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
 
 
 class TestSelect(unittest.TestCase):
@@ -52,6 +58,7 @@ class TestSelect(unittest.TestCase):
 
     def tearDown(self) -> None:
         self.con.close()
+        Connection.close_all()  # the pooled connections of the removed file
         AbstractModel.DB_PATH = None
         os.remove(self.DB_PATH)
 
@@ -239,3 +246,229 @@ class TestSelect(unittest.TestCase):
                 self.assertEqual(qb_col, col)
 
         cur.close()
+
+    def test_iterate(self):
+        cur = self.con.cursor()
+        cur.execute('SELECT * FROM "book"')
+        rows = cur.fetchall()
+
+        qb = QueryBuilder(self.book).select().build()
+        res = qb.iterate(batch_size=2)
+        self.assertNotIsInstance(res, list)
+        self.assertEqual(rows, list(res))
+
+        books = ModelFactory(self.book, QueryBuilder(self.book).select().iterate(2)).iter_models()
+        for book, row in zip(books, rows):
+            self.assertIsInstance(book, self.book)
+            self.assertEqual(row[0], book.pk)
+
+        cur.close()
+
+    def test_paginate(self):
+        qb = QueryBuilder(self.book).select().paginate(page_size=4).build()
+        sql = qb.sql
+        self.assertIn('ORDER BY', sql)
+        self.assertIn('LIMIT', sql)
+        self.assertNotIn('OFFSET', sql)
+
+        qb.execute()
+        self.assertEqual([1, 2, 3, 4], [row[0] for row in qb.res])
+        cursor = qb.next_cursor
+        self.assertIsNotNone(cursor)
+
+        qb = QueryBuilder(self.book).select().paginate(page_size=4, after=cursor).build()
+        self.assertIn('WHERE', qb.sql)
+        qb.execute()
+        self.assertEqual([5, 6], [row[0] for row in qb.res])
+        self.assertIsNone(qb.next_cursor)
+
+    def test_paginate_or_where(self):
+        ids = list()
+        cursor = None
+        for _ in range(self.total_books):  # the pages would repeat if the seek predicate was OR-ed
+            qb = QueryBuilder(self.book).select()\
+                .where('id', '<', 3)\
+                .or_where('id', '>', 4)\
+                .paginate(page_size=2, after=cursor)\
+                .build().execute()
+            ids.extend(row[0] for row in qb.res)
+            cursor = qb.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual([1, 2, 5, 6], ids)
+
+    def test_paginate_not_selected_key(self):
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.user).values('first_name').paginate, 'dob')
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.user).select('first_name').paginate, 'dob')
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.book).values_list('desc').paginate)
+
+        qb = QueryBuilder(self.user).select('dob', 'last_name').paginate('dob').build().execute()
+        self.assertEqual([('John', '93')], qb.res)
+
+    def test_paginate_by_column(self):
+        for dob in ('50', '40', '40', '30'):
+            u = self.user()
+            u.last_name = 'Doe' + str(random.randint(1, 10 ** 9))
+            u.dob = dob
+            QueryBuilder(self.user).insert(u).build().execute()
+        cur = self.con.cursor()
+        cur.execute('SELECT * FROM "user" WHERE "dob" < ? ORDER BY "dob" DESC, "last_name" DESC', ('90', ))
+        rows = cur.fetchall()
+
+        pages = list()
+        cursor = None
+        while True:
+            qb = QueryBuilder(self.user).select()\
+                .where('dob', '<', '90')\
+                .paginate('dob', 2, cursor, QueryBuilder.DESC)\
+                .build().execute()
+            pages.extend(qb.res)
+            cursor = qb.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(rows, pages)
+
+        cur.close()
+
+    def test_join(self):
+        qb = QueryBuilder(self.book).select().join('owner').where('id', '<', 3).build()
+        sql = qb.sql
+        self.assertIn('LEFT JOIN "user"', sql)
+        self.assertLess(sql.index('JOIN'), sql.index('WHERE'))
+        qb.execute()
+        res = qb.res
+        self.assertEqual(2, len(res))
+        self.assertEqual(len(self.book.get_cols()) + len(self.user.get_cols()), len(res[0]))
+
+        books = ModelFactory(self.book, res).append_joins(*qb.joins).to_list()
+        self.assertIsInstance(books[0].owner, self.book.owner.get_ref())
+        self.assertEqual('John', books[0].owner.last_name)
+        self.assertEqual('93', books[0].owner.dob)
+        self.assertIsNone(books[1].owner)  # LEFT JOIN without match
+
+        qb = QueryBuilder(self.book).select().join(self.book.owner, QueryBuilder.INNER).build().execute()
+        self.assertEqual(1, len(qb.res))
+
+    def test_select_related(self):
+        another = self.book()
+        another.owner = self.u
+        QueryBuilder(self.book).insert(another, False).build().execute()
+
+        qb = QueryBuilder(self.book).select().select_related('owner').build().execute()
+        books = [book for book in ModelFactory(self.book, qb.res).append_joins(*qb.joins).to_list() if book.owner]
+        self.assertEqual(2, len(books))
+        self.assertIs(books[0].owner, books[1].owner)  # hydrated once
+
+    def test_select_fields(self):
+        qb = QueryBuilder(self.book).select('desc').build()
+        self.assertEqual('SELECT "book"."id", "book"."desc" FROM "book"', qb.sql.strip())
+        self.assertEqual(['id', 'desc'], [col.name for col in qb.cols])
+
+        qb = QueryBuilder(self.book).defer(self.book.desc).build()
+        self.assertNotIn('"desc"', qb.sql)
+        self.assertIn('"user_last_name"', qb.sql)
+
+        qb = QueryBuilder(self.book).only('user_last_name').build()
+        self.assertIn('"user_last_name"', qb.sql)
+
+        self.assertRaises(SQLSyntaxError, QueryBuilder(self.book).select, 'lorem')
+
+    def test_deferred_fields(self):
+        qb = QueryBuilder(self.book).defer('desc').where('id', QueryBuilder.EQUALS, self.b.pk).build().execute()
+        book = ModelFactory(self.book, qb.res).only(*qb.cols).to_list()[0]
+        self.assertEqual({'desc'}, book._deferred)
+        self.assertFalse(book.is_dirty())
+
+        # loaded on access
+        self.assertEqual('Book description', book.desc)
+        self.assertFalse(book._deferred)
+        self.assertFalse(book.is_dirty())
+
+        # a deferred reference
+        qb = QueryBuilder(self.book).only('desc').where('id', QueryBuilder.EQUALS, self.b.pk).build().execute()
+        book = ModelFactory(self.book, qb.res).only(*qb.cols).to_list()[0]
+        self.assertEqual('John', book.owner.last_name)
+
+        # the deferred columns are not written
+        book = ModelFactory(self.book, qb.res).only(*qb.cols).to_list()[0]
+        book.desc = 'updated'
+        book.save()
+        cur = self.con.cursor()
+        cur.execute('SELECT "desc", "user_last_name" FROM "book" WHERE "id" = ?', (self.b.pk, ))
+        self.assertEqual(('updated', 'John'), cur.fetchone())
+        cur.close()
+
+    def test_values(self):
+        rows = QueryBuilder(self.book).values('desc', 'owner').build().execute().res
+        self.assertEqual(self.total_books, len(rows))
+        self.assertEqual({'desc': 'Book description', 'owner': 'John'}, rows[0])
+        self.assertEqual({'desc': None, 'owner': None}, rows[1])
+
+        rows = list(QueryBuilder(self.book).values().build().iterate())
+        self.assertEqual(['id', 'desc', 'owner'], list(rows[0]))
+
+    def test_read_only(self):
+        qb = QueryBuilder(self.book).select().where('id', QueryBuilder.EQUALS, 1)
+        self.assertTrue(qb.read_only)
+        self.assertEqual(1, len(qb.build().execute().res))
+        readers = Connection.get_pool(self.DB_PATH, True)._readers
+        self.assertEqual(1, len(readers[threading.get_ident()]))  # executed by the read-only pool
+
+        self.assertFalse(QueryBuilder(self.book).delete(self.book()).read_only)
+
+    def test_values_list(self):
+        qb = QueryBuilder(self.book).values_list('id').where('desc', QueryBuilder.EQUALS, None).build()
+        self.assertEqual('SELECT "book"."id" FROM "book" WHERE "book"."desc" IS ?', qb.sql.strip())
+        self.assertEqual([(i, ) for i in range(2, self.total_books + 1)], qb.execute().res)
+
+        row = QueryBuilder(self.book).values_list(named=True).build().execute().res[0]
+        self.assertEqual(1, row.id)
+        self.assertEqual('John', row.owner)
+
+    def test_columns(self):
+        columns = QueryBuilder(self.book).columns().build().execute().res
+        self.assertEqual(['id', 'desc', 'owner'], list(columns))
+        self.assertIsInstance(columns['id'], array.array)
+        self.assertEqual(list(range(1, self.total_books + 1)), columns['id'].tolist())
+        self.assertEqual(['Book description'] + [None] * self.NUM_OF_BOOKS, columns['desc'])
+
+        columns = QueryBuilder(self.book).columns('id').where('id', QueryBuilder.EQUALS, 0).build().execute().res
+        self.assertEqual({'id': array.array('q')}, columns)
+
+    def test_columns_batches(self):
+        class Reading(AbstractModel):
+            value = ft.IntegerField(not_null=False)
+
+        Reading.create_table()
+        values = [1, 2, 3, None, 5]
+        QueryBuilder(Reading).insert_rows(['value'], [(val, ) for val in values]).build().execute()
+
+        qb = QueryBuilder(Reading).columns()
+        qb.BATCH_SIZE = 2  # the NULL is fetched after the first batch
+        columns = qb.build().execute().res
+        self.assertEqual(array.array('q', range(1, 6)), columns['id'])
+        self.assertEqual(values, columns['value'])  # nullable
+
+    def test_columns_mixed_types(self):
+        class Reading(AbstractModel):
+            value = ft.IntegerField(not_null=False)
+            ratio = ft.RealField(not_null=False)
+
+        Reading.create_table()
+        rows = [(1, 0.5), ('n/a', 'n/a'), (2, None), (None, 1.5), (4.5, 2)]
+        QueryBuilder(Reading).insert_rows(['value', 'ratio'], rows).build().execute()
+
+        for batch_size in (1, 2, len(rows)):
+            qb = QueryBuilder(Reading).columns('value', 'ratio')
+            qb.BATCH_SIZE = batch_size
+            columns = qb.build().execute().res
+            self.assertEqual([val for val, _ in rows], columns['value'])  # no value lost or duplicated
+            self.assertEqual([ratio for _, ratio in rows], columns['ratio'])
+
+        columns = QueryBuilder(Reading).columns('value').where('id', QueryBuilder.EQUALS, 1).build().execute().res
+        self.assertEqual(array.array('q', [1]), columns['value'])
+
+    @unittest.skipIf(importlib.util.find_spec('numpy') is None, 'NumPy is not installed')
+    def test_columns_numpy(self):
+        columns = QueryBuilder(self.book).columns('id', numpy=True).build().execute().res
+        self.assertEqual(sum(range(1, self.total_books + 1)), columns['id'].sum())
@@ -0,0 +1,78 @@
+import concurrent.futures
+import os
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import StatementCache
+from src.core_modules.utils import Connection
+
+
+class TestStatementCache(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Scalar(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            txt = ft.TextField()
+
+        QueryBuilder(Scalar).create_table(True).build().execute()
+
+        self.scalar_model = Scalar
+        QueryBuilder.cache.clear()
+
+    def tearDown(self) -> None:
+        QueryBuilder.cache.clear()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def test_same_sql(self):
+        sqls = set()
+        for i in range(3):
+            inst = self.scalar_model()
+            inst.txt = str(i)
+            qb = QueryBuilder(self.scalar_model).insert(inst).build()
+            sqls.add(qb.sql)
+            qb.execute()
+        self.assertEqual(1, len(sqls))
+
+        stats = QueryBuilder.cache.stats()
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(2, stats['hits'])
+
+    def test_shapes(self):
+        for i in range(2):
+            QueryBuilder(self.scalar_model).select().where('txt', QueryBuilder.EQUALS, 'lorem').build()
+        QueryBuilder(self.scalar_model).select().where('txt', QueryBuilder.EQUALS, None).build()
+
+        stats = QueryBuilder.cache.stats()
+        self.assertEqual(3, stats['misses'])  # SELECT, WHERE "txt" = ?, WHERE "txt" IS ?
+        self.assertEqual(3, stats['hits'])
+        self.assertEqual(3, stats['size'])
+
+    def test_invalidate(self):
+        QueryBuilder(self.scalar_model).select().build()
+        self.assertEqual(1, QueryBuilder.cache.stats()['size'])
+
+        QueryBuilder.cache.invalidate(self.scalar_model)
+        self.assertEqual(0, QueryBuilder.cache.stats()['size'])
+
+    def test_concurrent_hits(self):
+        cache = StatementCache()
+        num_of_threads, num_of_calls = 8, 1000
+
+        def get(_):
+            for i in range(num_of_calls):
+                cache.get(self.scalar_model, ('shape', i % 10), lambda: 'SELECT 1')
+
+        with concurrent.futures.ThreadPoolExecutor(num_of_threads) as pool:
+            list(pool.map(get, range(num_of_threads)))
+
+        stats = cache.stats()
+        self.assertEqual(num_of_threads * num_of_calls, stats['hits'] + stats['misses'])  # no lost update
+        self.assertEqual(10, stats['size'])
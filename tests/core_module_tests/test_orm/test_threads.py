@@ -0,0 +1,117 @@
+import concurrent.futures
+import os
+import threading
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection, DBWriter
+
+
+class TestThreads(unittest.TestCase):
+    DB_PATH = './test.db'
+    NUM_OF_THREADS = 8
+    NUM_OF_NOTES = 50
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Note(AbstractModel):
+            body = ft.TextField()
+
+        self.note = Note
+        self.note.create_table()
+
+    def tearDown(self) -> None:
+        Connection.close_all()
+        if os.path.exists(self.DB_PATH):
+            os.remove(self.DB_PATH)
+
+    def _count(self) -> int:
+        return QueryBuilder(self.note).count().build().execute().res
+
+    def _new_note(self, body: str):
+        note = self.note()
+        note.body = body
+        return note
+
+    def test_concurrent_writes(self):
+        def produce(i):
+            return [self._new_note(f'Note {i}.{j}').submit_save() for j in range(self.NUM_OF_NOTES)]
+
+        with concurrent.futures.ThreadPoolExecutor(self.NUM_OF_THREADS) as pool:
+            futures = [future for futures in pool.map(produce, range(self.NUM_OF_THREADS)) for future in futures]
+        notes = [future.result() for future in futures]
+
+        self.assertEqual(self.NUM_OF_THREADS * self.NUM_OF_NOTES, self._count())
+        self.assertEqual(len(notes), len({note.pk for note in notes}))
+
+    def test_coalesced_writes(self):
+        writer = self.note.get_writer()
+        self.assertIs(DBWriter.get(self.DB_PATH), writer)
+        gate = threading.Event()
+        writer.submit(gate.wait)  # the next calls are queued meanwhile
+
+        futures = [writer.submit(lambda: Connection.get_transactions(self.DB_PATH)[0]) for _ in range(10)]
+        gate.set()
+
+        transactions = {future.result() for future in futures}
+        self.assertEqual(1, len(transactions))  # one transaction
+
+    def test_failed_write(self):
+        writer = self.note.get_writer()
+        gate = threading.Event()
+        writer.submit(gate.wait)
+
+        ghosts = list()  # referenced, so kept by the identity map unless evicted
+
+        def failing():
+            ghosts.append(self._new_note('Rolled back').save())
+            raise ValueError()
+
+        def hydrate():  # same transaction: the rowid of the rolled back row is reused
+            QueryBuilder(self.note).insert_rows(['body'], [('Inserted', )]).build().execute()
+            rows = QueryBuilder(self.note).select().build().execute().res
+            return [note.body for note in ModelFactory(self.note, rows).to_list()]
+
+        saved = self._new_note('Saved').submit_save()
+        failed = writer.submit(failing)
+        hydrated = writer.submit(hydrate)
+        other = self._new_note('Saved too').submit_save()
+        gate.set()
+
+        self.assertRaises(ValueError, failed.result)  # rolled back alone
+        self.assertIsNotNone(saved.result().pk)
+        self.assertIsNotNone(other.result().pk)
+        self.assertEqual(['Saved', 'Inserted'], hydrated.result())
+        self.assertEqual(1, len(ghosts))
+
+        # the rolled back instance is expired: submitted again, it is inserted
+        self.assertIsNone(ghosts[0].pk)
+        self.assertIsNotNone(ghosts[0].submit_save().result().pk)
+
+        rows = QueryBuilder(self.note).values_list('body').build().execute().res
+        self.assertEqual(['Inserted', 'Rolled back', 'Saved', 'Saved too'], sorted(row[0] for row in rows))
+
+    def test_per_thread_readers(self):
+        for i in range(self.NUM_OF_NOTES):
+            self._new_note(f'Note {i}').save()
+
+        barrier = threading.Barrier(self.NUM_OF_THREADS)
+
+        def read(_):
+            barrier.wait()
+            with Connection(self.DB_PATH, read_only=True) as cur:
+                con = cur.connection
+            return con, self._count()
+
+        with concurrent.futures.ThreadPoolExecutor(self.NUM_OF_THREADS) as pool:
+            results = list(pool.map(read, range(self.NUM_OF_THREADS)))
+
+        self.assertTrue(all(self.NUM_OF_NOTES == count for _, count in results))
+        self.assertEqual(self.NUM_OF_THREADS, len({id(con) for con, _ in results}))
+        readers = Connection.get_pool(self.DB_PATH, True)._readers
+        self.assertEqual(self.NUM_OF_THREADS, sum(len(cons) for cons in readers.values()))
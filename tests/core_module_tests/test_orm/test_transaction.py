@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import unittest
+
+
+from src.core_modules.ORM import AbstractModel
+from src.core_modules.ORM import field_types as ft
+from src.core_modules.ORM import QueryBuilder
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
+
+
+class TestTransaction(unittest.TestCase):
+    DB_PATH = './test.db'
+
+    def setUp(self) -> None:
+        AbstractModel.DB_PATH = self.DB_PATH
+
+        class Scalar(AbstractModel):
+            id = ft.IntegerField(primary_key=True, autoincrement=True)
+            txt = ft.TextField()
+
+        QueryBuilder(Scalar).create_table(True).build().execute()
+
+        self.scalar_model = Scalar
+
+        self.con = sqlite3.connect(AbstractModel.DB_PATH)
+
+    def tearDown(self) -> None:
+        self.con.close()
+        Connection.close_all()
+        AbstractModel.DB_PATH = None
+        os.remove(self.DB_PATH)
+
+    def count(self) -> int:
+        cur = self.con.cursor()
+        cur.execute('SELECT COUNT(*) FROM "scalar"')
+        num = cur.fetchone()[0]
+        cur.close()
+        return num
+
+    def make(self, txt: str):
+        inst = self.scalar_model()
+        inst.txt = txt
+        return inst
+
+    def test_commit_once(self):
+        with self.scalar_model.transaction():
+            for i in range(10):
+                self.make(str(i)).save()
+            self.assertEqual(0, self.count())  # not committed yet
+        self.assertEqual(10, self.count())
+
+    def test_rollback(self):
+        try:
+            with self.scalar_model.transaction():
+                self.make('lorem').save()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(0, self.count())
+
+    def test_savepoint(self):
+        with self.scalar_model.transaction():
+            self.make('outer').save()
+            try:
+                with self.scalar_model.transaction() as inner:
+                    self.assertTrue(inner.nested)
+                    self.make('inner').save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with self.scalar_model.transaction():
+                inst = self.make('kept').save()
+            inst.delete()
+        self.assertEqual(1, self.count())
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "txt" FROM "scalar"')
+        self.assertEqual(('outer', ), cur.fetchone())
+        cur.close()
+
+    def test_savepoint_identity_map(self):
+        class Note(AbstractModel):  # the rowids of the rolled back rows are reused
+            body = ft.TextField()
+
+        Note.create_table()
+        with Note.transaction() as outer:
+            try:
+                with Note.transaction():
+                    ghost = Note()
+                    ghost.body = 'ghost'
+                    ghost.save()
+                    self.assertIn(ghost, outer.identity_map)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.assertNotIn(ghost, outer.identity_map)
+
+            QueryBuilder(Note).insert_rows(['body'], [('real', )]).build().execute()
+            rows = QueryBuilder(Note).select().build().execute().res
+            notes = ModelFactory(Note, rows).to_list()
+            self.assertIsNot(ghost, notes[0])
+            self.assertEqual('real', notes[0].body)
+            self.assertIsNone(ghost.pk)  # expired
+
+    def test_retry_after_rollback(self):
+        kept = self.make('kept').save()
+        inserted = self.make('inserted')
+        try:
+            with self.scalar_model.transaction() as transaction:
+                inserted.save()
+                kept.txt = 'updated'
+                kept.save()
+                deleted = self.make('deleted')
+                deleted.save()
+                deleted.delete()
+                self.assertIn(inserted, transaction.identity_map)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(1, self.count())
+
+        # the instances are written again as a whole
+        self.assertIsNone(inserted.pk)
+        self.assertTrue(inserted.is_dirty())
+        self.assertTrue(kept.is_dirty())
+        with self.scalar_model.transaction():
+            inserted.save()
+            kept.save()
+        self.assertEqual(2, self.count())
+
+        cur = self.con.cursor()
+        cur.execute('SELECT "txt" FROM "scalar" ORDER BY "id"')
+        self.assertEqual([('updated', ), ('inserted', )], cur.fetchall())
+        cur.close()
+
+    def test_retry_after_savepoint_rollback(self):
+        with self.scalar_model.transaction() as outer:
+            inst = self.make('inner')
+            try:
+                with self.scalar_model.transaction():
+                    inst.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.assertIsNone(inst.pk)
+            self.assertNotIn(inst, outer.identity_map)
+            inst.save()
+            self.assertIn(inst, outer.identity_map)
+        self.assertEqual(1, self.count())
@@ -6,6 +6,9 @@ import os
 from src.core_modules.ORM import AbstractModel
 from src.core_modules.ORM import field_types as ft
 from src.core_modules.ORM import QueryBuilder
+from src.core_modules.ORM import Statement
+from src.core_modules.factories import ModelFactory
+from src.core_modules.utils import Connection
 
 
 class TestUpdate(unittest.TestCase):
@@ -46,6 +49,7 @@ class TestUpdate(unittest.TestCase):
 
     def tearDown(self) -> None:
         self.con.close()
+        Connection.close_all()  # the pooled connections of the removed file
         os.remove(self.DB_PATH)
         AbstractModel.DB_PATH = None
 
@@ -121,3 +125,51 @@ class TestUpdate(unittest.TestCase):
         self.assertIn('null', row)
 
         cur.close()
+
+    def test_update_where(self):
+        cur = self.con.cursor()
+        for txt in ('lorem', 'ipsum', 'lorem'):
+            inst = self.scalar_model()
+            inst.ipsum = txt
+            inst.dolor = '0x00'
+            QueryBuilder(self.scalar_model).insert(inst).build().execute()
+
+        qb = QueryBuilder(self.scalar_model)\
+            .update_where({'dolor': '0xFF', self.scalar_model.ipsum: Statement('UPPER("ipsum")')})\
+            .where('ipsum', QueryBuilder.EQUALS, 'lorem')\
+            .build()
+        sql = qb.sql
+        self.assertEqual(1, sql.count('UPDATE'))
+        self.assertIn('WHERE', sql)
+        self.assertEqual(['0xFF', 'lorem'], qb.params)
+        self.assertEqual(2, qb.execute().row_count)
+
+        cur.execute('SELECT "ipsum", "dolor" FROM "scalar" ORDER BY "lorem"')
+        rows = cur.fetchall()
+        self.assertEqual([('SUM', '0xAA'), ('LOREM', '0xFF'), ('ipsum', '0x00'), ('LOREM', '0xFF')], rows)
+
+        cur.close()
+
+    def test_update_changes(self):
+        cur = self.con.cursor()
+        qb = QueryBuilder(self.scalar_model).select().build().execute()
+        inst = ModelFactory(self.scalar_model, qb.res).to_list()[0]
+        self.assertFalse(inst.get_changes())
+
+        inst.ipsum = 'updated'
+        self.assertEqual({'ipsum'}, inst.get_changes())
+        qb = QueryBuilder(self.scalar_model).update(inst).build()
+        self.assertIn('"ipsum"=?', qb.sql)
+        self.assertNotIn('"dolor"', qb.sql)
+        self.assertEqual(['updated', 1], qb.params)
+        inst.save()
+        self.assertFalse(inst.get_changes())
+
+        # no-op saving does not overwrite the row modified behind the ORM
+        cur.execute('UPDATE "scalar" SET "ipsum" = \'lorem\'')
+        self.con.commit()
+        inst.save()
+        cur.execute('SELECT "ipsum" FROM "scalar"')
+        self.assertEqual('lorem', cur.fetchone()[0])
+
+        cur.close()